@@ -1,9 +1,17 @@
 #!/usr/bin/env python3
 """
 Cross-platform script to configure and run User Gaze Track
-Usage: python run.py [--venv]
+Usage: python run.py [--venv] [--rebuild] [--configure]
+
+After a successful setup a fingerprint of the dependency files and the
+interpreter is stored, and later launches with the same fingerprint skip
+environment probing, dependency installation and the configuration prompt.
+Use --rebuild to force the full setup and --configure to open the
+configurator anyway.
 """
 
+import hashlib
+import json
 import subprocess
 import sys
 import os
@@ -22,6 +30,10 @@ class GazeTrackRunner:
         self.is_windows = platform.system() == "Windows"
         self.cert_file = "cert.pem"
         self.key_file = "key.pem"
+        # The fingerprint lives next to this script, whatever the working directory
+        self.base_dir = Path(__file__).resolve().parent
+        self.fingerprint_file = self.base_dir / ".run_fingerprint.json"
+        self.dependency_files = ["requirements.txt", "environment.yml"]
 
     def print_step(self, message, emoji="🔧"):
         """Print a formatted message"""
@@ -335,8 +347,69 @@ print("- key.pem (clave privada)")
                 if not self.run_command(f'"{python_path}" -m pip install {dep}'):
                     return False
 
-            self.print_step("Dependencies installed.", "✅")
-            return True
+        self.print_step("Dependencies installed.", "✅")
+        return True
+
+    def update_conda_environment(self):
+        """Update the conda environment after environment.yml changed"""
+        self.print_step(
+            f"Updating conda environment '{self.env_name}' from environment.yml...",
+            "⚙️",
+        )
+        return self.run_command(
+            f"conda env update -n {self.env_name} -f environment.yml"
+        )
+
+    def compute_fingerprint(self, force_venv):
+        """Hash the dependency files, the interpreter and the environment choice"""
+        digest = hashlib.sha256()
+        digest.update(sys.executable.encode("utf-8"))
+        digest.update(sys.version.encode("utf-8"))
+        digest.update(platform.platform().encode("utf-8"))
+        digest.update(b"venv" if force_venv else b"auto")
+
+        for name in self.dependency_files:
+            path = self.base_dir / name
+            digest.update(name.encode("utf-8"))
+            if path.exists():
+                digest.update(path.read_bytes())
+
+        return digest.hexdigest()
+
+    def load_fingerprint(self):
+        """Load the stored fingerprint, or None if there is no valid one"""
+        try:
+            with open(self.fingerprint_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_fingerprint(self, fingerprint, python_path):
+        """Store the fingerprint of a successful setup"""
+        data = {
+            "fingerprint": fingerprint,
+            "python_path": os.path.abspath(python_path),
+            "use_conda": self.use_conda,
+            "created": datetime.now().isoformat(timespec="seconds"),
+        }
+        try:
+            with open(self.fingerprint_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            self.print_step(f"Could not save setup fingerprint: {e}", "⚠️")
+
+    def fast_path_python(self, fingerprint):
+        """Return the stored Python path if the setup is unchanged"""
+        stored = self.load_fingerprint()
+        if not stored or stored.get("fingerprint") != fingerprint:
+            return None
+
+        python_path = stored.get("python_path")
+        if not python_path or not Path(python_path).exists():
+            return None
+
+        self.use_conda = bool(stored.get("use_conda"))
+        return python_path
 
     def ask_for_configuration(self, python_path):
         """Ask whether the user wants to configure the application"""
@@ -366,15 +439,42 @@ print("- key.pem (clave privada)")
         """Main method that runs the full setup and execution flow"""
         # Detectar argumentos
         force_venv = "--venv" in sys.argv
+        rebuild = "--rebuild" in sys.argv
+        configure = "--configure" in sys.argv
+
+        fingerprint = self.compute_fingerprint(force_venv)
+        stored = None if rebuild else self.load_fingerprint()
+
+        python_path = None if rebuild else self.fast_path_python(fingerprint)
+        if python_path:
+            self.print_step("Environment unchanged, skipping setup.", "⚡")
+
+            if not Path(self.cert_file).exists() or not Path(self.key_file).exists():
+                self.setup_ssl_certificates(python_path)
+
+            if configure and not self.ask_for_configuration(python_path):
+                sys.exit(1)
+
+            if not self.run_application(python_path):
+                sys.exit(1)
+            return
+
+        # Dependencies are reinstalled when a previous setup is outdated
+        outdated = stored is not None
 
         # Detectar gestor de entornos
         self.detect_environment_manager(force_venv)
 
         if self.use_conda:
             # Flujo conda
+            env_existed = (outdated or rebuild) and self.conda_env_exists()
             if not self.setup_conda_environment():
                 sys.exit(1)
 
+            if env_existed:
+                if not self.update_conda_environment():
+                    sys.exit(1)
+
             python_path = self.get_conda_python()
             if not python_path:
                 print("❌ Could not get the conda Python path")
@@ -392,7 +492,12 @@ print("- key.pem (clave privada)")
             python_path = self.get_venv_python()
 
             # Instalar dependencias si es necesario
-            if is_new_env or not self.check_flask_installed(python_path):
+            if (
+                is_new_env
+                or outdated
+                or rebuild
+                or not self.check_flask_installed(python_path)
+            ):
                 if not self.install_dependencies(python_path):
                     sys.exit(1)
             else:
@@ -407,6 +512,8 @@ print("- key.pem (clave privada)")
         if not self.ask_for_configuration(python_path):
             sys.exit(1)
 
+        self.save_fingerprint(fingerprint, python_path)
+
         # Ejecutar aplicación
         if not self.run_application(python_path):
             sys.exit(1)
@@ -0,0 +1,90 @@
+"""Compute the study-wide results of a study and save them as JSON.
+
+Every subject of the study is summarized in a pool of worker processes
+(``ANALYSIS_WORKERS``, one per CPU by default) and the summaries are reduced
+into an aggregate canonical heatmap, fixation statistics and task timings.
+The result is cached, so /api/get-study-analysis serves it right away
+until the study receives new data. With --scanpaths, the pairwise scanpath
+similarity of the subjects is computed instead, for
+/api/get-scanpath-similarity.
+
+Usage:
+    python scripts/analyze_study.py STUDY_ID [--bins 128] [--fields gaze,mouse]
+        [--workers N] [--output analysis.json]
+    python scripts/analyze_study.py STUDY_ID --scanpaths [--grid 5]
+        [--method levenshtein|scanmatch] [--workers N] [--output scanpaths.json]
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+
+def load_app():
+    """Import src/app.py without running its __main__ block."""
+    sys.path.insert(0, SRC)
+    spec = importlib.util.spec_from_file_location(
+        "gazetrack_app", os.path.join(SRC, "app.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("study", type=int)
+    parser.add_argument("--bins", type=int, default=128)
+    parser.add_argument("--fields", default="gaze,mouse")
+    parser.add_argument("--scanpaths", action="store_true")
+    parser.add_argument("--grid", type=int, default=5)
+    parser.add_argument("--method", default="levenshtein")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    app = load_app()
+    if args.workers is not None:
+        app.config["ANALYSIS_WORKERS"] = args.workers
+
+    started = time.perf_counter()
+
+    def progress(done, total):
+        elapsed = time.perf_counter() - started
+        print(f"\r{done}/{total} subjects ({elapsed:.0f} s)", end="", flush=True)
+
+    def percent(done, total):
+        elapsed = time.perf_counter() - started
+        print(f"\r{100 * done / total:.0f}% ({elapsed:.0f} s)", end="", flush=True)
+
+    with app.app_context():
+        from api.services import StudyAnalysisService
+
+        if args.scanpaths:
+            result = StudyAnalysisService().compare_scanpaths(
+                args.study, args.grid, method=args.method, progress=percent
+            )
+        else:
+            result = StudyAnalysisService().analyze_study(
+                args.study, args.bins, args.fields.split(","), progress
+            )
+
+    if result is None:
+        print(f"Study {args.study} not found")
+        sys.exit(1)
+
+    print()
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(result)
+        print(f"✅ Saved the results of study {args.study} to {args.output}")
+    else:
+        print(result.decode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measure how long it takes to import the Flask application.
+
+Runs ``python -X importtime`` on ``src/app.py`` in a fresh interpreter a few
+times and reports the median total import time, the slowest top-level
+modules and whether heavy optional modules were loaded during boot.
+
+Usage:
+    python scripts/benchmark_import_time.py [--runs 5] [--top 15] [--max-ms 800]
+
+With ``--max-ms`` the script exits with status 1 when the median is above the
+limit, so it can be used to keep worker boot time from regressing.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+
+# Modules that should not be imported while the app boots
+DEFERRED_MODULES = ["flasgger", "numpy"]
+
+# Load app.py under another name so the `app` package in src/ does not
+# shadow it and the `__main__` block is not run
+IMPORT_APP = (
+    "import importlib.util, sys;"
+    f"sys.path.insert(0, {SRC!r});"
+    f"spec = importlib.util.spec_from_file_location('gazetrack_app', {os.path.join(SRC, 'app.py')!r});"
+    "module = importlib.util.module_from_spec(spec);"
+    "spec.loader.exec_module(module)"
+)
+
+
+def run_once():
+    """Import the app once and return {module: (self_us, cumulative_us, depth)}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_APP],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        raise SystemExit("Importing the app failed")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float)
+    args = parser.parse_args()
+
+    totals = []
+    modules = {}
+    for _ in range(args.runs):
+        modules = run_once()
+        totals.append(
+            sum(cum for _, cum, depth in modules.values() if depth == 0) / 1000
+        )
+
+    median = statistics.median(totals)
+    print(f"Total import time (median of {args.runs}): {median:.1f} ms")
+    print(f"Runs: {', '.join(f'{t:.1f}' for t in totals)} ms\n")
+
+    print("Slowest top-level imports (last run):")
+    top_level = [(cum, name) for name, (_, cum, depth) in modules.items() if depth == 0]
+    for cumulative_us, name in sorted(top_level, reverse=True)[: args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    print("\nDeferred modules:")
+    for name in DEFERRED_MODULES:
+        status = "imported at boot" if name in modules else "not imported"
+        print(f"  {name}: {status}")
+
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"\n❌ Median import time {median:.1f} ms exceeds {args.max_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
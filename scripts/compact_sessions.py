@@ -0,0 +1,61 @@
+"""Move the samples of finished sessions from the database to cold storage.
+
+A session is considered finished when its subject has received no new data
+for ``--idle-hours``. Its measurements and points are written to columnar
+files in ``src/instance/cold`` and deleted from the database; the API keeps
+reading them transparently.
+
+Usage:
+    python scripts/compact_sessions.py [--idle-hours 24] [--subject ID] [--compress]
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+from datetime import timedelta
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+
+def load_app():
+    """Import src/app.py without running its __main__ block."""
+    sys.path.insert(0, SRC)
+    spec = importlib.util.spec_from_file_location(
+        "gazetrack_app", os.path.join(SRC, "app.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--idle-hours", type=float, default=24)
+    parser.add_argument("--subject", type=int)
+    parser.add_argument("--compress", action="store_true")
+    args = parser.parse_args()
+
+    app = load_app()
+    with app.app_context():
+        from api.services import CompactionService
+
+        service = CompactionService()
+        if args.subject is not None:
+            moved = {
+                args.subject: service.compact_subject(
+                    args.subject, compress=args.compress
+                )
+            }
+        else:
+            moved = service.compact_idle_subjects(
+                idle=timedelta(hours=args.idle_hours), compress=args.compress
+            )
+
+    for subject_id, count in moved.items():
+        print(f"Subject {subject_id}: {count} samples moved to cold storage")
+    print(f"✅ Compacted {sum(moved.values())} samples")
+
+
+if __name__ == "__main__":
+    main()
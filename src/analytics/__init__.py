@@ -0,0 +1,36 @@
+"""
+Analytics module for the application.
+This module provides NumPy-based processing of recorded gaze and mouse samples.
+"""
+
+from .downsampling import lttb_indices, bucket_means
+from .density import binned_density
+from .normalization import normalize_points, normalize_samples
+from .fixations import idt_fixations
+from .study import summarize_subject
+from .calibration import calibration_quality
+from .scanpath import (
+    grid_string,
+    aoi_string,
+    grid_substitution,
+    region_substitution,
+    edit_distances,
+    pairwise_similarity,
+)
+
+__all__ = [
+    "lttb_indices",
+    "bucket_means",
+    "binned_density",
+    "normalize_points",
+    "normalize_samples",
+    "idt_fixations",
+    "summarize_subject",
+    "calibration_quality",
+    "grid_string",
+    "aoi_string",
+    "grid_substitution",
+    "region_substitution",
+    "edit_distances",
+    "pairwise_similarity",
+]
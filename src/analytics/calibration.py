@@ -0,0 +1,64 @@
+"""
+Calibration quality: how far gaze predictions land from known targets.
+"""
+
+from typing import Dict
+import numpy as np
+
+
+def calibration_quality(
+    target_x: np.ndarray,
+    target_y: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    scale: float,
+) -> Dict[str, float]:
+    """
+    Score gaze predictions taken while the subject looked at known targets.
+
+    Accuracy is the distance between each target and the mean of its
+    predictions, averaged over targets: the systematic offset of the
+    tracker. Precision is the root mean square distance of the predictions
+    from that mean: their scatter. The score follows WebGazer's calibration
+    demo, 1 - distance / scale per prediction, floored at 0 and averaged,
+    so 1 means every prediction hit its target. Predictions with missing
+    coordinates (NaN) are dropped.
+
+    Args:
+        target_x: X coordinate of the target of each prediction
+        target_y: Y coordinate of the target of each prediction
+        x: Predicted gaze X coordinates
+        y: Predicted gaze Y coordinates
+        scale: Distance at which a prediction scores 0, in the units of x
+            and y (half the viewport height in the client's demo)
+
+    Returns:
+        Dictionary with accuracy and precision (in the units of x and y),
+        score (0 to 1) and samples, the number of predictions used; the
+        metrics are NaN without predictions
+    """
+    valid = ~(np.isnan(x) | np.isnan(y))
+    target_x, target_y, x, y = target_x[valid], target_y[valid], x[valid], y[valid]
+
+    if len(x) == 0:
+        return {"accuracy": np.nan, "precision": np.nan, "score": np.nan, "samples": 0}
+
+    # Predictions grouped by target, with the mean prediction of each target
+    targets, group = np.unique(
+        np.column_stack([target_x, target_y]), axis=0, return_inverse=True
+    )
+    group = group.ravel()
+    counts = np.bincount(group)
+    mean_x = np.bincount(group, weights=x) / counts
+    mean_y = np.bincount(group, weights=y) / counts
+
+    offsets = np.hypot(mean_x - targets[:, 0], mean_y - targets[:, 1])
+    scatter = np.hypot(x - mean_x[group], y - mean_y[group])
+    errors = np.hypot(x - target_x, y - target_y)
+
+    return {
+        "accuracy": float(offsets.mean()),
+        "precision": float(np.sqrt(np.mean(scatter**2))),
+        "score": float(np.mean(np.maximum(1.0 - errors / scale, 0.0))),
+        "samples": len(x),
+    }
@@ -0,0 +1,48 @@
+"""
+Binned density of gaze and mouse samples for heatmaps.
+"""
+
+from typing import Optional, Tuple, Union
+import numpy as np
+
+
+def binned_density(
+    x: np.ndarray,
+    y: np.ndarray,
+    bins: Union[int, Tuple[int, int]],
+    extent: Optional[Tuple[Tuple[float, float], Tuple[float, float]]] = None,
+    clip: bool = True,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Count samples on a regular grid with ``numpy.histogram2d``.
+
+    Missing samples (NaN) are dropped and negative coordinates, recorded
+    when the pointer leaves the page, are clamped to the page edge unless
+    ``clip`` is False. Samples outside the extent are not counted.
+
+    Args:
+        x: X coordinates
+        y: Y coordinates
+        bins: Number of bins, for both axes or as (x_bins, y_bins)
+        extent: ((x_min, x_max), (y_min, y_max)) covered by the grid; by
+            default from 0 to the largest coordinate of each axis
+        clip: Clamp negative coordinates to 0
+
+    Returns:
+        Tuple (counts, x_edges, y_edges) where counts has shape
+        (x_bins, y_bins)
+    """
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    if clip:
+        x = np.clip(x, 0, None)
+        y = np.clip(y, 0, None)
+
+    if extent is None:
+        extent = (
+            (0.0, max(float(x.max()) if len(x) else 0.0, 1.0)),
+            (0.0, max(float(y.max()) if len(y) else 0.0, 1.0)),
+        )
+
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins, range=extent)
+    return counts.astype(np.int64), x_edges, y_edges
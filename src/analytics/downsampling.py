@@ -0,0 +1,92 @@
+"""
+Downsampling of gaze and mouse trajectories for replay and plotting.
+"""
+
+from typing import Tuple
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Select the samples of a 2D trajectory using Largest-Triangle-Three-Buckets.
+
+    The classic LTTB algorithm works on a time series; here the triangle area is
+    measured in screen space (x, y) so the selected samples preserve the shape
+    of the path drawn by the gaze or the mouse.
+
+    Args:
+        x: X coordinates ordered by time
+        y: Y coordinates ordered by time
+        threshold: Maximum number of samples to keep
+
+    Returns:
+        Sorted array with the indices of the selected samples
+    """
+    n = len(x)
+    if threshold >= n or n <= 2:
+        return np.arange(n)
+    if threshold <= 2:
+        return np.array([0, n - 1])
+
+    # Buckets exclude the first and last samples, which are always kept
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        px, py = x[previous], y[previous]
+        area = np.abs(
+            (px - avg_x) * (y[start:end] - py) - (px - x[start:end]) * (avg_y - py)
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+
+    return selected
+
+
+def bucket_means(
+    t: np.ndarray, x: np.ndarray, y: np.ndarray, buckets: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Average a trajectory over fixed-width time buckets.
+
+    Empty buckets are dropped, so the result may contain fewer samples than
+    requested when the recording has gaps.
+
+    Args:
+        t: Timestamps in seconds ordered ascending
+        x: X coordinates
+        y: Y coordinates
+        buckets: Number of time buckets spanning the recording
+
+    Returns:
+        Tuple (t, x, y) with the mean of every non-empty bucket
+    """
+    if len(t) == 0 or buckets <= 0:
+        return t[:0], x[:0], y[:0]
+
+    span = t[-1] - t[0]
+    if span <= 0:
+        return t[:1], x[:1], y[:1]
+
+    index = np.minimum(((t - t[0]) / span * buckets).astype(np.int64), buckets - 1)
+    counts = np.bincount(index, minlength=buckets)
+    filled = counts > 0
+    counts = counts[filled]
+
+    return (
+        np.bincount(index, weights=t, minlength=buckets)[filled] / counts,
+        np.bincount(index, weights=x, minlength=buckets)[filled] / counts,
+        np.bincount(index, weights=y, minlength=buckets)[filled] / counts,
+    )
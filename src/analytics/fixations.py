@@ -0,0 +1,127 @@
+"""
+Fixation detection on gaze samples with the dispersion-threshold (I-DT)
+algorithm.
+"""
+
+from typing import Dict
+import numpy as np
+
+# Samples scanned at a time when growing a fixation
+_GROW_CHUNK = 256
+
+
+def idt_fixations(
+    seconds: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    max_dispersion: float,
+    min_duration: float,
+) -> Dict[str, np.ndarray]:
+    """
+    Detect fixations with the I-DT algorithm (Salvucci and Goldberg, 2000).
+
+    A window covering ``min_duration`` is a fixation if its dispersion,
+    (max(x) - min(x)) + (max(y) - min(y)), is at most ``max_dispersion``;
+    it then grows while the dispersion stays under the threshold, and the
+    search continues after it. The dispersion of the shortest window at
+    every sample is computed at once with range extrema, so the Python loop
+    runs once per fixation rather than once per sample. Missing samples
+    (NaN) are dropped first.
+
+    Args:
+        seconds: Sample times in seconds, in ascending order
+        x: X coordinates
+        y: Y coordinates
+        max_dispersion: Largest dispersion of a fixation, in the units of x
+            and y
+        min_duration: Shortest fixation in seconds
+
+    Returns:
+        Dictionary of arrays with the start time, duration and centroid
+        (x, y) of each fixation
+    """
+    valid = ~(np.isnan(x) | np.isnan(y))
+    seconds, x, y = seconds[valid], x[valid], y[valid]
+    n = len(seconds)
+
+    # Shortest window [i, end) starting at each sample that spans min_duration
+    window_end = np.searchsorted(seconds, seconds + min_duration, side="left") + 1
+    complete = np.flatnonzero(window_end <= n)
+    ends = window_end[complete]
+    dispersion = _range_extent(x, complete, ends) + _range_extent(y, complete, ends)
+    candidates = complete[dispersion <= max_dispersion]
+
+    starts, stops = [], []
+    c = 0
+    while c < len(candidates):
+        i = int(candidates[c])
+        j = int(window_end[i])
+        x_min, x_max = x[i:j].min(), x[i:j].max()
+        y_min, y_max = y[i:j].min(), y[i:j].max()
+
+        # Grow the window over chunks of samples with running extrema
+        while j < n:
+            stop = min(j + _GROW_CHUNK, n)
+            grown = (
+                np.maximum.accumulate(np.maximum(x[j:stop], x_max))
+                - np.minimum.accumulate(np.minimum(x[j:stop], x_min))
+                + np.maximum.accumulate(np.maximum(y[j:stop], y_max))
+                - np.minimum.accumulate(np.minimum(y[j:stop], y_min))
+            )
+            exceeded = np.flatnonzero(grown > max_dispersion)
+            if len(exceeded):
+                j += int(exceeded[0])
+                break
+            x_min, x_max = min(x_min, x[j:stop].min()), max(x_max, x[j:stop].max())
+            y_min, y_max = min(y_min, y[j:stop].min()), max(y_max, y[j:stop].max())
+            j = stop
+
+        starts.append(i)
+        stops.append(j)
+        c = int(np.searchsorted(candidates, j))
+
+    starts = np.array(starts, dtype=np.int64)
+    stops = np.array(stops, dtype=np.int64)
+    lengths = stops - starts
+
+    # Centroids from cumulative sums, one difference per fixation
+    x_sums = np.concatenate([[0.0], np.cumsum(x)])
+    y_sums = np.concatenate([[0.0], np.cumsum(y)])
+
+    return {
+        "start": seconds[starts],
+        "duration": seconds[stops - 1] - seconds[starts],
+        "x": (x_sums[stops] - x_sums[starts]) / lengths,
+        "y": (y_sums[stops] - y_sums[starts]) / lengths,
+    }
+
+
+def _range_extent(values: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+    """
+    Get max - min of values[start:end] for many ranges at once.
+
+    Uses a sparse table of maxima and minima over power-of-two spans, built
+    only up to the longest range, so each range is answered by combining
+    two overlapping spans.
+    """
+    if len(starts) == 0:
+        return np.empty(0)
+
+    lengths = ends - starts
+    levels = int(lengths.max()).bit_length()
+    maxima, minima = [values], [values]
+    for level in range(1, levels):
+        span = 1 << (level - 1)
+        maxima.append(np.maximum(maxima[-1][:-span], maxima[-1][span:]))
+        minima.append(np.minimum(minima[-1][:-span], minima[-1][span:]))
+
+    extent = np.empty(len(starts))
+    level_of = np.log2(lengths).astype(np.int64)
+    for level in np.unique(level_of):
+        selected = level_of == level
+        s = starts[selected]
+        e = ends[selected] - (1 << int(level))
+        high = np.maximum(maxima[level][s], maxima[level][e])
+        low = np.minimum(minima[level][s], minima[level][e])
+        extent[selected] = high - low
+    return extent
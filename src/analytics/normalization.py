@@ -0,0 +1,56 @@
+"""
+Normalization of screen coordinates into the canonical space shared by all
+sessions.
+"""
+
+from typing import Dict, Iterable, Tuple
+import numpy as np
+
+
+def normalize_points(
+    x: np.ndarray,
+    y: np.ndarray,
+    frame: Tuple[float, float, float, float],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Map screen coordinates into the unit square of a frame.
+
+    The frame's top-left corner maps to (0, 0) and its bottom-right corner
+    to (1, 1), so sessions recorded with different viewports and iframe
+    offsets share one coordinate space. Points outside the frame fall
+    outside [0, 1] and missing samples (NaN) stay missing.
+
+    Args:
+        x: X coordinates in CSS pixels
+        y: Y coordinates in CSS pixels
+        frame: (x, y, width, height) of the frame in CSS pixels
+
+    Returns:
+        Tuple (x, y) of normalized coordinates
+    """
+    left, top, width, height = frame
+    return (x - left) / width, (y - top) / height
+
+
+def normalize_samples(
+    samples: Dict[str, np.ndarray],
+    frame: Tuple[float, float, float, float],
+    sources: Iterable[str],
+) -> Dict[str, np.ndarray]:
+    """
+    Normalize the coordinate columns of sample arrays.
+
+    Args:
+        samples: Sample arrays with x_<source> and y_<source> columns
+        frame: (x, y, width, height) of the frame in CSS pixels
+        sources: Point sources to normalize
+
+    Returns:
+        Copy of samples with the coordinates of each source normalized
+    """
+    normalized = dict(samples)
+    for source in sources:
+        normalized[f"x_{source}"], normalized[f"y_{source}"] = normalize_points(
+            samples[f"x_{source}"], samples[f"y_{source}"], frame
+        )
+    return normalized
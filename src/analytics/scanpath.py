@@ -0,0 +1,243 @@
+"""
+Scanpath comparison: fixation sequences encoded as strings of grid cells or
+areas of interest (AOIs), compared with a vectorized edit distance.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+# Upper bound on the cells of the dynamic programming rows of one batch of
+# pairs, which bounds memory whatever the number of subjects
+_MAX_BATCH_CELLS = 4_000_000
+
+
+def grid_string(x: np.ndarray, y: np.ndarray, grid: int) -> np.ndarray:
+    """
+    Encode canonical fixation centroids as the cells of a grid x grid grid.
+
+    Cells are numbered row by row from the top-left corner. Fixations
+    outside the unit square are dropped and consecutive fixations in the
+    same cell are collapsed into one symbol.
+
+    Args:
+        x: Canonical X coordinates of the fixations, in order
+        y: Canonical Y coordinates of the fixations, in order
+        grid: Number of cells per axis
+
+    Returns:
+        Array of cell indices
+    """
+    inside = (x >= 0) & (x <= 1) & (y >= 0) & (y <= 1)
+    column = np.minimum((x[inside] * grid).astype(np.int64), grid - 1)
+    row = np.minimum((y[inside] * grid).astype(np.int64), grid - 1)
+    return _collapse(row * grid + column)
+
+
+def aoi_string(
+    x: np.ndarray,
+    y: np.ndarray,
+    aois: Sequence[Tuple[float, float, float, float]],
+) -> np.ndarray:
+    """
+    Encode canonical fixation centroids as the AOIs that contain them.
+
+    A fixation inside several AOIs belongs to the first one. Fixations
+    outside every AOI are dropped and consecutive fixations in the same AOI
+    are collapsed into one symbol.
+
+    Args:
+        x: Canonical X coordinates of the fixations, in order
+        y: Canonical Y coordinates of the fixations, in order
+        aois: (x, y, width, height) of each AOI in canonical units
+
+    Returns:
+        Array of AOI indices
+    """
+    if len(aois) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    left, top, width, height = (np.asarray(v, dtype=np.float64) for v in zip(*aois))
+    inside = (
+        (x[:, None] >= left)
+        & (x[:, None] <= left + width)
+        & (y[:, None] >= top)
+        & (y[:, None] <= top + height)
+    )
+    hit = inside.any(axis=1)
+    return _collapse(np.argmax(inside[hit], axis=1).astype(np.int64))
+
+
+def grid_substitution(grid: int) -> np.ndarray:
+    """
+    ScanMatch-style substitution costs between the cells of a grid.
+
+    The cost of replacing one cell by another grows linearly with the
+    distance between their centers, from 0 for the same cell to 1 for
+    opposite corners, so near misses count less than distant ones.
+
+    Args:
+        grid: Number of cells per axis
+
+    Returns:
+        Matrix of shape (grid * grid, grid * grid)
+    """
+    row, column = np.divmod(np.arange(grid * grid), grid)
+    distance = np.hypot(row[:, None] - row[None, :], column[:, None] - column[None, :])
+    return distance / max(distance.max(), 1.0)
+
+
+def region_substitution(centers: np.ndarray) -> np.ndarray:
+    """
+    ScanMatch-style substitution costs between regions with given centers.
+
+    Args:
+        centers: Array of shape (regions, 2) with the center of each region
+
+    Returns:
+        Matrix of costs from 0 to 1, proportional to center distance
+    """
+    delta = centers[:, None, :] - centers[None, :, :]
+    distance = np.hypot(delta[..., 0], delta[..., 1])
+    return distance / max(distance.max(), 1e-12)
+
+
+def edit_distances(
+    first: List[np.ndarray],
+    second: List[np.ndarray],
+    substitution: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Edit distance between many pairs of sequences at once.
+
+    Wagner-Fischer over every pair of a batch in parallel. The insertion
+    term of each row is a running minimum, so a whole row is computed with
+    ``numpy.minimum.accumulate`` and the Python loop runs once per symbol of
+    the longest first sequence of the batch rather than once per cell.
+    Pairs are batched by length so little work is spent on padding.
+
+    Args:
+        first: First sequence of each pair
+        second: Second sequence of each pair
+        substitution: Cost of replacing symbol a by symbol b (default 1 for
+            any different symbol); insertions and deletions cost 1
+
+    Returns:
+        Array with the distance of each pair
+    """
+    distances = np.empty(len(first))
+    if len(first) == 0:
+        return distances
+
+    first_lengths = np.array([len(s) for s in first])
+    second_lengths = np.array([len(s) for s in second])
+    order = np.lexsort((second_lengths, first_lengths))
+
+    start = 0
+    while start < len(order):
+        # Grow the batch while its rows fit in the cell budget
+        columns = second_lengths[order[start:]] + 1
+        widest = np.maximum.accumulate(columns)
+        size = max(
+            1,
+            int(
+                np.searchsorted(
+                    widest * np.arange(1, len(widest) + 1),
+                    _MAX_BATCH_CELLS,
+                    side="right",
+                )
+            ),
+        )
+        batch = order[start : start + size]
+        distances[batch] = _edit_distance_batch(
+            [first[p] for p in batch], [second[p] for p in batch], substitution
+        )
+        start += size
+    return distances
+
+
+def pairwise_similarity(
+    sequences: List[np.ndarray],
+    substitution: Optional[np.ndarray] = None,
+    pairs: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> np.ndarray:
+    """
+    Similarity of sequences, 1 - distance / length of the longer sequence.
+
+    Args:
+        sequences: Encoded scanpaths
+        substitution: Substitution costs (see edit_distances)
+        pairs: (rows, columns) indices of the pairs to compare; by default
+            every pair above the diagonal of the N x N matrix
+
+    Returns:
+        Similarity of each pair, from 0 to 1 (1 when both are empty)
+    """
+    if pairs is None:
+        pairs = np.triu_indices(len(sequences), k=1)
+    rows, columns = pairs
+
+    distances = edit_distances(
+        [sequences[i] for i in rows], [sequences[j] for j in columns], substitution
+    )
+    lengths = np.array([len(s) for s in sequences], dtype=np.float64)
+    longer = np.maximum(lengths[rows], lengths[columns])
+    return np.where(longer > 0, 1.0 - distances / np.maximum(longer, 1.0), 1.0)
+
+
+def _edit_distance_batch(first, second, substitution):
+    """Wagner-Fischer rows for a batch of pairs (see edit_distances)."""
+    count = len(first)
+    first_lengths = np.array([len(s) for s in first], dtype=np.int64)
+    second_lengths = np.array([len(s) for s in second], dtype=np.int64)
+    rows = int(first_lengths.max(initial=0))
+    columns = int(second_lengths.max(initial=0))
+
+    # Padding symbols never match; padded cells lie after the end of each
+    # sequence, where they cannot affect the distances that are read
+    pad = -1 if substitution is None else len(substitution)
+    a = np.full((count, rows), pad, dtype=np.int64)
+    b = np.full((count, columns), pad - 1 if substitution is None else pad)
+    for p in range(count):
+        a[p, : first_lengths[p]] = first[p]
+        b[p, : second_lengths[p]] = second[p]
+
+    if substitution is None:
+        dtype = np.int32
+    else:
+        # An extra row and column of unit costs for the padding symbol, minus
+        # the 1 folded into the rows below
+        dtype = np.float32
+        savings = np.zeros((pad + 1, pad + 1), dtype=dtype)
+        savings[:pad, :pad] = substitution - 1
+
+    # Rows are stored as D[i, j] - j, which turns the insertion term into a
+    # plain running minimum
+    previous = np.zeros((count, columns + 1), dtype=dtype)
+    current = np.empty_like(previous)
+    result = second_lengths.astype(np.float64)
+
+    for i in range(1, rows + 1):
+        symbol = a[:, i - 1 : i]
+        if substitution is None:
+            change = -(b == symbol).astype(dtype)
+        else:
+            change = savings[symbol, b]
+
+        # Deletion or substitution, then insertions as a running minimum
+        current[:, 0] = i
+        np.minimum(previous[:, 1:] + 1, previous[:, :-1] + change, out=current[:, 1:])
+        np.minimum.accumulate(current, axis=1, out=current)
+
+        done = np.flatnonzero(first_lengths == i)
+        result[done] = current[done, second_lengths[done]] + second_lengths[done]
+        previous, current = current, previous
+
+    return result
+
+
+def _collapse(symbols: np.ndarray) -> np.ndarray:
+    """Drop symbols equal to the one before them."""
+    if len(symbols) == 0:
+        return symbols
+    keep = np.concatenate([[True], symbols[1:] != symbols[:-1]])
+    return symbols[keep]
@@ -0,0 +1,73 @@
+"""
+Per-subject summaries combined into study-wide results.
+
+The summary of a subject depends only on its sample arrays, so it can run
+in a worker process; the results are small and are reduced in the parent.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+import numpy as np
+
+from .density import binned_density
+from .fixations import idt_fixations
+from .normalization import normalize_points, normalize_samples
+
+
+def summarize_subject(
+    subject_id: int,
+    samples: Dict[str, np.ndarray],
+    frame: Optional[Tuple[float, float, float, float]],
+    sources: Iterable[str],
+    bins: Optional[int],
+    max_dispersion: float,
+    min_duration: float,
+) -> Dict[str, Any]:
+    """
+    Compute the canonical heatmap and the gaze fixations of a subject.
+
+    Fixations are detected in screen pixels, where the dispersion threshold
+    has a physical meaning; the heatmap is binned in the canonical space so
+    the grids of every subject can be added together.
+
+    Args:
+        subject_id: The ID of the subject
+        samples: Sample arrays of the subject, including the gaze columns
+        frame: (x, y, width, height) of the subject's canonical frame, or
+            None if the session has no viewport metadata
+        sources: Point sources included in the heatmap
+        bins: Number of bins per axis of the heatmap, or None to skip it
+        max_dispersion: Largest dispersion of a fixation, in pixels
+        min_duration: Shortest fixation in seconds
+
+    Returns:
+        Dictionary with subject_id, samples, heatmap (counts, or None
+        without a frame), fixation_durations in seconds and the canonical
+        fixation centroids fixation_x and fixation_y (None without a frame)
+    """
+    dates = samples["date"]
+    seconds = (dates - dates[0]) / np.timedelta64(1, "s") if len(dates) else dates
+    fixations = idt_fixations(
+        seconds.astype(np.float64),
+        samples["x_gaze"],
+        samples["y_gaze"],
+        max_dispersion,
+        min_duration,
+    )
+
+    heatmap = fixation_x = fixation_y = None
+    if frame is not None:
+        fixation_x, fixation_y = normalize_points(fixations["x"], fixations["y"], frame)
+    if frame is not None and bins is not None:
+        normalized = normalize_samples(samples, frame, sources)
+        x = np.concatenate([normalized[f"x_{source}"] for source in sources])
+        y = np.concatenate([normalized[f"y_{source}"] for source in sources])
+        heatmap, _, _ = binned_density(x, y, bins, ((0.0, 1.0), (0.0, 1.0)), clip=False)
+
+    return {
+        "subject_id": subject_id,
+        "samples": len(dates),
+        "heatmap": heatmap,
+        "fixation_durations": fixations["duration"],
+        "fixation_x": fixation_x,
+        "fixation_y": fixation_y,
+    }
@@ -30,3 +30,65 @@ API_RESPONSES = {
     "SUCCESS": "success",
     "TASKLOGS_SAVED": "TaskLogs saved successfully.",
 }
+
+# Format of the timestamps sent by the client
+CLIENT_DATE_FORMAT = "%m/%d/%Y, %I:%M:%S %p"
+
+# Time zone in which dates are stored; epoch timestamps are converted to it
+CLIENT_TIMEZONE = "America/Argentina/Buenos_Aires"
+
+# Columns of a columnar sample batch: epoch milliseconds and coordinates
+BATCH_COLUMNS = ("t", "x_mouse", "y_mouse", "x_gaze", "y_gaze")
+
+# Replay downsampling limits
+REPLAY_DEFAULT_FRAMES = 500
+REPLAY_MAX_FRAMES = 5000
+
+# Heatmap grid resolution (bins per axis)
+HEATMAP_DEFAULT_BINS = 128
+HEATMAP_MAX_BINS = 512
+
+# Coordinate spaces of analytics results: screen pixels as recorded, or the
+# unit square of each session's prototype frame (comparable across subjects)
+COORDINATE_SPACES = ("screen", "canonical")
+
+# Calibration validation: largest number of (target, prediction) samples
+# accepted per session
+CALIBRATION_MAX_SAMPLES = 1000
+
+# I-DT fixation detection. Webcam gaze estimates are noisy, so the
+# dispersion threshold is wider than with dedicated eye trackers.
+FIXATION_MAX_DISPERSION_PX = 100.0
+FIXATION_MIN_DURATION_S = 0.1
+
+# Study analysis: subjects whose samples are queued per worker process, so
+# reading the next subjects overlaps with the analysis without holding the
+# whole study in memory
+ANALYSIS_QUEUED_PER_WORKER = 2
+
+# Scanpath comparison: fixations are encoded as the cells of a grid x grid
+# grid over the canonical space (or as AOIs), then compared by plain edit
+# distance or with ScanMatch-style distance-weighted substitutions. Pairs
+# are compared in tasks of SCANPATH_PAIRS_PER_TASK, spread over the
+# analysis worker processes.
+SCANPATH_DEFAULT_GRID = 5
+SCANPATH_MAX_GRID = 32
+SCANPATH_METHODS = ("levenshtein", "scanmatch")
+SCANPATH_PAIRS_PER_TASK = 4096
+
+# Hours that finished background jobs and their results are kept
+JOB_RETENTION_HOURS = 24 * 7
+
+# Point retrieval pagination
+POINTS_MAX_PAGE_SIZE = 10000
+
+# Seconds between modification checks of config.json and tasks.json
+CONFIG_CHECK_INTERVAL = 1.0
+
+# Client upload pacing: clients get the minimum batch size and flush interval
+# while commits stay under the target latency and concurrency, and larger
+# values as the server falls behind
+INGEST_TARGET_LATENCY_MS = 50.0
+INGEST_TARGET_IN_FLIGHT = 4
+INGEST_BATCH_SIZE_RANGE = (20, 500)
+INGEST_FLUSH_INTERVAL_RANGE_MS = (1000, 15000)
@@ -0,0 +1,135 @@
+"""
+Swagger UI and API spec served without importing flasgger at startup.
+"""
+
+import importlib.util
+import os
+import threading
+from flask import Blueprint
+
+
+class LazySwagger:
+    """
+    Register the flasgger routes at startup and load flasgger on first use.
+
+    Flask does not allow adding routes after the first request, so the
+    ``/apidocs/``, spec and static routes are registered up front with the
+    same endpoint names flasgger uses. flasgger itself, and the spec built
+    from the route docstrings, are only loaded when one of these routes is
+    requested.
+    """
+
+    def __init__(self, app=None, config=None, template=None):
+        """
+        Initialize the lazy Swagger extension.
+
+        Args:
+            app: Flask application to register the routes on
+            config: flasgger configuration (``specs``, ``specs_route``, ...)
+            template: Base Swagger template merged into the spec
+        """
+        self.config = config or {}
+        self.template = template
+        self.app = None
+        self._swagger = None
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Register the documentation routes on the app.
+
+        Args:
+            app: Flask application
+        """
+        self.app = app
+        package_dir = _flasgger_dir()
+        uiversion = self.config.get("uiversion", 3)
+
+        blueprint = Blueprint(
+            self.config.get("endpoint", "flasgger"),
+            __name__,
+            template_folder=os.path.join(package_dir, f"ui{uiversion}", "templates"),
+            static_folder=os.path.join(package_dir, f"ui{uiversion}", "static"),
+            static_url_path=self.config.get("static_url_path", "/flasgger_static"),
+        )
+
+        if self.config.get("swagger_ui", True):
+            blueprint.add_url_rule(
+                self.config.get("specs_route", "/apidocs/"),
+                "apidocs",
+                view_func=self._apidocs,
+            )
+            blueprint.add_url_rule(
+                self.config.get("oauth_redirect", "/oauth2-redirect.html"),
+                "oauth_redirect",
+                view_func=self._oauth_redirect,
+            )
+
+        for spec in self.config.get("specs", []):
+            blueprint.add_url_rule(
+                spec["route"],
+                spec["endpoint"],
+                view_func=self._apispec,
+                defaults={"spec_endpoint": spec["endpoint"]},
+            )
+
+        app.register_blueprint(blueprint)
+        app.extensions["lazy_swagger"] = self
+
+    @property
+    def loaded(self):
+        """Whether flasgger has been imported and configured."""
+        return self._swagger is not None
+
+    def get_swagger(self):
+        """
+        Get the flasgger ``Swagger`` object, creating it on first use.
+
+        Returns:
+            A ``flasgger.Swagger`` bound to the app without registering routes
+        """
+        if self._swagger is None:
+            with self._lock:
+                if self._swagger is None:
+                    from flasgger import Swagger
+
+                    swagger = Swagger(config=self.config, template=self.template)
+                    swagger.app = self.app
+                    swagger.load_config(self.app)
+                    self.app.swag = swagger
+                    self._swagger = swagger
+        return self._swagger
+
+    def _apidocs(self):
+        from flasgger.base import APIDocsView
+
+        view = APIDocsView.as_view(
+            "apidocs", view_args={"config": self.get_swagger().config}
+        )
+        return view()
+
+    def _oauth_redirect(self):
+        from flasgger.base import OAuthRedirect
+
+        return OAuthRedirect.as_view("oauth_redirect")()
+
+    def _apispec(self, spec_endpoint):
+        from flasgger.base import APISpecsView
+
+        swagger = self.get_swagger()
+        view = APISpecsView.as_view(
+            spec_endpoint,
+            loader=lambda: swagger.get_apispecs(endpoint=spec_endpoint),
+        )
+        return view()
+
+
+def _flasgger_dir():
+    """Locate the flasgger package without importing it."""
+    spec = importlib.util.find_spec("flasgger")
+    if spec is None or not spec.submodule_search_locations:
+        raise RuntimeError("flasgger is not installed")
+    return list(spec.submodule_search_locations)[0]
@@ -0,0 +1,89 @@
+"""
+HTTP validators (ETag / Last-Modified) for responses derived from subject data.
+"""
+
+import hashlib
+from functools import wraps
+from flask import request, make_response
+from .services import SubjectService
+
+
+def subject_validators(view):
+    """
+    Add conditional request support to a view that takes the subject ``id``.
+
+    The ETag combines the subject's data version with a hash of the request
+    path and query, so different views of the same data get different tags.
+    When the client already has the current version, a 304 is returned
+    without calling the view, so the sample table is never read.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        subject_id = request.args.get("id", type=int)
+        version = SubjectService().get_data_version(subject_id)
+
+        if version is None:
+            return view(*args, **kwargs)
+
+        data_version, updated_at = version
+        variant = hashlib.sha1(request.full_path.encode("utf-8")).hexdigest()[:12]
+        etag = f"{subject_id}-{data_version}-{variant}"
+        last_modified = updated_at.astimezone() if updated_at else None
+
+        if _is_not_modified(etag, last_modified):
+            response = make_response("", 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+
+    return wrapper
+
+
+def _is_not_modified(etag, last_modified):
+    """Evaluate If-None-Match, falling back to If-Modified-Since."""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+
+    if request.if_modified_since and last_modified is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+
+    return False
+
+
+def document_response(document):
+    """
+    Build a response for a pre-serialized JSON document.
+
+    The body is sent as stored, with validators derived from the document,
+    and clients are asked to revalidate so that edits to the file show up
+    on the next request while unchanged files cost a 304.
+
+    Args:
+        document: A ``state.config_manager.JsonDocument``
+
+    Returns:
+        A 200 or 304 response
+    """
+    etag = document.etag
+    last_modified = document.modified_at
+
+    if _is_not_modified(etag, last_modified):
+        response = make_response("", 304)
+    else:
+        response = make_response(document.body)
+        response.mimetype = "application/json"
+
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response
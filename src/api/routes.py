@@ -2,26 +2,82 @@
 API routes for the user gaze tracking application.
 """
 
-from flask import Blueprint, request, jsonify, send_file, send_from_directory
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    request,
+    jsonify,
+    send_file,
+    url_for,
+    abort,
+    stream_with_context,
+)
 from .services import (
     SubjectService,
     MeasurementService,
     TaskLogService,
     ExportService,
+    StudyAnalysisService,
+    JobService,
     UserService,
+    config_manager,
+    parse_min_quality,
+)
+from .http_cache import subject_validators, document_response
+from .config import (
+    COORDINATE_SPACES,
+    HEATMAP_DEFAULT_BINS,
+    HEATMAP_MAX_BINS,
+    REPLAY_DEFAULT_FRAMES,
+    SCANPATH_DEFAULT_GRID,
+    SCANPATH_METHODS,
+    REPLAY_MAX_FRAMES,
+    POINTS_MAX_PAGE_SIZE,
 )
-import os
+from datetime import datetime
 
 api_bp = Blueprint("api", __name__, url_prefix="/api")
 
+# Content types of the point streaming formats
+STREAM_MIMETYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
 # Initialize service instances
 subject_service = SubjectService()
 measurement_service = MeasurementService()
 tasklog_service = TaskLogService()
 export_service = ExportService()
+study_analysis_service = StudyAnalysisService()
+job_service = JobService()
 user_service = UserService()
 
 
+def _parse_time_arg(name):
+    """Parse an optional ISO 8601 query argument into a datetime."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    # Samples are stored as naive local times, so any offset is dropped
+    return datetime.fromisoformat(value).replace(tzinfo=None)
+
+
+def _parse_sources_arg():
+    """Parse the optional ``fields`` query argument into point sources."""
+    value = request.args.get("fields")
+    if not value:
+        return None
+    sources = tuple(dict.fromkeys(f.strip() for f in value.split(",") if f.strip()))
+    if not sources or any(source not in ("mouse", "gaze") for source in sources):
+        raise ValueError(f"Invalid fields: {value}")
+    return sources
+
+
+def _parse_min_quality_arg():
+    """Parse the optional ``min_quality`` query argument."""
+    value = request.args.get("min_quality")
+    return parse_min_quality(value) if value else None
+
+
 @api_bp.route("/get-subjects", methods=["GET"])
 def api_subjects():
     """
@@ -29,13 +85,15 @@ def api_subjects():
     ---
     responses:
         200:
-            description: JSON with subjects information.
+            description: JSON with subjects information, including the
+                calibration score of each session (null if not measured).
     """
     subjects_info = subject_service.get_all_subjects()
     return jsonify(subjects_info)
 
 
 @api_bp.route("/get-user-points")
+@subject_validators
 def get_user_points():
     """
     Returns gaze and mouse points for a specific subject.
@@ -46,21 +104,450 @@ def get_user_points():
           type: integer
           required: true
           description: Subject ID to get the points.
+        - name: limit
+          in: query
+          type: integer
+          required: false
+          description: Page size. When present the response includes next_cursor.
+        - name: cursor
+          in: query
+          type: string
+          required: false
+          description: Cursor returned by the previous page.
+        - name: from
+          in: query
+          type: string
+          format: date-time
+          required: false
+          description: Only include points at or after this time (ISO 8601).
+        - name: to
+          in: query
+          type: string
+          format: date-time
+          required: false
+          description: Only include points at or before this time (ISO 8601).
+        - name: fields
+          in: query
+          type: string
+          required: false
+          description: Comma separated point sources to include (gaze, mouse).
+        - name: layout
+          in: query
+          type: string
+          enum: [rows, columnar]
+          required: false
+          description: One object per point (rows) or parallel arrays (columnar).
+        - name: encoding
+          in: query
+          type: string
+          enum: [json, base64]
+          required: false
+          description: Columnar arrays as JSON numbers or base64 float64 buffers.
     responses:
         200:
             description: JSON with subject points.
+        400:
+            description: Invalid parameters.
         404:
             description: Subject not found.
     """
     subject_id = request.args.get("id", type=int)
+    limit = request.args.get("limit", type=int)
+    cursor = request.args.get("cursor")
+    layout = request.args.get("layout", "rows")
+    encoding = request.args.get("encoding", "json")
+
+    if layout not in ("rows", "columnar") or encoding not in ("json", "base64"):
+        return jsonify({"status": "error", "message": "Invalid layout"}), 400
+
+    if limit is not None:
+        limit = min(max(limit, 1), POINTS_MAX_PAGE_SIZE)
+
+    try:
+        start = _parse_time_arg("from")
+        end = _parse_time_arg("to")
+        sources = _parse_sources_arg()
+        result = measurement_service.get_user_points(
+            subject_id, limit, cursor, start, end, sources, layout, encoding
+        )
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
 
-    result = measurement_service.get_user_points(subject_id)
     if result:
         return jsonify(result)
     return "Subject not found", 404
 
 
+@api_bp.route("/stream-user-points")
+@subject_validators
+def stream_user_points():
+    """
+    Streams all measurement points of a subject without loading them at once.
+    ---
+    parameters:
+        - name: id
+          in: query
+          type: integer
+          required: true
+          description: Subject ID to get the points.
+        - name: format
+          in: query
+          type: string
+          enum: [ndjson, json]
+          required: false
+          description: One JSON point per line, or a single JSON array.
+        - name: from
+          in: query
+          type: string
+          format: date-time
+          required: false
+          description: Only include samples at or after this time (ISO 8601).
+        - name: to
+          in: query
+          type: string
+          format: date-time
+          required: false
+          description: Only include samples at or before this time (ISO 8601).
+        - name: fields
+          in: query
+          type: string
+          required: false
+          description: Comma separated point sources to include (gaze, mouse).
+    responses:
+        200:
+            description: Points ordered by time, streamed as they are read.
+        400:
+            description: Invalid parameters.
+        404:
+            description: Subject not found.
+    """
+    subject_id = request.args.get("id", type=int)
+    fmt = request.args.get("format", "ndjson")
+
+    if fmt not in STREAM_MIMETYPES:
+        return jsonify({"status": "error", "message": "Invalid format"}), 400
+
+    try:
+        start = _parse_time_arg("from")
+        end = _parse_time_arg("to")
+        sources = _parse_sources_arg()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    chunks = measurement_service.stream_user_points(
+        subject_id, start, end, sources, fmt
+    )
+    if chunks is None:
+        return "Subject not found", 404
+    return Response(stream_with_context(chunks), mimetype=STREAM_MIMETYPES[fmt])
+
+
+@api_bp.route("/get-user-replay")
+@subject_validators
+def get_user_replay():
+    """
+    Returns downsampled gaze and mouse trajectories to replay a session.
+    ---
+    parameters:
+        - name: id
+          in: query
+          type: integer
+          required: true
+          description: Subject ID to get the trajectories.
+        - name: frames
+          in: query
+          type: integer
+          required: false
+          description: Maximum number of samples per trajectory.
+        - name: from
+          in: query
+          type: string
+          format: date-time
+          required: false
+          description: Only include samples at or after this time (ISO 8601).
+        - name: to
+          in: query
+          type: string
+          format: date-time
+          required: false
+          description: Only include samples at or before this time (ISO 8601).
+        - name: method
+          in: query
+          type: string
+          enum: [lttb, mean]
+          required: false
+          description: Downsampling method.
+    responses:
+        200:
+            description: JSON with the downsampled trajectories.
+        400:
+            description: Invalid parameters.
+        404:
+            description: Subject not found.
+    """
+    subject_id = request.args.get("id", type=int)
+    frames = request.args.get("frames", REPLAY_DEFAULT_FRAMES, type=int)
+    method = request.args.get("method", "lttb")
+
+    if method not in ("lttb", "mean"):
+        return jsonify({"status": "error", "message": "Invalid method"}), 400
+
+    try:
+        start = _parse_time_arg("from")
+        end = _parse_time_arg("to")
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    frames = min(max(frames, 2), REPLAY_MAX_FRAMES)
+
+    result = measurement_service.get_user_replay(subject_id, frames, start, end, method)
+    if result:
+        return jsonify(result)
+    return "Subject not found", 404
+
+
+@api_bp.route("/get-user-heatmap")
+@subject_validators
+def get_user_heatmap():
+    """
+    Returns the binned density of a subject's points for drawing a heatmap.
+    ---
+    parameters:
+        - name: id
+          in: query
+          type: integer
+          required: true
+          description: Subject ID to get the heatmap.
+        - name: bins
+          in: query
+          type: integer
+          required: false
+          description: Number of bins per axis.
+        - name: fields
+          in: query
+          type: string
+          required: false
+          description: Comma separated point sources to include (gaze, mouse).
+        - name: space
+          in: query
+          type: string
+          enum: [screen, canonical]
+          required: false
+          description: Screen pixels, or the unit square of the prototype
+              frame recorded at calibration.
+    responses:
+        200:
+            description: JSON with the grid extent and the center and count
+                of every non-empty cell.
+        400:
+            description: Invalid parameters, or canonical space requested
+                for a session without viewport metadata.
+        404:
+            description: Subject not found.
+    """
+    subject_id = request.args.get("id", type=int)
+    bins = request.args.get("bins", HEATMAP_DEFAULT_BINS, type=int)
+    bins = min(max(bins, 1), HEATMAP_MAX_BINS)
+    space = request.args.get("space", "screen")
+
+    if space not in COORDINATE_SPACES:
+        return jsonify({"status": "error", "message": "Invalid space"}), 400
+
+    try:
+        sources = _parse_sources_arg()
+        result = measurement_service.get_user_heatmap(subject_id, bins, sources, space)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    if result:
+        return current_app.response_class(result, mimetype="application/json")
+    return "Subject not found", 404
+
+
+@api_bp.route("/get-study-analysis")
+def get_study_analysis():
+    """
+    Returns study-wide results computed over all of a study's subjects.
+
+    Cached results are returned right away; otherwise the results are
+    computed in a background job (see /api/jobs).
+    ---
+    parameters:
+        - name: study
+          in: query
+          type: integer
+          required: true
+          description: Study ID.
+        - name: bins
+          in: query
+          type: integer
+          required: false
+          description: Number of bins per axis of the aggregate heatmap.
+        - name: fields
+          in: query
+          type: string
+          required: false
+          description: Comma separated point sources in the heatmap (gaze, mouse).
+        - name: min_quality
+          in: query
+          type: number
+          required: false
+          description: Only include subjects with at least this calibration
+              score (0 to 1).
+    responses:
+        200:
+            description: JSON with the canonical heatmap of all subjects,
+                fixation statistics per subject and for the study, and the
+                completion times of each task.
+        202:
+            description: Results not cached yet and queued as a
+                study-analysis job; poll the URL in the Location header.
+        400:
+            description: Invalid parameters.
+        404:
+            description: Study not found.
+    """
+    study_id = request.args.get("study", type=int)
+    bins = request.args.get("bins", HEATMAP_DEFAULT_BINS, type=int)
+    bins = min(max(bins, 1), HEATMAP_MAX_BINS)
+
+    try:
+        sources = _parse_sources_arg()
+        min_quality = _parse_min_quality_arg()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    result = study_analysis_service.analyze_study(
+        study_id, bins, sources, min_quality=min_quality, cached_only=True
+    )
+    return _result_or_job(
+        study_id,
+        result,
+        "study-analysis",
+        {
+            "study": study_id,
+            "bins": bins,
+            "fields": list(sources) if sources else None,
+            "min_quality": min_quality,
+        },
+    )
+
+
+@api_bp.route("/get-scanpath-similarity", methods=["GET", "POST"])
+def get_scanpath_similarity():
+    """
+    Returns the pairwise scanpath similarity of all subjects of a study.
+
+    Cached results are returned right away; otherwise the similarities are
+    computed in a background job (see /api/jobs).
+    ---
+    parameters:
+        - name: study
+          in: query
+          type: integer
+          required: true
+          description: Study ID (or "study" in the JSON body of a POST).
+        - name: grid
+          in: query
+          type: integer
+          required: false
+          description: Cells per axis of the grid fixations are encoded on.
+        - name: method
+          in: query
+          type: string
+          required: false
+          enum: [levenshtein, scanmatch]
+          description: Plain edit distance, or substitutions weighted by the
+              distance between cells (ScanMatch-style).
+        - name: min_quality
+          in: query
+          type: number
+          required: false
+          description: Only include subjects with at least this calibration
+              score (0 to 1).
+        - name: body
+          in: body
+          required: false
+          schema:
+            type: object
+            properties:
+                aois:
+                    type: array
+                    description: Areas of interest as {x, y, width, height}
+                        in canonical units, used instead of the grid.
+    responses:
+        200:
+            description: JSON with the subjects compared, the length of each
+                encoded scanpath and the N x N similarity matrix.
+        202:
+            description: Results not cached yet and queued as a
+                scanpath-similarity job; poll the URL in the Location header.
+        400:
+            description: Invalid parameters.
+        404:
+            description: Study not found.
+    """
+    params = request.args.to_dict()
+    if request.method == "POST":
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"status": "error", "message": "Invalid body"}), 400
+        params.update(data)
+
+    try:
+        study_id = int(params["study"])
+        grid = int(params.get("grid", SCANPATH_DEFAULT_GRID))
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"status": "error", "message": "Invalid study or grid"}), 400
+
+    try:
+        min_quality = params.get("min_quality")
+        min_quality = None if min_quality is None else parse_min_quality(min_quality)
+        method = params.get("method", SCANPATH_METHODS[0])
+        result = study_analysis_service.compare_scanpaths(
+            study_id,
+            grid,
+            params.get("aois"),
+            method,
+            min_quality=min_quality,
+            cached_only=True,
+        )
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    return _result_or_job(
+        study_id,
+        result,
+        "scanpath-similarity",
+        {
+            "study": study_id,
+            "grid": grid,
+            "method": method,
+            "aois": params.get("aois"),
+            "min_quality": min_quality,
+        },
+    )
+
+
+def _result_or_job(study_id, result, kind, params):
+    """
+    Serve a cached study result, or queue a job that computes it.
+
+    Study-wide results run a process pool for a while, so they are never
+    computed inside the request.
+    """
+    if result is not None:
+        return current_app.response_class(result, mimetype="application/json")
+    if not study_analysis_service.has_study(study_id):
+        return "Study not found", 404
+
+    job = job_service.submit_job(kind, params)
+    finished = job["status"] in ("succeeded", "failed")
+    return _job_response(job, 200 if finished else 202)
+
+
 @api_bp.route("/get-user-tasklogs")
+@subject_validators
 def get_user_tasklogs():
     """
     Returns task logs for a specific subject.
@@ -107,6 +594,10 @@ def save_points():
                             date:
                                 type: string
                                 format: date-time
+                            t:
+                                type: number
+                                description: Epoch milliseconds, instead of
+                                    date
                             gaze:
                                 type: object
                                 properties:
@@ -121,15 +612,167 @@ def save_points():
                                         type: number
                                     y:
                                         type: number
+                layout:
+                    type: string
+                    enum: [rows, columnar]
+                    description: With columnar, send columns instead of
+                        points
+                encoding:
+                    type: string
+                    enum: [json, base64]
+                columns:
+                    type: object
+                    description: Parallel arrays t (epoch milliseconds),
+                        x_mouse, y_mouse, x_gaze and y_gaze; base64 columns
+                        are little-endian float64
+                batch_id:
+                    type: string
+                    description: Client identifier of the batch; resending
+                        a saved batch does not store it twice
     responses:
         200:
-            description: status success
+            description: Batch saved. batch_size and flush_interval_ms are
+                the batching the client should use from now on.
+            schema:
+                type: object
+                properties:
+                    status:
+                        type: string
+                    duplicate:
+                        type: boolean
+                    batch_size:
+                        type: integer
+                    flush_interval_ms:
+                        type: integer
+        400:
+            description: Malformed batch.
     """
-    data = request.get_json()
-    result = measurement_service.save_points(data)
+    # navigator.sendBeacon posts the JSON body as text/plain
+    data = request.get_json(force=True)
+    try:
+        result = measurement_service.save_points(data)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": f"Invalid batch: {e}"}), 400
     return jsonify(result)
 
 
+@api_bp.route("/save-session-metadata", methods=["POST"])
+def save_session_metadata():
+    """
+    Saves the viewport and prototype frame of a session, sent at calibration.
+    ---
+    parameters:
+        - name: metadata
+          in: body
+          required: true
+          schema:
+            type: object
+            properties:
+                id:
+                    type: integer
+                viewport:
+                    type: object
+                    description: Size of the viewport in CSS pixels
+                    properties:
+                        width:
+                            type: number
+                        height:
+                            type: number
+                devicePixelRatio:
+                    type: number
+                frame:
+                    type: object
+                    description: Position and size of the prototype in the
+                        viewport, in CSS pixels; the whole viewport if omitted
+                    properties:
+                        x:
+                            type: number
+                        y:
+                            type: number
+                        width:
+                            type: number
+                        height:
+                            type: number
+    responses:
+        200:
+            description: Session metadata saved.
+        400:
+            description: Malformed metadata.
+        404:
+            description: Subject not found.
+    """
+    data = request.get_json()
+    try:
+        result = subject_service.save_session_metadata(data)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": f"Invalid metadata: {e}"}), 400
+    if result:
+        return jsonify(result)
+    return "Subject not found", 404
+
+
+@api_bp.route("/save-calibration-quality", methods=["POST"])
+def save_calibration_quality():
+    """
+    Scores the calibration of a session from validation samples.
+    ---
+    parameters:
+        - name: validation
+          in: body
+          required: true
+          schema:
+            type: object
+            properties:
+                id:
+                    type: integer
+                x_target:
+                    type: array
+                    description: Center of the calibration target of each
+                        sample, in CSS pixels
+                    items:
+                        type: number
+                y_target:
+                    type: array
+                    items:
+                        type: number
+                x_gaze:
+                    type: array
+                    description: Gaze predicted while looking at the target
+                        (null if there was no prediction)
+                    items:
+                        type: number
+                y_gaze:
+                    type: array
+                    items:
+                        type: number
+                viewport:
+                    type: object
+                    description: Size of the viewport in CSS pixels; the
+                        session metadata is used if omitted
+                    properties:
+                        width:
+                            type: number
+                        height:
+                            type: number
+    responses:
+        200:
+            description: Accuracy and precision in CSS pixels and the score
+                from 0 to 1.
+        400:
+            description: Malformed validation samples.
+        404:
+            description: Subject not found.
+    """
+    data = request.get_json()
+    try:
+        result = subject_service.save_calibration_quality(data)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": f"Invalid samples: {e}"}), 400
+    if result:
+        return jsonify(result)
+    return "Subject not found", 404
+
+
 @api_bp.route("/save-tasklogs", methods=["POST"])
 def save_tasklogs():
     """
@@ -152,6 +795,9 @@ def save_tasklogs():
                         format: date-time
                     response:
                         type: string
+                    taskIndex:
+                        type: integer
+                        description: Position of the task in tasks.json
                     subject_id:
                         type: integer
     responses:
@@ -163,6 +809,15 @@ def save_tasklogs():
     return jsonify(result)
 
 
+def _config_document(filename):
+    """Serve a configuration file from the in-memory copy."""
+    try:
+        document = config_manager.get_document(filename)
+    except FileNotFoundError:
+        abort(404)
+    return document_response(document)
+
+
 @api_bp.route("/config")
 def config():
     """
@@ -171,11 +826,10 @@ def config():
     responses:
         200:
             description: Configuration file.
+        304:
+            description: The file has not changed since the cached copy.
     """
-    config_dir = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)), "..", "config"
-    )
-    return send_from_directory(config_dir, "config.json")
+    return _config_document("config.json")
 
 
 @api_bp.route("/tasks")
@@ -186,11 +840,14 @@ def tasks():
     responses:
         200:
             description: Tasks file.
+        304:
+            description: The file has not changed since the cached copy.
     """
-    return send_from_directory("config", "tasks.json")
+    return _config_document("tasks.json")
 
 
 @api_bp.route("/download-points")
+@subject_validators
 def download_points():
     """
     Downloads recorded points for a specific subject.
@@ -222,6 +879,7 @@ def download_points():
 
 
 @api_bp.route("/download-tasklogs")
+@subject_validators
 def download_tasklogs():
     """
     Downloads task logs recorded for a specific subject.
@@ -257,13 +915,27 @@ def download_all():
     """
     Downloads recorded points for all subjects in CSV format.
     ---
+    parameters:
+        - name: min_quality
+          in: query
+          type: number
+          required: false
+          description: Only include subjects with at least this calibration
+              score (0 to 1).
     responses:
         200:
             description: CSV file with recorded points for all subjects.
+        400:
+            description: Invalid min_quality.
         404:
             description: No registered subjects.
     """
-    csv_data = export_service.export_all_points_csv()
+    try:
+        min_quality = _parse_min_quality_arg()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    csv_data = export_service.export_all_points_csv(min_quality)
     if csv_data:
         return send_file(
             csv_data,
@@ -275,6 +947,118 @@ def download_all():
         return "No registered subjects", 404
 
 
+def _job_response(job, status=200):
+    """Serialize a job's status, with its download URL once it succeeded."""
+    job["status_url"] = url_for("api.get_job", job_id=job["id"])
+    if job["status"] == "succeeded":
+        job["download_url"] = url_for("api.download_job", job_id=job["id"])
+    response = jsonify(job)
+    response.status_code = status
+    if status == 202:
+        response.headers["Location"] = job["status_url"]
+    return response
+
+
+@api_bp.route("/jobs", methods=["POST"])
+def submit_job():
+    """
+    Submits a long analytics or export task to run in the background.
+    ---
+    parameters:
+        - name: job
+          in: body
+          required: true
+          schema:
+            type: object
+            properties:
+                kind:
+                    type: string
+                    enum: [study-analysis, scanpath-similarity, user-heatmap,
+                        points-csv, tasklogs-csv, all-points-csv]
+                params:
+                    type: object
+                    description: study, or subject, and optionally bins,
+                        fields, space, grid, method, aois and min_quality,
+                        as in the synchronous endpoints
+    responses:
+        202:
+            description: Job queued (or already queued with the same
+                parameters); poll the URL in the Location header.
+        200:
+            description: Job already finished, when jobs run inline.
+        400:
+            description: Invalid kind or parameters.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("params", {}), dict):
+        return jsonify({"status": "error", "message": "Invalid job"}), 400
+
+    try:
+        job = job_service.submit_job(data.get("kind"), data.get("params"))
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    finished = job["status"] in ("succeeded", "failed")
+    return _job_response(job, 200 if finished else 202)
+
+
+@api_bp.route("/jobs/<job_id>")
+def get_job(job_id):
+    """
+    Returns the status and progress of a background job.
+    ---
+    parameters:
+        - name: job_id
+          in: path
+          type: string
+          required: true
+    responses:
+        200:
+            description: JSON with the job's status (queued, running,
+                succeeded or failed), progress from 0 to 1, error, and the
+                download URL once it succeeded.
+        404:
+            description: Job not found.
+    """
+    job = job_service.get_job_status(job_id)
+    if job:
+        return _job_response(job)
+    return "Job not found", 404
+
+
+@api_bp.route("/jobs/<job_id>/download")
+def download_job(job_id):
+    """
+    Downloads the result of a background job.
+    ---
+    parameters:
+        - name: job_id
+          in: path
+          type: string
+          required: true
+    responses:
+        200:
+            description: The file produced by the job.
+        404:
+            description: Job not found.
+        409:
+            description: The job has not succeeded.
+    """
+    result = job_service.get_job_result(job_id)
+    if result is None:
+        return "Job not found", 404
+
+    job, path = result
+    if path is None:
+        return jsonify({"status": "error", "message": f"Job is {job.status}"}), 409
+    return send_file(
+        path,
+        as_attachment=True,
+        download_name=job.result_name,
+        mimetype=job.result_mimetype,
+    )
+
+
 @api_bp.route("/users/count", methods=["GET"])
 def get_user_count():
     """
@@ -312,7 +1096,7 @@ def create_user():
     """
     data = request.get_json()
     result = user_service.create_user(data)
-    
+
     if result.get("status") == "success":
         return jsonify(result), 201
     else:
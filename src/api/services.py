@@ -3,18 +3,153 @@ API services for the user gaze tracking application.
 Contains business logic for data processing and database operations.
 """
 
+import base64
 import csv
+import hashlib
 import io
-from datetime import datetime
-import numpy as np
+import json
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
 from db import db, Subject, Point, Measurement, TaskLog, User
+from storage import get_result_cache, get_cold_store
+from state import ConfigManager, IngestPressure, get_job_runner
 from repositories import (
+    SAMPLE_SOURCES,
     SubjectRepository,
     MeasurementRepository,
     PointRepository,
     TaskLogRepository,
     UserRepository,
+    IngestBatchRepository,
+    StudyRepository,
+    JobRepository,
+    JOB_QUEUED,
+    JOB_SUCCEEDED,
+    JOB_FAILED,
 )
+from .config import (
+    ANALYSIS_QUEUED_PER_WORKER,
+    BATCH_COLUMNS,
+    CALIBRATION_MAX_SAMPLES,
+    CLIENT_DATE_FORMAT,
+    CLIENT_TIMEZONE,
+    CONFIG_CHECK_INTERVAL,
+    COORDINATE_SPACES,
+    FIXATION_MAX_DISPERSION_PX,
+    FIXATION_MIN_DURATION_S,
+    HEATMAP_DEFAULT_BINS,
+    HEATMAP_MAX_BINS,
+    INGEST_BATCH_SIZE_RANGE,
+    INGEST_FLUSH_INTERVAL_RANGE_MS,
+    INGEST_TARGET_IN_FLIGHT,
+    INGEST_TARGET_LATENCY_MS,
+    JOB_RETENTION_HOURS,
+    SCANPATH_DEFAULT_GRID,
+    SCANPATH_MAX_GRID,
+    SCANPATH_METHODS,
+    SCANPATH_PAIRS_PER_TASK,
+)
+
+# Shared in-memory copy of config.json and tasks.json, reloaded on change
+config_manager = ConfigManager(watch=True, check_interval=CONFIG_CHECK_INTERVAL)
+
+# Jobs left running by processes started before this one were interrupted
+_PROCESS_STARTED_AT = datetime.now()
+
+# Commit latency and concurrent uploads, used to pace client uploads
+ingest_pressure = IngestPressure(
+    target_latency_ms=INGEST_TARGET_LATENCY_MS,
+    target_in_flight=INGEST_TARGET_IN_FLIGHT,
+    batch_size_range=INGEST_BATCH_SIZE_RANGE,
+    flush_interval_range_ms=INGEST_FLUSH_INTERVAL_RANGE_MS,
+)
+
+
+def parse_client_dates(values):
+    """
+    Parse client timestamps, running strptime once per distinct value.
+
+    Samples and task logs sent in one batch share few distinct timestamps
+    (they have one-second resolution), so parsing each distinct string once
+    avoids most of the strptime calls.
+
+    Args:
+        values: Timestamp strings in ``CLIENT_DATE_FORMAT``; empty values
+            are returned as None
+
+    Returns:
+        List of datetimes in the same order
+    """
+    parsed = {
+        value: datetime.strptime(value, CLIENT_DATE_FORMAT)
+        for value in set(values)
+        if value
+    }
+    return [parsed.get(value) if value else None for value in values]
+
+
+def parse_min_quality(value):
+    """
+    Parse a minimum calibration score.
+
+    Args:
+        value: Score from 0 to 1, as a number or a string
+
+    Returns:
+        The score as a float
+
+    Raises:
+        ValueError: If the value is not a number from 0 to 1
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid min_quality: {value}")
+    quality = float(value)
+    if not 0.0 <= quality <= 1.0:
+        raise ValueError(f"Invalid min_quality: {value}")
+    return quality
+
+
+def epoch_ms_to_dates(values):
+    """
+    Convert client epoch timestamps to naive datetimes in ``CLIENT_TIMEZONE``.
+
+    Stored dates are local times, like the text timestamps clients used to
+    send. The offset is looked up once per batch and applied with NumPy,
+    unless the batch spans an offset change.
+
+    Args:
+        values: Milliseconds since the Unix epoch
+
+    Returns:
+        List of datetimes in the same order
+    """
+    import numpy as np
+
+    times = np.asarray(values, dtype=np.float64)
+    if not len(times):
+        return []
+
+    zone = ZoneInfo(CLIENT_TIMEZONE)
+    offsets = {
+        datetime.fromtimestamp(t / 1000, zone).utcoffset()
+        for t in (times.min(), times.max())
+    }
+    if len(offsets) > 1:
+        return [
+            datetime.fromtimestamp(t / 1000, zone).replace(tzinfo=None)
+            for t in times.tolist()
+        ]
+
+    offset_ms = offsets.pop() // timedelta(milliseconds=1)
+    local = (np.round(times).astype(np.int64) + offset_ms).astype("datetime64[ms]")
+    return local.astype("datetime64[us]").tolist()
 
 
 class SubjectService:
@@ -32,6 +167,7 @@ class SubjectService:
                 "name": subject.name,
                 "surname": subject.surname,
                 "age": subject.age,
+                "calibration_score": subject.calibration_score,
             }
             for subject in subjects
         ]
@@ -40,6 +176,132 @@ class SubjectService:
         """Get a subject by its ID."""
         return self.repository.get_subject_by_id(subject_id)
 
+    def get_data_version(self, subject_id):
+        """
+        Get the data version of a subject without reading its samples.
+
+        Returns:
+            Tuple (version, last_modified), or None if the subject does not exist
+        """
+        subject = self.repository.get_subject_by_id(subject_id)
+
+        if not subject:
+            return None
+
+        return subject.data_version, subject.updated_at
+
+    def save_session_metadata(self, data):
+        """
+        Save the viewport, device pixel ratio and prototype frame of a session.
+
+        Sent by the client when calibration finishes. Sizes are in CSS
+        pixels; the frame defaults to the whole viewport.
+
+        Args:
+            data: Dictionary with id, viewport {width, height},
+                devicePixelRatio and frame {x, y, width, height}
+
+        Returns:
+            Dictionary with the result, or None if the subject does not exist
+
+        Raises:
+            ValueError: If a size is not positive
+        """
+        viewport = data["viewport"]
+        frame = data.get("frame") or {}
+        metadata = {
+            "viewport_width": int(viewport["width"]),
+            "viewport_height": int(viewport["height"]),
+            "device_pixel_ratio": float(data.get("devicePixelRatio") or 1.0),
+            "frame_x": float(frame.get("x", 0.0)),
+            "frame_y": float(frame.get("y", 0.0)),
+            "frame_width": float(frame.get("width", viewport["width"])),
+            "frame_height": float(frame.get("height", viewport["height"])),
+        }
+        positive = (
+            "viewport_width",
+            "viewport_height",
+            "device_pixel_ratio",
+            "frame_width",
+            "frame_height",
+        )
+        if not all(metadata[name] > 0 for name in positive):
+            raise ValueError("Sizes must be positive")
+
+        if not self.repository.record_session_metadata(data["id"], metadata):
+            return None
+        self.repository.commit()
+        return {"status": "success", "message": "Session metadata saved."}
+
+    def save_calibration_quality(self, data):
+        """
+        Score the calibration of a session from validation predictions.
+
+        Sent by the client when calibration finishes: for each validation
+        sample, the center of the calibration target the subject was looking
+        at and the gaze WebGazer predicted there, in CSS pixels. Accuracy,
+        precision and the score are computed here and stored on the subject.
+        The score scale is half the viewport height, taken from the request
+        or from the session metadata.
+
+        Args:
+            data: Dictionary with id, x_target, y_target, x_gaze and y_gaze
+                arrays (null for missing predictions) and optionally
+                viewport {width, height}
+
+        Returns:
+            Dictionary with the result and the metrics, or None if the
+            subject does not exist
+
+        Raises:
+            ValueError: If the arrays are invalid or there is no viewport
+        """
+        import numpy as np
+        from analytics import calibration_quality
+
+        subject = self.repository.get_subject_by_id(data["id"])
+
+        if not subject:
+            return None
+
+        columns = [
+            np.array(data[name], dtype=np.float64)
+            for name in ("x_target", "y_target", "x_gaze", "y_gaze")
+        ]
+        lengths = {len(column) for column in columns}
+        if len(lengths) != 1 or any(column.ndim != 1 for column in columns):
+            raise ValueError("Columns must be arrays of the same length")
+        if lengths.pop() > CALIBRATION_MAX_SAMPLES:
+            raise ValueError(f"At most {CALIBRATION_MAX_SAMPLES} samples")
+        if not np.isfinite(columns[0]).all() or not np.isfinite(columns[1]).all():
+            raise ValueError("Targets must be finite")
+
+        viewport = data.get("viewport") or {}
+        height = float(viewport.get("height") or subject.viewport_height or 0)
+        if height <= 0:
+            raise ValueError("Unknown viewport height")
+
+        quality = calibration_quality(*columns, height / 2)
+        if quality["samples"] == 0:
+            raise ValueError("No validation predictions")
+
+        metrics = {
+            "calibration_accuracy": round(quality["accuracy"], 1),
+            "calibration_precision": round(quality["precision"], 1),
+            "calibration_score": round(quality["score"], 3),
+            "calibration_samples": quality["samples"],
+        }
+        self.repository.record_session_metadata(subject.id, metrics)
+        self.repository.commit()
+        return {
+            "status": "success",
+            "message": "Calibration quality saved.",
+            "accuracy": metrics["calibration_accuracy"],
+            "precision": metrics["calibration_precision"],
+            "score": metrics["calibration_score"],
+            "samples": metrics["calibration_samples"],
+        }
+
 
 class MeasurementService:
     """Service class for managing measurements."""
@@ -47,61 +309,477 @@ class MeasurementService:
     def __init__(self):
         self.repository = MeasurementRepository()
         self.point_repository = PointRepository()
+        self.subject_repository = SubjectRepository()
+        self.batch_repository = IngestBatchRepository()
 
     def save_points(self, data):
-        """Save measurement points to the database."""
-        points = data["points"]
-        subject_id = data["id"]
+        """
+        Save measurement points to the database.
 
-        for point in points:
-            date = datetime.strptime(point["date"], "%m/%d/%Y, %I:%M:%S %p")
+        A batch is either a list of ``points`` with a text ``date`` or an
+        epoch-millisecond ``t`` each, or ``layout="columnar"`` parallel
+        arrays (see ``BATCH_COLUMNS``), optionally as base64 little-endian
+        float64 like the columnar output of ``get_user_points``.
 
-            gaze_point = self.point_repository.create_point(
-                x=point["gaze"]["x"],
-                y=point["gaze"]["y"],
-            )
+        Clients may tag each batch with a ``batch_id`` and resend it until it
+        is acknowledged. A batch that was already saved is acknowledged again
+        without inserting its samples twice. Batches can arrive late and out
+        of order: samples are stored with the time they were recorded.
 
-            mouse_point = self.point_repository.create_point(
-                x=point["mouse"]["x"],
-                y=point["mouse"]["y"],
-            )
+        The response also carries the batch size and flush interval that the
+        client should use, based on the current ingest load.
+        """
+        with ingest_pressure.track():
+            duplicate = self._save_batch(data)
+
+        return {
+            "status": "success",
+            "duplicate": duplicate,
+            **ingest_pressure.recommendation(),
+        }
 
-            self.repository.create_measurement(
-                date=date,
-                subject_id=subject_id,
-                gaze_point=gaze_point,
-                mouse_point=mouse_point,
+    def _save_batch(self, data):
+        """Save one batch of points; return True if it was already saved."""
+        subject_id = data["id"]
+        batch_id = data.get("batch_id")
+
+        if batch_id is not None:
+            batch_id = str(batch_id)[:64]
+            if self.batch_repository.is_recorded(subject_id, batch_id):
+                return True
+
+        samples = _batch_samples(data)
+
+        if batch_id is not None:
+            # Insert the batch row before any sample: a concurrent save of the
+            # same batch fails here on the unique constraint, before samples
+            # are written to a shard that commits separately
+            self.batch_repository.record_batch(subject_id, batch_id, len(samples))
+            try:
+                self.batch_repository.flush()
+            except IntegrityError:
+                self.repository.rollback()
+                if self.batch_repository.is_recorded(subject_id, batch_id):
+                    return True
+                raise
+
+        sample_ids = self.repository.bulk_create_samples(subject_id, samples)
+
+        if sample_ids:
+            self.subject_repository.record_samples(
+                subject_id, len(samples), max(sample_ids)
             )
 
         self.repository.commit()
-        return {"status": "success"}
-
-    def get_user_points(self, subject_id):
-        """Get measurement points for a specific subject."""
+        self.repository.append_to_store(subject_id, sample_ids, samples)
+        return False
+
+    def get_user_points(
+        self,
+        subject_id,
+        limit=None,
+        cursor=None,
+        start=None,
+        end=None,
+        sources=None,
+        layout="rows",
+        encoding="json",
+    ):
+        """
+        Get measurement points for a specific subject.
+
+        Without a limit the whole (optionally time filtered) session is
+        returned. With a limit, one page is returned together with the cursor
+        to request the next one.
+
+        Args:
+            subject_id: The ID of the subject
+            limit: Maximum number of points to return (optional)
+            cursor: Cursor returned by the previous page (optional)
+            start: Only include points at or after this time (optional)
+            end: Only include points at or before this time (optional)
+            sources: Point sources to include, defaults to mouse and gaze
+            layout: "rows" for one dictionary per point or "columnar" for
+                parallel arrays built directly from the query result
+            encoding: For the columnar layout, "json" for plain arrays or
+                "base64" for little-endian float64 buffers
+
+        Returns:
+            Dictionary with the points, or None if the subject does not exist
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
         subject_service = SubjectService()
         subject = subject_service.get_subject_by_id(subject_id)
 
         if not subject:
             return None
 
-        measurements = self.repository.get_measurements_by_subject(subject.id)
+        sources = sources or SAMPLE_SOURCES
 
-        points = []
-        for measurement in measurements:
-            point = {
-                "date": measurement.date.strftime("%Y-%m-%d %H:%M:%S"),
-                "x_mouse": (
-                    measurement.mouse_point.x if measurement.mouse_point else None
-                ),
-                "y_mouse": (
-                    measurement.mouse_point.y if measurement.mouse_point else None
-                ),
-                "x_gaze": measurement.gaze_point.x if measurement.gaze_point else None,
-                "y_gaze": measurement.gaze_point.y if measurement.gaze_point else None,
-            }
-            points.append(point)
+        if limit is None:
+            samples = self.repository.get_sample_arrays(subject.id, start, end, sources)
+            return _points_payload(subject_id, samples, sources, layout, encoding)
 
-        return {"subject_id": subject_id, "points": points}
+        samples = self.repository.get_sample_page(
+            subject.id,
+            limit,
+            after=decode_cursor(cursor) if cursor else None,
+            start=start,
+            end=end,
+            sources=sources,
+        )
+
+        next_cursor = None
+        if len(samples["id"]) == limit:
+            next_cursor = encode_cursor(
+                samples["date"][-1].item(), int(samples["id"][-1])
+            )
+
+        result = _points_payload(subject_id, samples, sources, layout, encoding)
+        result["next_cursor"] = next_cursor
+        return result
+
+    def stream_user_points(
+        self, subject_id, start=None, end=None, sources=None, fmt="ndjson"
+    ):
+        """
+        Stream the measurement points of a subject as JSON text.
+
+        Samples are read in bounded chunks and each chunk is serialized as
+        soon as it is read, so memory use and time to first byte do not
+        depend on the length of the session.
+
+        Args:
+            subject_id: The ID of the subject
+            start: Only include samples at or after this time (optional)
+            end: Only include samples at or before this time (optional)
+            sources: Point sources to include (default: mouse and gaze)
+            fmt: "ndjson" for one point per line or "json" for an array
+
+        Returns:
+            Iterator of text chunks with points shaped like those of
+            ``get_user_points``, or None if the subject does not exist
+        """
+        subject = SubjectService().get_subject_by_id(subject_id)
+
+        if not subject:
+            return None
+
+        sources = tuple(sources or SAMPLE_SOURCES)
+        chunks = self.repository.iter_sample_chunks(subject.id, start, end, sources)
+        return _stream_points(chunks, sources, fmt)
+
+    def get_user_replay(self, subject_id, frames, start=None, end=None, method="lttb"):
+        """
+        Get downsampled mouse and gaze trajectories for replaying a session.
+
+        Args:
+            subject_id: The ID of the subject
+            frames: Maximum number of samples per trajectory
+            start: Only include samples at or after this time (optional)
+            end: Only include samples at or before this time (optional)
+            method: "lttb" to keep the most significant samples or "mean" to
+                average fixed-width time buckets
+
+        Returns:
+            Dictionary with the session's viewport and one trajectory per
+            source, or None if the subject does not exist
+        """
+        subject = SubjectService().get_subject_by_id(subject_id)
+
+        if not subject:
+            return None
+
+        import numpy as np
+
+        samples = self.repository.get_sample_arrays(subject.id, start, end)
+        dates = samples["date"]
+        seconds = (dates - dates[0]) / np.timedelta64(1, "s") if len(dates) else dates
+
+        return {
+            "subject_id": subject_id,
+            "viewport": _viewport(subject),
+            "method": method,
+            "frames": frames,
+            "total_samples": len(dates),
+            "start": str(dates[0]) if len(dates) else None,
+            "end": str(dates[-1]) if len(dates) else None,
+            "mouse": _replay_track(
+                seconds, samples["x_mouse"], samples["y_mouse"], frames, method
+            ),
+            "gaze": _replay_track(
+                seconds, samples["x_gaze"], samples["y_gaze"], frames, method
+            ),
+        }
+
+    def get_user_heatmap(self, subject_id, bins, sources=None, space="screen"):
+        """
+        Get the binned density of a subject's points for drawing a heatmap.
+
+        Only the non-empty cells are returned, so the size of the response
+        depends on the grid and not on the length of the session. Results
+        are cached per data version.
+
+        Args:
+            subject_id: The ID of the subject
+            bins: Number of bins per axis
+            sources: Point sources to include (default: mouse and gaze)
+            space: "screen" for pixel coordinates, or "canonical" for the
+                unit square of the session's prototype frame
+
+        Returns:
+            JSON bytes with the grid extent and the count of each non-empty
+            cell, or None if the subject does not exist
+
+        Raises:
+            ValueError: If the canonical space is requested for a session
+                without viewport metadata
+        """
+        subject = SubjectService().get_subject_by_id(subject_id)
+
+        if not subject:
+            return None
+
+        frame = None
+        if space == "canonical":
+            frame = subject.canonical_frame
+            if frame is None:
+                raise ValueError("The session has no viewport metadata")
+
+        sources = tuple(sources or SAMPLE_SOURCES)
+        return _cached(
+            f"subject-{subject.id}",
+            f"heatmap-{space}-{bins}-{'-'.join(sources)}.json",
+            subject.data_version,
+            lambda: self._build_heatmap(subject.id, bins, sources, space, frame),
+        )
+
+    def _build_heatmap(self, subject_id, bins, sources, space, frame):
+        """Bin the points of a subject and serialize the non-empty cells."""
+        import numpy as np
+        from analytics import binned_density, normalize_samples
+
+        samples = self.repository.get_sample_arrays(subject_id, sources=sources)
+        extent = None
+        digits = 2
+        if frame is not None:
+            samples = normalize_samples(samples, frame, sources)
+            extent = ((0.0, 1.0), (0.0, 1.0))
+            digits = 6
+
+        x = np.concatenate([samples[f"x_{source}"] for source in sources])
+        y = np.concatenate([samples[f"y_{source}"] for source in sources])
+
+        # Points outside the frame are not clamped onto its edges
+        counts, x_edges, y_edges = binned_density(
+            x, y, bins, extent, clip=frame is None
+        )
+
+        payload = {
+            "subject_id": subject_id,
+            "space": space,
+            "sources": list(sources),
+            "bins": bins,
+            **_density_payload(counts, x_edges, y_edges, digits),
+        }
+        return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def encode_cursor(date, sample_id):
+    """Encode the (date, id) key of a sample as an opaque pagination cursor."""
+    raw = f"{date.isoformat()}|{sample_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Decode a pagination cursor into its (date, id) key."""
+    try:
+        date, sample_id = (
+            base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        )
+        return datetime.fromisoformat(date), int(sample_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _batch_samples(data):
+    """Build (date, x_mouse, y_mouse, x_gaze, y_gaze) tuples from a batch."""
+    if data.get("layout") == "columnar":
+        return _columnar_samples(data["columns"], data.get("encoding", "json"))
+
+    points = data["points"]
+    if all("t" in point for point in points):
+        dates = epoch_ms_to_dates([point["t"] for point in points])
+    else:
+        dates = parse_client_dates([point["date"] for point in points])
+
+    return [
+        (
+            date,
+            point["mouse"]["x"],
+            point["mouse"]["y"],
+            point["gaze"]["x"],
+            point["gaze"]["y"],
+        )
+        for point, date in zip(points, dates)
+    ]
+
+
+def _columnar_samples(columns, encoding):
+    """Decode a columnar batch, dropping samples with missing values."""
+    import numpy as np
+
+    if encoding == "base64":
+        arrays = [
+            np.frombuffer(base64.b64decode(columns[name]), dtype="<f8")
+            for name in BATCH_COLUMNS
+        ]
+    elif encoding == "json":
+        arrays = [np.asarray(columns[name], dtype=np.float64) for name in BATCH_COLUMNS]
+    else:
+        raise ValueError(f"Invalid encoding: {encoding}")
+
+    if len({len(values) for values in arrays}) > 1:
+        raise ValueError("Batch columns have different lengths")
+
+    valid = np.isfinite(np.column_stack(arrays)).all(axis=1)
+    times, *coordinates = (values[valid] for values in arrays)
+    dates = epoch_ms_to_dates(times)
+    return list(zip(dates, *(values.tolist() for values in coordinates)))
+
+
+def _points_payload(subject_id, samples, sources, layout, encoding):
+    """Build the get_user_points response in the requested layout."""
+    if layout == "columnar":
+        return {
+            "subject_id": subject_id,
+            "layout": "columnar",
+            "encoding": encoding,
+            "count": len(samples["id"]),
+            "columns": _points_columns(samples, sources, encoding),
+        }
+    return {"subject_id": subject_id, "points": _points_list(samples, sources)}
+
+
+def _points_columns(samples, sources, encoding):
+    """
+    Build parallel arrays for the columnar layout without per-point objects.
+
+    Dates are milliseconds since the epoch, in the same local time in which
+    they were recorded.
+    """
+    import numpy as np
+
+    columns = {
+        "id": samples["id"].astype(np.float64),
+        "date": samples["date"].astype("datetime64[ms]").astype(np.float64),
+    }
+    for source in sources:
+        for axis in ("x", "y"):
+            name = f"{axis}_{source}"
+            columns[name] = samples[name]
+
+    if encoding == "base64":
+        return {
+            name: base64.b64encode(values.astype("<f8").tobytes()).decode("ascii")
+            for name, values in columns.items()
+        }
+
+    result = {}
+    for name, values in columns.items():
+        if np.isnan(values).any():
+            result[name] = [None if v != v else v for v in values.tolist()]
+        elif name in ("id", "date"):
+            result[name] = values.astype(np.int64).tolist()
+        else:
+            result[name] = values.tolist()
+    return result
+
+
+def _points_list(samples, sources):
+    """Build the per-point dictionaries returned by get_user_points."""
+    names = [f"{axis}_{source}" for source in sources for axis in ("x", "y")]
+    columns = _points_columns_text(samples, names)
+
+    keys = ["date"] + names
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+def _stream_points(chunks, sources, fmt):
+    """Serialize chunks of samples as NDJSON lines or one JSON array."""
+    encode = json.JSONEncoder(separators=(",", ":")).encode
+
+    if fmt == "ndjson":
+        for samples in chunks:
+            yield "".join(encode(row) + "\n" for row in _points_list(samples, sources))
+        return
+
+    yield "["
+    separator = ""
+    for samples in chunks:
+        rows = _points_list(samples, sources)
+        if rows:
+            yield separator + ",".join(encode(row) for row in rows)
+            separator = ","
+    yield "]"
+
+
+def _viewport(subject):
+    """Get the viewport and frame recorded for a session, if any."""
+    if not subject.viewport_width:
+        return None
+    return {
+        "width": subject.viewport_width,
+        "height": subject.viewport_height,
+        "device_pixel_ratio": subject.device_pixel_ratio,
+        "frame": dict(zip(("x", "y", "width", "height"), subject.canonical_frame)),
+    }
+
+
+def _density_payload(counts, x_edges, y_edges, digits):
+    """Get the extent, totals and non-empty cells of a density grid."""
+    import numpy as np
+
+    ix, iy = np.nonzero(counts)
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+
+    return {
+        "extent": {
+            "x": [x_edges[0], x_edges[-1]],
+            "y": [y_edges[0], y_edges[-1]],
+        },
+        "total": int(counts.sum()),
+        "max": int(counts.max()) if counts.size else 0,
+        "cells": {
+            "x": np.round(x_centers[ix], digits).tolist(),
+            "y": np.round(y_centers[iy], digits).tolist(),
+            "count": counts[ix, iy].tolist(),
+        },
+    }
+
+
+def _replay_track(seconds, x, y, frames, method):
+    """Downsample one trajectory and return it as parallel lists."""
+    import numpy as np
+    from analytics import lttb_indices, bucket_means
+
+    valid = ~(np.isnan(x) | np.isnan(y))
+    seconds, x, y = seconds[valid].astype(np.float64), x[valid], y[valid]
+
+    if method == "mean":
+        seconds, x, y = bucket_means(seconds, x, y, frames)
+    else:
+        selected = lttb_indices(x, y, frames)
+        seconds, x, y = seconds[selected], x[selected], y[selected]
+
+    return {
+        "t": np.round(seconds, 3).tolist(),
+        "x": x.tolist(),
+        "y": y.tolist(),
+    }
 
 
 class TaskLogService:
@@ -109,27 +787,60 @@ class TaskLogService:
 
     def __init__(self):
         self.repository = TaskLogRepository()
+        self.subject_repository = SubjectRepository()
+        self._tasks_etag = None
+        self._tasks_by_index = {}
 
     def save_tasklogs(self, data):
-        """Save task logs to the database."""
+        """
+        Save task logs to the database with a single bulk insert.
+
+        Task metadata is copied from tasks.json using the ``taskIndex`` sent
+        with each log, so it is preserved if the tasks change later.
+        """
         task_logs = data["taskLogs"]
         subject_id = data["subject_id"]
 
-        for log in task_logs:
-            self.repository.create_tasklog(
-                start_time=datetime.strptime(log["startTime"], "%m/%d/%Y, %I:%M:%S %p"),
-                end_time=(
-                    datetime.strptime(log["endTime"], "%m/%d/%Y, %I:%M:%S %p")
-                    if log["endTime"]
-                    else None
-                ),
-                response=log["response"],
-                subject_id=subject_id,
+        start_times = parse_client_dates([log["startTime"] for log in task_logs])
+        end_times = parse_client_dates([log.get("endTime") for log in task_logs])
+        task_index = self._task_index()
+
+        rows = []
+        for log, start_time, end_time in zip(task_logs, start_times, end_times):
+            task = task_index.get(log.get("taskIndex"), {})
+            rows.append(
+                {
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "response": log["response"],
+                    "subject_id": subject_id,
+                    "task_description": task.get("task"),
+                    "task_type": task.get("type"),
+                    "task_version": task.get("version"),
+                }
             )
 
+        if rows:
+            self.repository.bulk_create_tasklogs(rows)
+            self.subject_repository.record_tasklogs(subject_id, len(rows))
+
         self.repository.commit()
+
         return {"status": "success", "message": "TaskLogs saved successfully."}
 
+    def _task_index(self):
+        """Map task positions to their tasks.json entries, rebuilt on change."""
+        try:
+            document = config_manager.get_document("tasks.json")
+        except (FileNotFoundError, ValueError):
+            return {}
+
+        if self._tasks_etag != document.etag:
+            tasks = document.data.get("tasks", [])
+            self._tasks_by_index = dict(enumerate(tasks))
+            self._tasks_etag = document.etag
+        return self._tasks_by_index
+
     def get_user_tasklogs(self, subject_id):
         """Get task logs for a specific subject."""
         subject_service = SubjectService()
@@ -152,6 +863,67 @@ class TaskLogService:
         return {"subject_id": subject_id, "task_logs": task_logs_info}
 
 
+class CompactionService:
+    """Service class for moving finished sessions to cold storage."""
+
+    def __init__(self):
+        self.repository = MeasurementRepository()
+        self.subject_repository = SubjectRepository()
+
+    def compact_subject(self, subject_id, compress=False):
+        """
+        Move the samples of a subject from the database to cold storage.
+
+        Samples already in cold storage are merged with the ones in the
+        database and the subject's files are rewritten. The files are built
+        from a single read of the database and only the rows of that read
+        are deleted, so samples arriving during compaction stay in the
+        database and are not written to the files. The subject's sample
+        store, when enabled, is then rebuilt if it is incomplete.
+
+        Args:
+            subject_id: The ID of the subject
+            compress: Store a compressed file instead of memory-mappable ones
+
+        Returns:
+            Number of samples moved out of the database
+        """
+        store = get_cold_store()
+        if store is None:
+            raise RuntimeError("Cold storage is not configured (COLD_STORAGE_DIR)")
+
+        moved = 0
+        hot = self.repository.get_sample_arrays(subject_id, include_cold=False)
+        if len(hot["id"]):
+            samples = self.repository.merge_cold_samples(subject_id, hot)
+            store.write(subject_id, samples, compress=compress)
+
+            moved = self.repository.delete_samples(subject_id, int(hot["id"].max()))
+            self.repository.commit()
+
+        self.repository.refresh_store(subject_id)
+        return moved
+
+    def compact_idle_subjects(self, idle=timedelta(hours=24), compress=False):
+        """
+        Compact every subject whose data has not changed for a while.
+
+        Args:
+            idle: Time without new data after which a session is finished
+            compress: Store compressed files instead of memory-mappable ones
+
+        Returns:
+            Dictionary mapping subject IDs to the number of samples moved
+        """
+        subjects = self.subject_repository.get_idle_subjects(datetime.now() - idle)
+        moved = {}
+        for subject in subjects:
+            count = self.compact_subject(subject.id, compress=compress)
+            if count:
+                moved[subject.id] = count
+        return moved
+
+
 class ExportService:
     """Service class for data export functionality."""
 
@@ -167,27 +939,13 @@ class ExportService:
         if not subject:
             return None
 
-        measurements = self.measurement_repository.get_measurements_by_subject(
-            subject.id
+        data = _cached(
+            f"subject-{subject.id}",
+            "points.csv",
+            subject.data_version,
+            lambda: self._build_points_csv(subject.id),
         )
-
-        si = io.StringIO()
-        csv_writer = csv.writer(si)
-
-        csv_writer.writerow(["date", "x_mouse", "y_mouse", "x_gaze", "y_gaze"])
-
-        for measurement in measurements:
-            row = [
-                measurement.date.strftime("%Y-%m-%d %H:%M:%S"),
-                measurement.mouse_point.x if measurement.mouse_point else None,
-                measurement.mouse_point.y if measurement.mouse_point else None,
-                measurement.gaze_point.x if measurement.gaze_point else None,
-                measurement.gaze_point.y if measurement.gaze_point else None,
-            ]
-            csv_writer.writerow(row)
-
-        si.seek(0)
-        return io.BytesIO(si.getvalue().encode("utf-8"))
+        return io.BytesIO(data)
 
     def export_tasklogs_csv(self, subject_id):
         """Export task logs for a subject as CSV."""
@@ -196,6 +954,58 @@ class ExportService:
         if not subject:
             return None
 
+        data = _cached(
+            f"subject-{subject.id}",
+            "tasklogs.csv",
+            subject.data_version,
+            lambda: self._build_tasklogs_csv(subject.id),
+        )
+        return io.BytesIO(data)
+
+    def export_all_points_csv(self, min_quality=None):
+        """
+        Export measurement points for all subjects as CSV.
+
+        Args:
+            min_quality: Only include subjects whose calibration score is at
+                least this (see SubjectService.save_calibration_quality)
+
+        Returns:
+            BytesIO with the CSV, or None if no subject is included
+        """
+        all_subjects = self.subject_repository.get_all_subjects(min_quality)
+
+        if len(all_subjects) == 0:
+            return None
+
+        data = _cached(
+            "all",
+            f"points{_quality_suffix(min_quality)}.csv",
+            self.subject_repository.get_group_version(),
+            lambda: self._build_all_points_csv(all_subjects),
+        )
+        return io.BytesIO(data)
+
+    def _build_points_csv(self, subject_id):
+        """Serialize the points of a subject as CSV bytes."""
+        samples = self.measurement_repository.get_sample_arrays(subject_id)
+
+        si = io.StringIO()
+        csv_writer = csv.writer(si)
+
+        csv_writer.writerow(["date", "x_mouse", "y_mouse", "x_gaze", "y_gaze"])
+        csv_writer.writerows(
+            zip(
+                *_points_columns_text(
+                    samples, ["x_mouse", "y_mouse", "x_gaze", "y_gaze"]
+                )
+            )
+        )
+
+        return si.getvalue().encode("utf-8")
+
+    def _build_tasklogs_csv(self, subject_id):
+        """Serialize the task logs of a subject as CSV bytes."""
         si = io.StringIO()
         csv_writer = csv.writer(si)
 
@@ -211,33 +1021,858 @@ class ExportService:
             ]
             csv_writer.writerow(row)
 
-        si.seek(0)
-        return io.BytesIO(si.getvalue().encode("utf-8"))
+        return si.getvalue().encode("utf-8")
 
-    def export_all_points_csv(self):
-        """Export measurement points for all subjects as CSV."""
-        all_subjects = self.subject_repository.get_all_subjects()
+    def _build_all_points_csv(self, subjects):
+        """Serialize the mouse and gaze points of every subject as CSV bytes."""
+        import numpy as np
 
-        if len(all_subjects) == 0:
+        si = io.StringIO()
+        csv_writer = csv.writer(si)
+        csv_writer.writerow(["id", "x", "y"])
+
+        for subject in subjects:
+            samples = self.measurement_repository.get_sample_arrays(subject.id)
+
+            # Interleave mouse and gaze points of each measurement
+            points = np.stack(
+                [
+                    np.column_stack([samples["x_mouse"], samples["y_mouse"]]),
+                    np.column_stack([samples["x_gaze"], samples["y_gaze"]]),
+                ],
+                axis=1,
+            ).reshape(-1, 2)
+            points = points[~np.isnan(points).any(axis=1)]
+
+            csv_writer.writerows((subject.id, x, y) for x, y in points.tolist())
+
+        return si.getvalue().encode("utf-8")
+
+
+class StudyAnalysisService:
+    """Service class for study-wide analytics over all of a study's subjects."""
+
+    def __init__(self):
+        self.study_repository = StudyRepository()
+        self.subject_repository = SubjectRepository()
+        self.measurement_repository = MeasurementRepository()
+        self.tasklog_repository = TaskLogRepository()
+
+    def has_study(self, study_id):
+        """Whether a study exists."""
+        return self.study_repository.get_by_id(study_id) is not None
+
+    def analyze_study(
+        self,
+        study_id,
+        bins,
+        sources=None,
+        progress=None,
+        min_quality=None,
+        cached_only=False,
+    ):
+        """
+        Compute the aggregate heatmap, fixations and task timings of a study.
+
+        Each subject's samples are read here and summarized in a process
+        pool (``ANALYSIS_WORKERS`` in the app config, one per CPU by
+        default), since binning and fixation detection are CPU bound and
+        subjects are independent. The per-subject summaries are then reduced
+        into study-level results: the canonical heatmaps are added together,
+        so subjects without viewport metadata are left out of the heatmap.
+        Results are cached per study data version.
+
+        Args:
+            study_id: The ID of the study
+            bins: Number of bins per axis of the heatmap
+            sources: Point sources included in the heatmap (default: mouse
+                and gaze)
+            progress: Called with (subjects_done, subjects_total) as subjects
+                are summarized; not called when the result is cached
+            min_quality: Only include subjects whose calibration score is at
+                least this
+            cached_only: Only return a cached result, without computing it
+
+        Returns:
+            JSON bytes with the study results, or None if the study does not
+            exist (or, with cached_only, the result is not cached)
+        """
+        study = self.study_repository.get_by_id(study_id)
+
+        if not study:
             return None
 
-        si = io.StringIO()
-        csv_writer = csv.DictWriter(si, fieldnames=["id", "x", "y"])
-        csv_writer.writeheader()
+        sources = tuple(sources or SAMPLE_SOURCES)
+
+        def build():
+            return self._build_analysis(study.id, bins, sources, progress, min_quality)
+
+        return _cached(
+            f"study-{study.id}",
+            f"analysis-{bins}-{'-'.join(sources)}{_quality_suffix(min_quality)}.json",
+            self.subject_repository.get_group_version(study.id),
+            None if cached_only else build,
+        )
+
+    def _build_analysis(self, study_id, bins, sources, progress, min_quality):
+        """Summarize every subject of a study and reduce the summaries."""
+        import numpy as np
+
+        subjects = self.subject_repository.get_subjects_by_study(study_id, min_quality)
+        summaries = sorted(
+            self._summarize_subjects(subjects, bins, sources, progress),
+            key=lambda summary: summary["subject_id"],
+        )
+
+        heatmaps = [s["heatmap"] for s in summaries if s["heatmap"] is not None]
+        counts = np.sum(heatmaps, axis=0) if heatmaps else np.zeros((bins, bins))
+        edges = np.linspace(0.0, 1.0, bins + 1)
+        durations = np.concatenate(
+            [np.empty(0)] + [s["fixation_durations"] for s in summaries]
+        )
+
+        payload = {
+            "study_id": study_id,
+            "subjects": len(summaries),
+            "min_quality": min_quality,
+            "heatmap": {
+                "space": "canonical",
+                "sources": list(sources),
+                "bins": bins,
+                "subjects": len(heatmaps),
+                **_density_payload(counts.astype(np.int64), edges, edges, 6),
+            },
+            "fixations": {
+                "count": len(durations),
+                "mean_duration_ms": _milliseconds(np.mean, durations),
+                "median_duration_ms": _milliseconds(np.median, durations),
+            },
+            "per_subject": [
+                {
+                    "subject_id": s["subject_id"],
+                    "samples": s["samples"],
+                    "normalized": s["heatmap"] is not None,
+                    "fixations": len(s["fixation_durations"]),
+                    "mean_fixation_ms": _milliseconds(np.mean, s["fixation_durations"]),
+                }
+                for s in summaries
+            ],
+            "tasks": self._task_timings(study_id, min_quality),
+        }
+        return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+    def _summarize_subjects(self, subjects, bins, sources, progress):
+        """
+        Yield the summary of each subject, in completion order.
+
+        Samples are read in this process, which holds the database session,
+        while up to ``ANALYSIS_QUEUED_PER_WORKER`` subjects per worker are
+        queued in the pool.
+        """
+        from analytics import summarize_subject
+
+        total = len(subjects)
+        workers = _analysis_workers()
+        read_sources = tuple(dict.fromkeys(sources + ("gaze",)))
+
+        def arguments(subject):
+            samples = self.measurement_repository.get_sample_arrays(
+                subject.id, sources=read_sources
+            )
+            return (
+                subject.id,
+                samples,
+                subject.canonical_frame,
+                sources,
+                bins,
+                FIXATION_MAX_DISPERSION_PX,
+                FIXATION_MIN_DURATION_S,
+            )
+
+        def report(done):
+            if progress is not None:
+                progress(done, total)
+
+        if workers <= 1 or total <= 1:
+            for done, subject in enumerate(subjects, 1):
+                yield summarize_subject(*arguments(subject))
+                report(done)
+            return
+
+        done = 0
+        with _analysis_pool(min(workers, total)) as executor:
+            pending = set()
+            for subject in subjects:
+                if len(pending) >= workers * ANALYSIS_QUEUED_PER_WORKER:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        done += 1
+                        yield future.result()
+                        report(done)
+                pending.add(executor.submit(summarize_subject, *arguments(subject)))
+
+            for future in as_completed(pending):
+                done += 1
+                yield future.result()
+                report(done)
+
+    def compare_scanpaths(
+        self,
+        study_id,
+        grid=SCANPATH_DEFAULT_GRID,
+        aois=None,
+        method="levenshtein",
+        progress=None,
+        min_quality=None,
+        cached_only=False,
+    ):
+        """
+        Compare the fixation sequences of every pair of subjects of a study.
+
+        Each subject's gaze fixations are mapped into the canonical space and
+        encoded as a string of grid cells, or of AOIs when ``aois`` is given,
+        with repeated symbols collapsed. Every pair of strings is compared by
+        edit distance: with ``levenshtein`` any substitution costs 1, with
+        ``scanmatch`` it grows with the distance between the two cells or
+        AOI centers. Fixation detection and the pair comparisons both run in
+        the analysis process pool. Subjects without viewport metadata have
+        no canonical fixations and are listed as excluded. Results are
+        cached per study data version.
+
+        Args:
+            study_id: The ID of the study
+            grid: Number of cells per axis of the grid encoding (ignored
+                when aois is given)
+            aois: List of {x, y, width, height} areas in canonical units, or
+                None to encode fixations as grid cells
+            method: One of SCANPATH_METHODS
+            progress: Called with (done, total) as subjects are summarized
+                and pairs compared; not called when the result is cached
+            min_quality: Only include subjects whose calibration score is at
+                least this
+            cached_only: Only return a cached result, without computing it
+
+        Returns:
+            JSON bytes with the N x N similarity matrix, or None if the study
+            does not exist (or, with cached_only, the result is not cached)
+
+        Raises:
+            ValueError: If the method or the AOIs are invalid
+        """
+        if method not in SCANPATH_METHODS:
+            raise ValueError(f"Invalid method: {method}")
+        regions = _scanpath_aois(aois) if aois is not None else None
+
+        study = self.study_repository.get_by_id(study_id)
+
+        if not study:
+            return None
+
+        if regions is None:
+            grid = min(max(int(grid), 1), SCANPATH_MAX_GRID)
+            encoding = f"grid{grid}"
+        else:
+            digest = hashlib.sha1(json.dumps(regions).encode("utf-8")).hexdigest()
+            encoding = f"aoi{digest[:16]}"
+
+        def build():
+            return self._build_scanpaths(
+                study.id, grid, regions, method, progress, min_quality
+            )
+
+        return _cached(
+            f"study-{study.id}",
+            f"scanpaths-{encoding}-{method}{_quality_suffix(min_quality)}.json",
+            self.subject_repository.get_group_version(study.id),
+            None if cached_only else build,
+        )
+
+    def _build_scanpaths(self, study_id, grid, regions, method, progress, min_quality):
+        """Encode the fixations of every subject and compare all pairs."""
+        import numpy as np
+        from analytics import (
+            aoi_string,
+            grid_string,
+            grid_substitution,
+            region_substitution,
+        )
+
+        subjects = self.subject_repository.get_subjects_by_study(study_id, min_quality)
+        total = len(subjects)
+
+        # Summaries and pair comparisons each count for half of the progress
+        def report(done, steps, phase):
+            if progress is not None:
+                progress(total * (phase + done / steps), 2 * total)
+
+        summaries = sorted(
+            self._summarize_subjects(
+                subjects, None, ("gaze",), lambda done, steps: report(done, steps, 0)
+            ),
+            key=lambda summary: summary["subject_id"],
+        )
+        compared = [s for s in summaries if s["fixation_x"] is not None]
+
+        if regions is None:
+            sequences = [
+                grid_string(s["fixation_x"], s["fixation_y"], grid) for s in compared
+            ]
+            substitution = grid_substitution(grid)
+        else:
+            sequences = [
+                aoi_string(s["fixation_x"], s["fixation_y"], regions) for s in compared
+            ]
+            centers = np.array([(x + w / 2, y + h / 2) for x, y, w, h in regions])
+            substitution = region_substitution(centers)
+
+        similarity = self._pairwise_similarity(
+            sequences,
+            substitution if method == "scanmatch" else None,
+            lambda done, steps: report(done, steps, 1),
+        )
+        upper = similarity[np.triu_indices(len(sequences), k=1)]
+
+        payload = {
+            "study_id": study_id,
+            "method": method,
+            "min_quality": min_quality,
+            "encoding": (
+                {"grid": grid}
+                if regions is None
+                else {
+                    "aois": [
+                        {"x": x, "y": y, "width": w, "height": h}
+                        for x, y, w, h in regions
+                    ]
+                }
+            ),
+            "subjects": [s["subject_id"] for s in compared],
+            "excluded": [s["subject_id"] for s in summaries if s["fixation_x"] is None],
+            "lengths": [len(sequence) for sequence in sequences],
+            "similarity": np.round(similarity, 4).tolist(),
+            "mean_similarity": round(float(upper.mean()), 4) if len(upper) else None,
+        }
+        return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+    def _pairwise_similarity(self, sequences, substitution, progress):
+        """
+        Get the symmetric similarity matrix of encoded scanpaths.
+
+        The pairs above the diagonal are split into tasks of
+        ``SCANPATH_PAIRS_PER_TASK``, each a vectorized batch of edit
+        distances, which run in the analysis process pool.
+        """
+        import numpy as np
+        from analytics import pairwise_similarity
+
+        count = len(sequences)
+        rows, columns = np.triu_indices(count, k=1)
+        tasks = [
+            (
+                rows[start : start + SCANPATH_PAIRS_PER_TASK],
+                columns[start : start + SCANPATH_PAIRS_PER_TASK],
+            )
+            for start in range(0, len(rows), SCANPATH_PAIRS_PER_TASK)
+        ]
+        workers = _analysis_workers()
+
+        similarity = np.eye(count)
+
+        def store(pairs, values):
+            similarity[pairs] = values
+            similarity[pairs[::-1]] = values
+
+        if workers <= 1 or len(tasks) <= 1:
+            for done, pairs in enumerate(tasks, 1):
+                store(pairs, pairwise_similarity(sequences, substitution, pairs))
+                progress(done, len(tasks))
+            return similarity
+
+        with _analysis_pool(min(workers, len(tasks))) as executor:
+            futures = {
+                executor.submit(
+                    pairwise_similarity, sequences, substitution, pairs
+                ): pairs
+                for pairs in tasks
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                store(futures[future], future.result())
+                progress(done, len(tasks))
+        return similarity
+
+    def _task_timings(self, study_id, min_quality):
+        """Get the number of logs and completion times of each task."""
+        import numpy as np
+
+        rows = self.tasklog_repository.get_task_times_by_study(study_id, min_quality)
+
+        tasks = {}
+        for task, start_time, end_time in rows:
+            entry = tasks.setdefault(task, {"logs": 0, "seconds": []})
+            entry["logs"] += 1
+            if end_time is not None:
+                entry["seconds"].append((end_time - start_time).total_seconds())
+
+        timings = []
+        for task, entry in tasks.items():
+            seconds = np.array(entry["seconds"])
+            timings.append(
+                {
+                    "task": task,
+                    "logs": entry["logs"],
+                    "completed": len(seconds),
+                    "mean_seconds": (
+                        round(float(seconds.mean()), 3) if len(seconds) else None
+                    ),
+                    "median_seconds": (
+                        round(float(np.median(seconds)), 3) if len(seconds) else None
+                    ),
+                }
+            )
+        return timings
+
+
+class JobService:
+    """Service class for background jobs that run long analytics and exports."""
+
+    def __init__(self):
+        self.repository = JobRepository()
+
+    def submit_job(self, kind, params):
+        """
+        Queue a job and hand it to the job runner.
 
-        for subject in all_subjects:
-            points = Point.query.filter_by(subject_id=subject.id).all()
-            points_dict = [point.__json__() for point in points]
+        A queued or running job with the same kind and parameters is reused
+        instead of starting the same work twice.
 
-            subject_id = int(subject.id)
+        Args:
+            kind: One of JOB_KINDS
+            params: Parameters of the task (see the validators of each kind)
 
-            points_np = np.array([[subject_id, p["x"], p["y"]] for p in points_dict])
+        Returns:
+            Dictionary with the status of the job
 
-            for point in points_np:
-                csv_writer.writerow({"id": point[0], "x": point[1], "y": point[2]})
+        Raises:
+            ValueError: If the kind or the parameters are invalid
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Invalid job kind: {kind}")
+        params = JOB_KINDS[kind][0](params or {})
+
+        self._purge_expired()
+
+        job = self.repository.get_active_job(kind, params)
+        if job is None:
+            job = self.repository.create_job(kind, params)
+            self.repository.commit()
+            get_job_runner().submit(
+                current_app._get_current_object(), self.run_job, job.id
+            )
+        return self.get_job_status(job.id)
+
+    def get_job_status(self, job_id):
+        """
+        Get the status of a job.
+
+        Args:
+            job_id: The ID of the job
+
+        Returns:
+            Dictionary with the job's kind, parameters, status, progress
+            (0 to 1) and error, or None if the job does not exist
+        """
+        job = self.repository.get_by_id(job_id)
+        return job.__json__() if job else None
+
+    def get_job_result(self, job_id):
+        """
+        Get the file produced by a job.
+
+        Args:
+            job_id: The ID of the job
+
+        Returns:
+            Tuple (job, path) where path is None until the job succeeds, or
+            None if the job does not exist
+        """
+        job = self.repository.get_by_id(job_id)
+        if not job:
+            return None
+        if job.status != JOB_SUCCEEDED:
+            return job, None
+        return job, _job_result_path(job.id)
+
+    def run_job(self, job_id):
+        """
+        Run a queued job and store its result or error.
+
+        Called by the job runner in a worker thread. Progress is written to
+        the job row as the task reports it.
+
+        Args:
+            job_id: The ID of the job
+        """
+        job = self.repository.get_by_id(job_id)
+        claimed = job is not None and self.repository.claim_job(job_id)
+        self.repository.commit()
+        if not claimed:
+            return
+
+        kind, params = job.kind, json.loads(job.params)
+
+        reported = [0.0]
+
+        def progress(done, total):
+            # One write per percent is enough for polling clients
+            fraction = done / total if total else 1.0
+            if fraction - reported[0] >= 0.01:
+                reported[0] = fraction
+                self.repository.update_job(job_id, progress=fraction)
+                self.repository.commit()
+
+        try:
+            data, name, mimetype = JOB_KINDS[kind][1](params, progress)
+            _write_job_result(job_id, data)
+        except Exception as e:
+            self.repository.rollback()
+            self.repository.update_job(
+                job_id,
+                status=JOB_FAILED,
+                error=str(e) or type(e).__name__,
+                finished_at=datetime.now(),
+            )
+        else:
+            self.repository.update_job(
+                job_id,
+                status=JOB_SUCCEEDED,
+                progress=1.0,
+                result_name=name,
+                result_mimetype=mimetype,
+                finished_at=datetime.now(),
+            )
+        self.repository.commit()
+
+    def recover_jobs(self, started_before=None):
+        """
+        Deal with the jobs of a previous run of the server.
+
+        Jobs still running that were started before this process were
+        interrupted and are marked as failed; jobs started later may belong
+        to another live process and are left alone. Queued jobs are handed
+        to the runner again; a job handed out twice is only run once.
+
+        Args:
+            started_before: Time before which running jobs are interrupted
+                (default: when this process started)
+
+        Returns:
+            Number of jobs queued again
+        """
+        before = started_before or _PROCESS_STARTED_AT
+        for job in self.repository.get_interrupted_jobs(before):
+            self.repository.update_job(
+                job.id,
+                status=JOB_FAILED,
+                error="Interrupted by a server restart",
+                finished_at=datetime.now(),
+            )
+        self.repository.commit()
+
+        queued = self.repository.get_jobs_by_status(JOB_QUEUED)
+        for job in queued:
+            get_job_runner().submit(
+                current_app._get_current_object(), self.run_job, job.id
+            )
+        return len(queued)
+
+    def _purge_expired(self):
+        """Delete finished jobs older than JOB_RETENTION_HOURS and their files."""
+        before = datetime.now() - timedelta(hours=JOB_RETENTION_HOURS)
+        expired = self.repository.get_finished_before(before)
+        for job in expired:
+            path = _job_result_path(job.id)
+            if os.path.exists(path):
+                os.remove(path)
+            self.repository.delete(job)
+        if expired:
+            self.repository.commit()
+
+
+def init_job_recovery(app):
+    """
+    Recover the jobs of a previous run when the process serves its first request.
+
+    Recovery then runs once in every process that serves the app, whether
+    it is started with ``app.run``, with or without the reloader, or by a
+    WSGI server, and the database tables exist by then. The reloader's
+    watcher process never serves requests, so it does not recover jobs.
+
+    Args:
+        app: The Flask app
+    """
+    lock = threading.Lock()
+    pending = [True]
+
+    @app.before_request
+    def recover_jobs():
+        if not pending:
+            return
+        with lock:
+            if not pending:
+                return
+            pending.clear()
+            JobService().recover_jobs()
+
+
+def _job_result_path(job_id):
+    """Path of the file holding the result of a job."""
+    directory = current_app.config.get("JOB_RESULTS_DIR") or os.path.join(
+        current_app.instance_path, "jobs"
+    )
+    return os.path.join(directory, job_id)
+
+
+def _write_job_result(job_id, data):
+    """Write the result of a job, atomically so downloads never see a partial file."""
+    path = _job_result_path(job_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+def _job_int(params, name, default=None):
+    """Get an integer job parameter."""
+    value = params.get(name, default)
+    if value is None:
+        raise ValueError(f"Missing parameter: {name}")
+    if isinstance(value, bool) or int(value) != value:
+        raise ValueError(f"Invalid {name}: {value}")
+    return int(value)
+
+
+def _job_sources(params):
+    """Get the point sources of a job, as a list or a comma separated string."""
+    value = params.get("fields") or list(SAMPLE_SOURCES)
+    if isinstance(value, str):
+        value = value.split(",")
+    sources = list(dict.fromkeys(str(source).strip() for source in value))
+    if not sources or any(source not in SAMPLE_SOURCES for source in sources):
+        raise ValueError(f"Invalid fields: {value}")
+    return sources
+
+
+def _job_bins(params):
+    """Get the heatmap resolution of a job, within the allowed range."""
+    return min(max(_job_int(params, "bins", HEATMAP_DEFAULT_BINS), 1), HEATMAP_MAX_BINS)
+
+
+def _job_quality(params, validated):
+    """Add the optional calibration quality filter of a job to its parameters."""
+    if params.get("min_quality") is not None:
+        validated["min_quality"] = parse_min_quality(params["min_quality"])
+    return validated
+
+
+def _validate_study_analysis(params):
+    return _job_quality(
+        params,
+        {
+            "study": _job_int(params, "study"),
+            "bins": _job_bins(params),
+            "fields": _job_sources(params),
+        },
+    )
+
+
+def _run_study_analysis(params, progress):
+    data = StudyAnalysisService().analyze_study(
+        params["study"],
+        params["bins"],
+        params["fields"],
+        progress,
+        params.get("min_quality"),
+    )
+    if data is None:
+        raise LookupError("Study not found")
+    return data, f"study_{params['study']}_analysis.json", "application/json"
+
+
+def _validate_scanpath_similarity(params):
+    method = params.get("method", "levenshtein")
+    if method not in SCANPATH_METHODS:
+        raise ValueError(f"Invalid method: {method}")
+    validated = {
+        "study": _job_int(params, "study"),
+        "grid": min(
+            max(_job_int(params, "grid", SCANPATH_DEFAULT_GRID), 1), SCANPATH_MAX_GRID
+        ),
+        "method": method,
+    }
+    if params.get("aois") is not None:
+        validated["aois"] = [
+            {"x": x, "y": y, "width": w, "height": h}
+            for x, y, w, h in _scanpath_aois(params["aois"])
+        ]
+    return _job_quality(params, validated)
+
+
+def _run_scanpath_similarity(params, progress):
+    data = StudyAnalysisService().compare_scanpaths(
+        params["study"],
+        params["grid"],
+        params.get("aois"),
+        params["method"],
+        progress,
+        params.get("min_quality"),
+    )
+    if data is None:
+        raise LookupError("Study not found")
+    return data, f"study_{params['study']}_scanpaths.json", "application/json"
+
+
+def _validate_user_heatmap(params):
+    space = params.get("space", "screen")
+    if space not in COORDINATE_SPACES:
+        raise ValueError(f"Invalid space: {space}")
+    return {
+        "subject": _job_int(params, "subject"),
+        "bins": _job_bins(params),
+        "fields": _job_sources(params),
+        "space": space,
+    }
+
+
+def _run_user_heatmap(params, progress):
+    data = MeasurementService().get_user_heatmap(
+        params["subject"], params["bins"], params["fields"], params["space"]
+    )
+    if data is None:
+        raise LookupError("Subject not found")
+    return data, f"heatmap_{params['subject']}.json", "application/json"
+
+
+def _validate_subject(params):
+    return {"subject": _job_int(params, "subject")}
+
+
+def _run_points_csv(params, progress):
+    data = ExportService().export_points_csv(params["subject"])
+    if data is None:
+        raise LookupError("Subject not found")
+    return data.getvalue(), f"points_{params['subject']}.csv", "text/csv"
+
+
+def _run_tasklogs_csv(params, progress):
+    data = ExportService().export_tasklogs_csv(params["subject"])
+    if data is None:
+        raise LookupError("Subject not found")
+    return data.getvalue(), f"tasklogs_{params['subject']}.csv", "text/csv"
+
+
+def _run_all_points_csv(params, progress):
+    data = ExportService().export_all_points_csv(params.get("min_quality"))
+    if data is None:
+        raise LookupError("No registered subjects")
+    return data.getvalue(), "points_all.csv", "text/csv"
+
+
+# Kinds of background jobs: (validate, run). validate checks and normalizes
+# the parameters when the job is submitted; run gets them with a progress
+# callback and returns (data, download_name, mimetype).
+JOB_KINDS = {
+    "study-analysis": (_validate_study_analysis, _run_study_analysis),
+    "scanpath-similarity": (_validate_scanpath_similarity, _run_scanpath_similarity),
+    "user-heatmap": (_validate_user_heatmap, _run_user_heatmap),
+    "points-csv": (_validate_subject, _run_points_csv),
+    "tasklogs-csv": (_validate_subject, _run_tasklogs_csv),
+    "all-points-csv": (lambda params: _job_quality(params, {}), _run_all_points_csv),
+}
+
+
+def _analysis_workers():
+    """Get the number of analysis worker processes (one per CPU by default)."""
+    return current_app.config.get("ANALYSIS_WORKERS") or os.cpu_count() or 1
+
+
+def _analysis_pool(workers):
+    """
+    Start a pool of analysis worker processes.
+
+    Analyses run in job threads of a multi-threaded server, and forking such
+    a process can deadlock on locks other threads hold, so the workers are
+    started from a fork server with the analytics module preloaded (or
+    spawned where fork servers are not available).
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["analytics"])
+    else:
+        context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
+def _scanpath_aois(aois):
+    """
+    Check AOIs given as {x, y, width, height} in canonical units.
+
+    Returns:
+        List of [x, y, width, height] lists of floats
+
+    Raises:
+        ValueError: If the AOIs are not a non-empty list of areas with a
+            positive size
+    """
+    if not isinstance(aois, list) or not aois:
+        raise ValueError("Invalid aois: expected a non-empty list")
+
+    regions = []
+    for aoi in aois:
+        try:
+            region = [float(aoi[key]) for key in ("x", "y", "width", "height")]
+        except (TypeError, KeyError, ValueError):
+            raise ValueError(f"Invalid AOI: {aoi}") from None
+        if not all(math.isfinite(v) for v in region) or min(region[2:]) <= 0:
+            raise ValueError(f"Invalid AOI: {aoi}")
+        regions.append(region)
+    return regions
+
+
+def _quality_suffix(min_quality):
+    """Part of a cached artifact name for a calibration quality filter."""
+    return "" if min_quality is None else f"-q{min_quality:g}"
 
-        si.seek(0)
-        return io.BytesIO(si.getvalue().encode("utf-8"))
+
+def _milliseconds(statistic, seconds):
+    """Get a statistic of durations in seconds as whole milliseconds."""
+    return round(float(statistic(seconds)) * 1000) if len(seconds) else None
+
+
+def _cached(scope, fmt, version, build):
+    """
+    Build an artifact through the result cache when it is enabled.
+
+    With ``build`` set to None only a cached artifact is returned, and None
+    when there is none.
+    """
+    cache = get_result_cache()
+    if build is None:
+        return cache.get(scope, fmt, version) if cache is not None else None
+    if cache is None:
+        return build()
+    return cache.get_or_create(scope, fmt, version, build)
+
+
+def _points_columns_text(samples, names):
+    """Get the date and coordinate columns as lists ready for CSV writing."""
+    import numpy as np
+
+    dates = np.char.replace(np.datetime_as_string(samples["date"], unit="s"), "T", " ")
+    columns = [dates.tolist()]
+    for name in names:
+        columns.append([None if v != v else v for v in samples[name].tolist()])
+    return columns
 
 
 class UserService:
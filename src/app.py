@@ -18,13 +18,14 @@ from flask_login import (
     login_required,
     current_user,
 )
-from flasgger import Swagger
 from db import DatabaseConfig, DatabaseManager, db, Subject, Measurement, User
 from api.routes import api_bp
+from api.services import init_job_recovery
+from api.http_cache import subject_validators
+from api.docs import LazySwagger
 from state import ConfigManager
 from repositories import (
     SubjectRepository,
-    MeasurementRepository,
     StudyRepository,
     UserRepository,
 )
@@ -33,6 +34,8 @@ from datetime import datetime
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+SUBJECTS_PER_PAGE = 50
+
 config_manager = ConfigManager()
 config_manager.load_config()
 
@@ -41,13 +44,45 @@ app = Flask(__name__, template_folder="app/templates", static_folder="app/static
 # Secret key for sessions (change this to a random secret in production!)
 app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "dev-secret-key-change-in-production")
 
+# Storage directories can be moved with environment variables of the same
+# name; an empty value disables the cache, cold storage or sample store.
+
+# On-disk cache for generated exports, keyed by data version so new data is
+# never served stale; old versions are evicted least recently used first
+app.config["RESULT_CACHE_DIR"] = os.environ.get(
+    "RESULT_CACHE_DIR", os.path.join(basedir, "instance", "cache")
+)
+
+# Columnar files of finished sessions (see scripts/compact_sessions.py)
+app.config["COLD_STORAGE_DIR"] = os.environ.get(
+    "COLD_STORAGE_DIR", os.path.join(basedir, "instance", "cold")
+)
+
+# Append-only memory-mapped copy of every subject's samples for fast reads
+app.config["SAMPLE_STORE_DIR"] = os.environ.get(
+    "SAMPLE_STORE_DIR", os.path.join(basedir, "instance", "samples")
+)
+
+# Worker processes for study-wide analysis (0: one per CPU)
+app.config["ANALYSIS_WORKERS"] = int(os.environ.get("ANALYSIS_WORKERS") or 0)
+
+# Background jobs (/api/jobs): worker threads and where results are kept
+# (jobs always need a results directory; an empty value uses the default)
+app.config["JOB_WORKERS"] = int(os.environ.get("JOB_WORKERS", 2))
+app.config["JOB_RESULTS_DIR"] = os.environ.get("JOB_RESULTS_DIR") or os.path.join(
+    basedir, "instance", "jobs"
+)
+
+# Optional per-study SQLite files for samples (SAMPLE_SHARDING=1)
+app.config["SAMPLE_SHARDING"] = os.environ.get("SAMPLE_SHARDING") == "1"
+app.config["SAMPLE_SHARD_DIR"] = os.path.join(basedir, "instance", "shards")
+
 db_config = DatabaseConfig(basedir)
 db_config.configure_app(app)
 
 db_manager = DatabaseManager(app)
 
 subject_repository = SubjectRepository()
-measurement_repository = MeasurementRepository()
 study_repository = StudyRepository()
 user_repository = UserRepository()
 
@@ -61,11 +96,14 @@ login_manager.login_message = "Por favor inicia sesión para acceder a esta pág
 @login_manager.user_loader
 def load_user(user_id):
     """Load user by ID for Flask-Login."""
-    return user_repository.get_by_id(int(user_id))
+    return user_repository.get_cached_by_id(int(user_id))
 
 
 app.register_blueprint(api_bp)
 
+# Resume the jobs queued before the last shutdown, in every serving process
+init_job_recovery(app)
+
 swagger_config = {
     "headers": [],
     "specs": [
@@ -101,7 +139,8 @@ swagger_template = {
     ],
 }
 
-swagger = Swagger(app, config=swagger_config, template=swagger_template)
+# flasgger is imported and the spec built on the first /apidocs/ request
+swagger = LazySwagger(app, config=swagger_config, template=swagger_template)
 
 
 @app.route("/login", methods=["GET", "POST"])
@@ -254,32 +293,76 @@ def estudios():
 @login_required
 def sujetos():
     """
-    Shows the list of registered subjects in the database.
+    Shows the list of registered subjects in the database, grouped by study.
     ---
+    parameters:
+        - name: study
+          in: query
+          type: string
+          required: false
+          description: Study ID to show, or "none" for subjects without a study.
+        - name: page
+          in: query
+          type: integer
+          required: false
+          description: Page of the subject list.
     responses:
         200:
             description: Page with the list of registered subjects.
     """
-    # Get all studies with their subjects
-    studies = study_repository.get_all_studies()
+    studies = study_repository.get_studies_with_subject_counts()
+    studies_data = [
+        {"study": study, "subject_count": count} for study, count in studies
+    ]
+    subjects_without_study = subject_repository.count_subjects_by_study(None)
+
+    # Tabs are shown oldest first; the first tab is selected by default
+    study_arg = request.args.get("study")
+    if study_arg == "none" or (study_arg is None and not studies_data):
+        active_study = None
+    elif study_arg is None:
+        active_study = studies_data[-1]["study"]
+    else:
+        active_study = next(
+            (d["study"] for d in studies_data if str(d["study"].id) == study_arg),
+            None,
+        )
+        if active_study is None:
+            return "Study not found", 404
+
+    active_study_id = active_study.id if active_study else None
+    total = (
+        next(d["subject_count"] for d in studies_data if d["study"] is active_study)
+        if active_study
+        else subjects_without_study
+    )
 
-    # Group subjects by study
-    studies_data = []
-    for study in studies:
-        studies_data.append({"study": study, "subjects": study.subjects})
+    per_page = SUBJECTS_PER_PAGE
+    pages = max(1, -(-total // per_page))
+    page = min(max(request.args.get("page", 1, type=int), 1), pages)
 
-    # Also get subjects without a study
-    subjects_without_study = Subject.query.filter_by(study_id=None).all()
+    subjects = [
+        {"subject": subject, "sample_count": count, "last_activity": last_activity}
+        for subject, count, last_activity in subject_repository.get_subject_summaries(
+            active_study_id, page, per_page
+        )
+    ]
 
     return render_template(
         "sujetos.html",
         studies_data=studies_data,
         subjects_without_study=subjects_without_study,
+        active_study=active_study,
+        subjects=subjects,
+        total=total,
+        page=page,
+        pages=pages,
     )
 
 
 @app.route("/resultados")
 @login_required
+@subject_validators
 def resultados():
     """
     Shows the results of registered points for a specific subject and allows download.
@@ -292,7 +375,8 @@ def resultados():
           description: Subject ID to show results.
     responses:
         200:
-            description: Page with the registered points results.
+            description: Page with the subject's results; the heatmap data
+                is loaded from /api/get-user-heatmap.
         404:
             description: Subject not found.
     """
@@ -301,22 +385,8 @@ def resultados():
     subject = subject_repository.get_subject_by_id(subject_id)
 
     if subject:
-        measurements = measurement_repository.get_measurements_by_subject(
-            subject_id=subject_id
-        )
-
-        points = []
-        for measurement in measurements:
-            if measurement.mouse_point:
-                points.append(
-                    {"x": measurement.mouse_point.x, "y": measurement.mouse_point.y}
-                )
-            if measurement.gaze_point:
-                points.append(
-                    {"x": measurement.gaze_point.x, "y": measurement.gaze_point.y}
-                )
-
-        return render_template("resultados.html", sujeto=subject, puntos=points)
+        # The heatmap is loaded by the page from /api/get-user-heatmap
+        return render_template("resultados.html", sujeto=subject)
 
     return "Subject not found", 404
 
@@ -12,12 +12,23 @@ class GazeTracker {
     this.calibrationPoints = {};
     this.calibrated = false;
 
-    // Data collection
-    this.points = [];
+    // Calibration validation: the center of the clicked target and the gaze
+    // predicted just before the click, as parallel arrays
+    // (see getValidationSamples)
+    this.lastPrediction = null;
+    this.validation = this.emptyValidation();
+
+    // Data collection: interleaved samples (see samplePacking.js), handed
+    // to onPointsBatchReady and replaced by a new buffer on every batch
+    this.samples = null;
+    this.sampleCount = 0;
     this.mousePosition = { x: 0, y: 0 };
+    this.taskBar = null;
 
-    // Configuration
+    // Configuration, updated from the server's responses (setBatchPolicy)
     this.batchSize = 20; // Number of points to collect before sending
+    this.flushIntervalMs = 1000; // Maximum time between sends
+    this.batchStartedAt = null;
 
     // Callbacks
     this.onCalibrationComplete = null;
@@ -116,45 +127,60 @@ class GazeTracker {
         return;
       }
       webgazer.util.bound(data);
+      this.lastPrediction = { x: data.x, y: data.y };
 
-      const taskBar = document.getElementById("task-bar");
-
-      if (this.calibrated && taskBar && taskBar.style.display !== "block") {
-        const xprediction = data.x;
-        const yprediction = data.y;
-
-        // Add the current timestamp to each point
-        const currentTimestamp = new Date().toLocaleString("en-US", {
-          timeZone: "America/Argentina/Buenos_Aires",
-        });
-
-        this.points.push({
-          date: currentTimestamp,
-          gaze: {
-            x: xprediction,
-            y: yprediction,
-          },
-          mouse: {
-            x: this.mousePosition.x,
-            y: this.mousePosition.y,
-          },
-        });
-
-        // Send points in batches
-        if (this.points.length >= this.batchSize) {
-          console.log("Batch ready, sending points...");
-          console.log(this.points);
-          
-          if (this.onPointsBatchReady) {
-            this.onPointsBatchReady([...this.points]);
-          }
-          
-          this.points = [];
-        }
+      if (this.taskBar === null) {
+        this.taskBar = document.getElementById("task-bar");
+      }
+
+      const taskBarOpen = this.taskBar && this.taskBar.style.display === "block";
+      if (this.calibrated && !taskBarOpen) {
+        this.pushSample(Date.now(), data.x, data.y);
       }
     });
   }
 
+  /**
+   * Append one sample to the buffer and hand the batch over when it is full
+   * or has waited long enough. Runs for every gaze prediction, so it only
+   * writes numbers; packing and upload happen in the sample worker.
+   */
+  pushSample(timestamp, gazeX, gazeY) {
+    const stride = SAMPLE_FIELDS.length;
+
+    if (this.sampleCount === 0) {
+      this.batchStartedAt = timestamp;
+    }
+    const capacity = this.samples === null ? 0 : this.samples.length / stride;
+    if (this.sampleCount >= capacity) {
+      this.growBuffer();
+    }
+
+    const offset = this.sampleCount * stride;
+    this.samples[offset] = timestamp;
+    this.samples[offset + 1] = gazeX;
+    this.samples[offset + 2] = gazeY;
+    this.samples[offset + 3] = this.mousePosition.x;
+    this.samples[offset + 4] = this.mousePosition.y;
+    this.sampleCount++;
+
+    if (
+      this.sampleCount >= this.batchSize ||
+      timestamp - this.batchStartedAt >= this.flushIntervalMs
+    ) {
+      this.flush();
+    }
+  }
+
+  growBuffer() {
+    const capacity = Math.max(this.batchSize, 2 * this.sampleCount);
+    const samples = new Float64Array(capacity * SAMPLE_FIELDS.length);
+    if (this.samples !== null) {
+      samples.set(this.samples);
+    }
+    this.samples = samples;
+  }
+
   /**
    * Set up mouse position tracking
    */
@@ -232,6 +258,13 @@ class GazeTracker {
   handleCalibrationClick(node) {
     const id = node.id;
 
+    // Once a point has trained the model, each click is also a validation
+    // sample: the subject is looking at the target and the prediction was
+    // made before WebGazer learns from this click
+    if (this.pointCalibrate > 0) {
+      this.recordValidationSample(node);
+    }
+
     if (!this.calibrationPoints[id]) {
       this.calibrationPoints[id] = 0;
     }
@@ -274,6 +307,35 @@ class GazeTracker {
     }
   }
 
+  /**
+   * Record the latest gaze prediction against the center of a target
+   */
+  recordValidationSample(node) {
+    const rect = node.getBoundingClientRect();
+    const prediction = this.lastPrediction;
+
+    this.validation.x_target.push(rect.left + rect.width / 2);
+    this.validation.y_target.push(rect.top + rect.height / 2);
+    this.validation.x_gaze.push(prediction ? prediction.x : null);
+    this.validation.y_gaze.push(prediction ? prediction.y : null);
+  }
+
+  /**
+   * Empty validation sample arrays
+   */
+  emptyValidation() {
+    return { x_target: [], y_target: [], x_gaze: [], y_gaze: [] };
+  }
+
+  /**
+   * Get the validation samples of the calibration, for
+   * /api/save-calibration-quality
+   * @returns {Object} Arrays x_target, y_target, x_gaze and y_gaze
+   */
+  getValidationSamples() {
+    return this.validation;
+  }
+
   /**
    * Restart the calibration process
    */
@@ -292,6 +354,7 @@ class GazeTracker {
     this.calibrationPoints = {};
     this.pointCalibrate = 0;
     this.calibrated = false;
+    this.validation = this.emptyValidation();
     
     // Reset calibration points UI
     document.querySelectorAll(".Calibration").forEach((i) => {
@@ -328,6 +391,40 @@ class GazeTracker {
     return this.calibrated;
   }
 
+  /**
+   * Adopt the batching recommended by the server
+   * @param {Object} policy - Response with batch_size and flush_interval_ms
+   */
+  setBatchPolicy(policy) {
+    if (Number.isInteger(policy.batch_size) && policy.batch_size > 0) {
+      this.batchSize = policy.batch_size;
+    }
+    if (Number.isFinite(policy.flush_interval_ms) && policy.flush_interval_ms > 0) {
+      this.flushIntervalMs = policy.flush_interval_ms;
+    }
+  }
+
+  /**
+   * Hand the samples collected so far to the batch callback
+   */
+  flush() {
+    const batch = this.takeSamples();
+    if (batch.count > 0 && this.onPointsBatchReady) {
+      this.onPointsBatchReady(batch.values, batch.count);
+    }
+  }
+
+  /**
+   * Take the samples collected so far, leaving an empty buffer
+   * @returns {{values: Float64Array, count: number}}
+   */
+  takeSamples() {
+    const batch = { values: this.samples, count: this.sampleCount };
+    this.samples = null;
+    this.sampleCount = 0;
+    return batch;
+  }
+
   /**
    * Clean up and end tracking
    */
@@ -345,7 +442,8 @@ class GazeTracker {
   }
 
   /**
-   * Set callback for when a batch of points is ready
+   * Set callback for when a batch of points is ready. It receives the
+   * interleaved samples and their count, and takes ownership of the buffer.
    */
   setOnPointsBatchReady(callback) {
     this.onPointsBatchReady = callback;
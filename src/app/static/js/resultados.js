@@ -29,12 +29,33 @@ document.getElementById('btn-descarga').addEventListener('click', function() {
   descargarArchivo();
 });
 
+/**
+ * Carga la densidad de puntos agrupada en celdas desde la API.
+ *
+ * Se pide en el espacio canónico (fracciones del prototipo), que no depende
+ * de la pantalla del participante; las sesiones sin metadatos de viewport
+ * responden 400 y se usan sus coordenadas de pantalla.
+ */
+function cargarMapaDeCalor() {
+  const pedir = (space) =>
+    fetch(`/api/get-user-heatmap?id=${id}&space=${space}`);
+
+  return pedir("canonical")
+    .then((response) => (response.status === 400 ? pedir("screen") : response))
+    .then((response) => {
+      if (!response.ok) {
+        throw new Error(`Error ${response.status} al cargar el mapa de calor`);
+      }
+      return response.json();
+    });
+}
+
 /**
  * Inicialización del mapa de calor al cargar la página
  */
 window.onload = function() {
-  // Los puntos se pasan desde el template
-  var puntosOriginales = window.puntosData;
+  // La configuración y la densidad de puntos se cargan en paralelo
+  const densidad = cargarMapaDeCalor();
 
   fetch("/api/config")
     .then((response) => response.json())
@@ -66,33 +87,34 @@ window.onload = function() {
         imgElement.style.display = "block";
       }
 
-      // Normalizar puntos para el mapa de calor
-      var puntos = puntosOriginales.map(punto => ({
-        x: punto.x + Math.abs(Math.min(0, punto.x)),
-        y: punto.y + Math.abs(Math.min(0, punto.y))
-      }));
+      return densidad.then((heatmap) => {
+        const container = document.querySelector('.heatmap');
 
-      var data = {
-        max: 10,
-        min: 0,
-        data: puntos.map(punto => ({
-          x: parseFloat(punto.x),
-          y: parseFloat(punto.y),
-          value: 5
-        }))
-      };
+        // Las coordenadas canónicas se escalan al tamaño actual del contenedor
+        const scaleX = heatmap.space === "canonical" ? container.clientWidth : 1;
+        const scaleY = heatmap.space === "canonical" ? container.clientHeight : 1;
 
-      console.log('Puntos:', puntos);
-      console.log('Configurando heatmap con los siguientes datos:', data);
+        // Cada celda no vacía se dibuja en su centro con su cantidad de puntos
+        const cells = heatmap.cells;
+        var data = {
+          max: heatmap.max,
+          min: 0,
+          data: cells.count.map((count, i) => ({
+            x: Math.round(cells.x[i] * scaleX),
+            y: Math.round(cells.y[i] * scaleY),
+            value: count
+          }))
+        };
 
-      // Crear instancia del mapa de calor
-      var heatmapInstance = h337.create({
-        container: document.querySelector('.heatmap')
+        // Crear instancia del mapa de calor
+        var heatmapInstance = h337.create({
+          container: container
+        });
+        heatmapInstance.setData(data);
+        heatmapInstance.repaint();
       });
-      heatmapInstance.setData(data);
-      heatmapInstance.repaint();
     })
     .catch((error) =>
-      console.error("Error al cargar la configuración desde /api/config:", error)
+      console.error("Error al cargar el mapa de calor:", error)
     );
 };
@@ -1,15 +1,43 @@
-function descargarArchivo() {
-    window.location.href = '/api/download-all';
-}
+// Intervalo entre consultas del estado de la exportación (milisegundos)
+const JOB_POLL_INTERVAL_MS = 1000;
+
+/**
+ * Exporta los puntos de todos los sujetos en segundo plano (/api/jobs) y
+ * descarga el archivo cuando está listo, sin bloquear al servidor mientras
+ * se genera. Si se indica una calibración mínima, se omiten las sesiones
+ * con menor puntaje (o sin medir).
+ */
+async function descargarArchivo() {
+    const boton = document.getElementById('btn-descarga');
+    const texto = boton.innerHTML;
+    const minima = document.getElementById('calidad-minima').value;
+    const params = minima === '' ? {} : { min_quality: Number(minima) / 100 };
+    boton.disabled = true;
+
+    try {
+        let response = await fetch('/api/jobs', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ kind: 'all-points-csv', params })
+        });
+        let job = await response.json();
 
-// Activate the correct tab if there's a hash in the URL
-document.addEventListener('DOMContentLoaded', function () {
-    if (window.location.hash) {
-        const hash = window.location.hash;
-        const tabButton = document.querySelector(`button[data-bs-target="${hash}"]`);
-        if (tabButton) {
-            const tab = new bootstrap.Tab(tabButton);
-            tab.show();
+        while (job.status === 'queued' || job.status === 'running') {
+            boton.textContent = `Generando... ${Math.round(job.progress * 100)}%`;
+            await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+            response = await fetch(job.status_url);
+            job = await response.json();
         }
+
+        if (job.status !== 'succeeded') {
+            throw new Error(job.error || job.message || 'La exportación falló');
+        }
+        window.location.href = job.download_url;
+    } catch (error) {
+        console.error('Error al exportar los puntos:', error);
+        alert(`No se pudo generar el archivo: ${error.message}`);
+    } finally {
+        boton.innerHTML = texto;
+        boton.disabled = false;
     }
-});
\ No newline at end of file
+}
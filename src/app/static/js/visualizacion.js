@@ -3,6 +3,122 @@ function getSujetoIdFromUrl() {
     return params.get("id");
 }
 
+// Cantidad máxima de muestras que se solicitan al servidor por trayectoria
+const REPLAY_FRAMES = 500;
+// Duración de cada cuadro de la animación en milisegundos
+const FRAME_DURATION_MS = 100;
+// Tamaño de pantalla usado cuando la sesión no registró su viewport
+const DEFAULT_VIEWPORT = { width: 1920, height: 1080 };
+
+const players = {};
+
+/**
+ * Reproduce una trayectoria agregando un punto por cuadro al gráfico,
+ * sin precalcular los cuadros de la animación.
+ */
+class ReplayPlayer {
+    constructor(plotId, track, color, title, viewport = DEFAULT_VIEWPORT) {
+        this.plotId = plotId;
+        this.viewport = viewport;
+        this.track = track;
+        this.color = color;
+        this.title = title;
+        this.index = 0;
+        this.timer = null;
+
+        const prefix = plotId.replace("-plot", "");
+        this.slider = document.getElementById(`${prefix}-slider`);
+        this.label = document.getElementById(`${prefix}-time`);
+        this.playButton = document.getElementById(`${prefix}-play`);
+        this.pauseButton = document.getElementById(`${prefix}-pause`);
+    }
+
+    get length() {
+        return this.track.x.length;
+    }
+
+    render() {
+        const layout = {
+            title: {
+                text: this.title,
+                font: { size: 18 },
+                x: 0.5,
+                xanchor: 'center'
+            },
+            xaxis: { range: [0, this.viewport.width], title: "X", fixedrange: true },
+            yaxis: {
+                range: [this.viewport.height, 0],
+                title: "Y",
+                scaleanchor: "x",
+                fixedrange: true
+            },
+            width: 700,
+            height: 500
+        };
+
+        this.slider.max = this.length - 1;
+        this.slider.value = 0;
+        this.slider.addEventListener("input", () => {
+            this.pause();
+            this.seek(parseInt(this.slider.value, 10));
+        });
+        this.playButton.addEventListener("click", () => this.play());
+        this.pauseButton.addEventListener("click", () => this.pause());
+
+        this.updateLabel();
+        return Plotly.newPlot(this.plotId, [{
+            x: [this.track.x[0]],
+            y: [this.track.y[0]],
+            mode: "markers+lines",
+            marker: { size: 6, color: this.color }
+        }], layout);
+    }
+
+    step() {
+        if (this.index >= this.length - 1) {
+            this.pause();
+            return;
+        }
+        this.index++;
+        Plotly.extendTraces(this.plotId, {
+            x: [[this.track.x[this.index]]],
+            y: [[this.track.y[this.index]]]
+        }, [0]);
+        this.slider.value = this.index;
+        this.updateLabel();
+    }
+
+    play() {
+        if (this.timer) {
+            return;
+        }
+        if (this.index >= this.length - 1) {
+            this.seek(0);
+        }
+        this.timer = setInterval(() => this.step(), FRAME_DURATION_MS);
+    }
+
+    pause() {
+        clearInterval(this.timer);
+        this.timer = null;
+    }
+
+    seek(index) {
+        this.index = Math.max(0, Math.min(index, this.length - 1));
+        this.slider.value = this.index;
+        this.updateLabel();
+        return Plotly.restyle(this.plotId, {
+            x: [this.track.x.slice(0, this.index + 1)],
+            y: [this.track.y.slice(0, this.index + 1)]
+        }, [0]);
+    }
+
+    updateLabel() {
+        const seconds = this.track.t[this.index] || 0;
+        this.label.textContent = `${seconds.toFixed(1)} s`;
+    }
+}
+
 async function cargarDatos() {
     try {
         const sujetoId = getSujetoIdFromUrl();
@@ -11,154 +127,42 @@ async function cargarDatos() {
             return;
         }
 
-        const response = await fetch(`/api/get-user-points?id=${sujetoId}`);
+        const response = await fetch(
+            `/api/get-user-replay?id=${sujetoId}&frames=${REPLAY_FRAMES}`
+        );
         if (!response.ok) {
             throw new Error("Error al obtener datos del API");
         }
         const data = await response.json();
 
-        console.log("Datos recibidos:", data);
+        console.log(
+            `Trayectorias recibidas: ${data.mouse.x.length} (mouse), ` +
+            `${data.gaze.x.length} (mirada) de ${data.total_samples} muestras`
+        );
 
-        if (!data.points || data.points.length === 0) {
+        if (data.total_samples === 0) {
             console.warn("No se encontraron puntos para este sujeto");
             return;
         }
 
-        // === Animación Mouse ===
-        let mouseFrames = data.points.map((p, i) => ({
-            name: i.toString(),
-            data: [{
-                x: data.points.slice(0, i + 1).map(q => q.x_mouse),
-                y: data.points.slice(0, i + 1).map(q => q.y_mouse),
-                mode: "markers+lines",
-                marker: { size: 6, color: "blue" }
-            }]
-        }));
-
-        let mouseLayout = {
-            title: {
-                text: `Movimiento del Mouse (Sujeto ${sujetoId})`,
-                font: { size: 18 },
-                x: 0.5,
-                xanchor: 'center'
-            },
-            xaxis: { range: [0, 1920], title: "X", fixedrange: true },
-            yaxis: { range: [1080, 0], title: "Y", scaleanchor: "x", fixedrange: true },
-            width: 700,
-            height: 500,
-            updatemenus: [{
-                type: "buttons",
-                showactive: false,
-                buttons: [
-                    {
-                        label: "▶️ Play",
-                        method: "animate",
-                        args: [null, {
-                            fromcurrent: true,
-                            frame: { duration: 200, redraw: true },
-                            transition: { duration: 100 }
-                        }]
-                    },
-                    {
-                        label: "⏸ Pause",
-                        method: "animate",
-                        args: [[null], {
-                            mode: "immediate",
-                            frame: { duration: 0 },
-                            transition: { duration: 0 }
-                        }]
-                    }
-                ]
-            }],
-            sliders: [{
-                steps: mouseFrames.map(f => ({
-                    label: f.name,
-                    method: "animate",
-                    args: [[f.name], {
-                        mode: "immediate",
-                        frame: { duration: 0, redraw: true },
-                        transition: { duration: 0 }
-                    }]
-                }))
-            }]
-        };
+        // Los ejes usan el viewport registrado al calibrar
+        const viewport = data.viewport || DEFAULT_VIEWPORT;
 
-        Plotly.newPlot("mouse-plot", [{
-            x: [data.points[0].x_mouse],
-            y: [data.points[0].y_mouse],
-            mode: "markers+lines",
-            marker: { size: 6, color: "blue" }
-        }], mouseLayout).then(() => {
-            Plotly.addFrames("mouse-plot", mouseFrames);
-        });
-
-        // === Animación Gaze ===
-        let gazeFrames = data.points.map((p, i) => ({
-            name: i.toString(),
-            data: [{
-                x: data.points.slice(0, i + 1).map(q => q.x_gaze),
-                y: data.points.slice(0, i + 1).map(q => q.y_gaze),
-                mode: "markers+lines",
-                marker: { size: 6, color: "red" }
-            }]
-        }));
-
-        let gazeLayout = {
-            title: {
-                text: `Movimiento de la Mirada (Sujeto ${sujetoId})`,
-                font: { size: 18 },
-                x: 0.5,
-                xanchor: 'center'
-            },
-            xaxis: { range: [0, 1920], title: "X" ,fixedrange: true},
-            yaxis: { range: [1080, 0], title: "Y", scaleanchor: "x", fixedrange: true },
-            width: 700,
-            height: 500,
-            updatemenus: [{
-                type: "buttons",
-                showactive: false,
-                buttons: [
-                    {
-                        label: "▶️ Play",
-                        method: "animate",
-                        args: [null, {
-                            fromcurrent: true,
-                            frame: { duration: 200, redraw: true },
-                            transition: { duration: 100 }
-                        }]
-                    },
-                    {
-                        label: "⏸ Pause",
-                        method: "animate",
-                        args: [[null], {
-                            mode: "immediate",
-                            frame: { duration: 0 },
-                            transition: { duration: 0 }
-                        }]
-                    }
-                ]
-            }],
-            sliders: [{
-                steps: gazeFrames.map(f => ({
-                    label: f.name,
-                    method: "animate",
-                    args: [[f.name], {
-                        mode: "immediate",
-                        frame: { duration: 0, redraw: true },
-                        transition: { duration: 0 }
-                    }]
-                }))
-            }]
-        };
+        if (data.mouse.x.length > 0) {
+            players["mouse-plot"] = new ReplayPlayer(
+                "mouse-plot", data.mouse, "blue",
+                `Movimiento del Mouse (Sujeto ${sujetoId})`, viewport
+            );
+            await players["mouse-plot"].render();
+        }
 
-        Plotly.newPlot("gaze-plot", [{
-            x: [data.points[0].x_gaze],
-            y: [data.points[0].y_gaze],
-            mode: "markers+lines",
-            marker: { size: 6, color: "red" }
-        }], gazeLayout).then(() => {
-            Plotly.addFrames("gaze-plot", gazeFrames);
-        });
+        if (data.gaze.x.length > 0) {
+            players["gaze-plot"] = new ReplayPlayer(
+                "gaze-plot", data.gaze, "red",
+                `Movimiento de la Mirada (Sujeto ${sujetoId})`, viewport
+            );
+            await players["gaze-plot"].render();
+        }
 
     } catch (error) {
         console.error("Error cargando datos:", error);
@@ -207,7 +211,11 @@ async function descargarAnimacion(plotId, formato) {
 }
 
 async function descargarComoWebM(plotId, filename, btn) {
-    const plotElement = document.getElementById(plotId);
+    const player = players[plotId];
+    if (!player) {
+        throw new Error("No hay datos para grabar");
+    }
+    player.pause();
     
     // Crear un canvas para la grabación
     const canvas = document.createElement('canvas');
@@ -248,7 +256,7 @@ async function descargarComoWebM(plotId, filename, btn) {
         
         // Función para capturar frames
         let frameIndex = 0;
-        const totalFrames = 50;
+        const totalFrames = Math.min(50, player.length);
         const frameInterval = setInterval(async () => {
             if (frameIndex >= totalFrames) {
                 clearInterval(frameInterval);
@@ -265,11 +273,11 @@ async function descargarComoWebM(plotId, filename, btn) {
                 btn.textContent = `⏳ Grabando ${frameIndex + 1}/${totalFrames}...`;
             }
             
-            // Animar al siguiente frame
-            await Plotly.animate(plotId, [frameIndex.toString()], {
-                transition: { duration: 0 },
-                frame: { duration: 0, redraw: true }
-            });
+            // Avanzar la trayectoria hasta el siguiente cuadro
+            const sampleIndex = totalFrames > 1
+                ? Math.round(frameIndex * (player.length - 1) / (totalFrames - 1))
+                : 0;
+            await player.seek(sampleIndex);
             
             // Capturar imagen del plot
             const imgData = await Plotly.toImage(plotId, {
@@ -1,6 +1,9 @@
 // Initialize gaze tracker instance
 let gazeTracker = null;
 
+// Directory of this script, where the sample worker is served from
+const STATIC_URL = new URL(".", document.currentScript.src);
+
 function showPrototype() {
   document.getElementById("figma-prototype").style.display = "block";
 }
@@ -17,12 +20,14 @@ document.addEventListener("DOMContentLoaded", function () {
 
   // Set up calibration complete callback
   gazeTracker.setOnCalibrationComplete(() => {
+    enviarMetadatosSesion();
+    enviarCalidadCalibracion();
     checkCalibrationAndShowButton();
   });
 
   // Set up points batch ready callback
-  gazeTracker.setOnPointsBatchReady((points) => {
-    enviarPuntos(points);
+  gazeTracker.setOnPointsBatchReady((samples, count) => {
+    enviarPuntos(samples, count);
   });
 
   // Manejar el clic en el botón "Entendido"
@@ -166,20 +171,96 @@ document.addEventListener("DOMContentLoaded", function () {
     );
 });
 
-function enviarPuntos(puntos) {
-  fetch("/api/save-points", {
+// Samples are packed and uploaded by a worker, which keeps batches in
+// IndexedDB until the server confirms them. Each reply says how large and
+// how frequent batches should be under the current load.
+const uploader = new SampleUploader("/api/save-points", parseInt(id, 10), {
+  workerUrl: new URL("sampleWorker.js", STATIC_URL),
+  onAcknowledge: (result) => {
+    if (gazeTracker) {
+      gazeTracker.setBatchPolicy(result);
+    }
+  },
+});
+
+function enviarPuntos(samples, count) {
+  uploader.send(samples, count);
+}
+
+// Send the last partial batch and anything still pending when the page is
+// hidden or closed; the worker's requests may be cancelled at this point.
+function flushPendingPoints() {
+  const batch = gazeTracker ? gazeTracker.takeSamples() : { values: null, count: 0 };
+  uploader.flushWithBeacon(batch.values, batch.count);
+}
+
+window.addEventListener("pagehide", flushPendingPoints);
+document.addEventListener("visibilitychange", function () {
+  if (document.visibilityState === "hidden") {
+    flushPendingPoints();
+  }
+});
+
+/**
+ * Send the viewport size, device pixel ratio and the position of the
+ * prototype on the page, so the server can normalize the coordinates of
+ * this session into the same space as every other session.
+ */
+function enviarMetadatosSesion() {
+  const shown = ["prototype", "img_interes"]
+    .map((elementId) => document.getElementById(elementId))
+    .find((element) => element && element.style.display !== "none");
+  const rect = shown ? shown.getBoundingClientRect() : null;
+
+  const metadata = {
+    id: parseInt(id, 10),
+    viewport: { width: window.innerWidth, height: window.innerHeight },
+    devicePixelRatio: window.devicePixelRatio || 1,
+  };
+  if (rect && rect.width > 0 && rect.height > 0) {
+    metadata.frame = {
+      x: rect.left,
+      y: rect.top,
+      width: rect.width,
+      height: rect.height,
+    };
+  }
+
+  fetch("/api/save-session-metadata", {
     method: "POST",
-    headers: {
-      "Content-Type": "application/json",
-    },
-    body: JSON.stringify({ points: puntos, id: parseInt(id, 10) }),
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(metadata),
+  }).catch((error) => {
+    console.error("Error al enviar los metadatos de la sesión:", error);
+  });
+}
+
+function enviarCalidadCalibracion() {
+  const validation = gazeTracker.getValidationSamples();
+  if (validation.x_target.length === 0) {
+    return;
+  }
+
+  fetch("/api/save-calibration-quality", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      id: parseInt(id, 10),
+      viewport: { width: window.innerWidth, height: window.innerHeight },
+      ...validation,
+    }),
   })
-    .then((response) => response.text())
+    .then((response) => (response.ok ? response.json() : null))
     .then((result) => {
-      console.log(result);
+      if (result) {
+        console.log(
+          `Calidad de calibración: ${result.score} ` +
+            `(error medio ${result.accuracy} px)`
+        );
+      }
     })
     .catch((error) => {
-      console.error("Error:", error);
+      console.error("Error al enviar la calidad de la calibración:", error);
     });
 }
 
@@ -327,6 +408,7 @@ function showNextTaskInBar() {
             }),
       endTime: null,
       response: null,
+      taskIndex: currentTaskIndex,
     };
 
     document.getElementById("task-bar-text").innerText = taskText;
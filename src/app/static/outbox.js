@@ -0,0 +1,244 @@
+/**
+ * Sample Outbox Module
+ *
+ * Keeps every batch of points in IndexedDB until the server acknowledges it,
+ * so network errors and reloads do not lose data. Failed uploads are retried
+ * with exponential backoff, and pending batches are sent with
+ * navigator.sendBeacon when the page is hidden. Each batch carries a
+ * batch_id, so the server ignores batches it has already saved.
+ *
+ * Works on the page and in workers (see sampleWorker.js); in a worker the
+ * page must do the sendBeacon flush, using the onQueue and onRemove hooks
+ * to keep track of the pending batches.
+ */
+
+class SampleOutbox {
+  constructor(url, options = {}) {
+    this.url = url;
+    this.dbName = options.dbName || "gazetrack-outbox";
+    this.storeName = "batches";
+
+    // Retry configuration (milliseconds)
+    this.baseDelay = options.baseDelay || 1000;
+    this.maxDelay = options.maxDelay || 60000;
+
+    // Called with the server's JSON response to each acknowledged batch,
+    // and with each batch when it is queued or removed
+    this.onAcknowledge = options.onAcknowledge || null;
+    this.onQueue = options.onQueue || null;
+    this.onRemove = options.onRemove || null;
+
+    // In-memory copy of the pending batches, in the order they were queued.
+    // sendBeacon must be called synchronously while the page is hidden, when
+    // there is no time to read them back from IndexedDB.
+    this.pending = new Map();
+    this.db = null;
+    this.opening = null;
+    this.sending = false;
+    this.attempts = 0;
+    this.retryTimer = null;
+
+    self.addEventListener("online", () => this.drain());
+  }
+
+  /**
+   * Open the IndexedDB store and resend batches left by previous pages
+   */
+  async open() {
+    this.opening = this.load();
+    await this.opening;
+    this.drain();
+  }
+
+  async load() {
+    try {
+      this.db = await this.openDatabase();
+      const stored = await this.request(
+        this.transaction("readonly").getAll()
+      );
+      stored
+        .sort((a, b) => a.queuedAt - b.queuedAt)
+        .forEach((record) => {
+          if (!this.pending.has(record.batch_id)) {
+            this.pending.set(record.batch_id, record);
+            this.notify(this.onQueue, record);
+          }
+        });
+    } catch (error) {
+      // Private browsing or disabled storage: keep the outbox in memory only
+      console.warn("Outbox storage unavailable, using memory:", error);
+      this.db = null;
+    }
+  }
+
+  /**
+   * Queue a batch and try to send it
+   * @param {Object} body - JSON body for the upload endpoint
+   * @returns {string} The batch_id assigned to the batch
+   */
+  enqueue(body) {
+    const record = {
+      ...body,
+      batch_id: body.batch_id || SampleOutbox.newBatchId(),
+      queuedAt: Date.now(),
+    };
+    this.pending.set(record.batch_id, record);
+    this.notify(this.onQueue, record);
+
+    this.persist(record).finally(() => this.drain());
+    return record.batch_id;
+  }
+
+  /**
+   * Send the pending batches one by one, oldest first
+   */
+  async drain() {
+    if (this.sending || this.pending.size === 0) {
+      return;
+    }
+    this.sending = true;
+    clearTimeout(this.retryTimer);
+
+    try {
+      for (const [batchId, record] of this.pending) {
+        const response = await fetch(this.url, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify(SampleOutbox.payload(record)),
+        });
+
+        if (response.ok) {
+          await this.remove(batchId);
+          if (this.onAcknowledge) {
+            const result = await response.json().catch(() => null);
+            this.notify(this.onAcknowledge, result);
+          }
+        } else if (SampleOutbox.isRetryable(response.status)) {
+          throw new Error(`Server responded ${response.status}`);
+        } else {
+          // The server rejected the batch itself; retrying cannot help
+          console.error(`Batch ${batchId} rejected (${response.status})`);
+          await this.remove(batchId);
+        }
+        this.attempts = 0;
+      }
+    } catch (error) {
+      console.warn("Error sending points, will retry:", error);
+      this.scheduleRetry();
+    } finally {
+      this.sending = false;
+    }
+  }
+
+  scheduleRetry() {
+    const delay = Math.min(this.maxDelay, this.baseDelay * 2 ** this.attempts);
+    this.attempts++;
+    // Jitter so clients that lost the connection together do not retry together
+    const jittered = delay / 2 + Math.random() * (delay / 2);
+    clearTimeout(this.retryTimer);
+    this.retryTimer = setTimeout(() => this.drain(), jittered);
+  }
+
+  async persist(record) {
+    await this.opening;
+    if (!this.db) {
+      return;
+    }
+    try {
+      await this.request(this.transaction("readwrite").put(record));
+    } catch (error) {
+      console.warn("Could not store batch in the outbox:", error);
+    }
+  }
+
+  async remove(batchId) {
+    this.pending.delete(batchId);
+    this.notify(this.onRemove, batchId);
+    await this.opening;
+    if (!this.db) {
+      return;
+    }
+    try {
+      await this.request(this.transaction("readwrite").delete(batchId));
+    } catch (error) {
+      console.warn("Could not remove batch from the outbox:", error);
+    }
+  }
+
+  openDatabase() {
+    return new Promise((resolve, reject) => {
+      if (!self.indexedDB) {
+        reject(new Error("IndexedDB is not supported"));
+        return;
+      }
+      const request = indexedDB.open(this.dbName, 1);
+      request.onupgradeneeded = () => {
+        request.result.createObjectStore(this.storeName, {
+          keyPath: "batch_id",
+        });
+      };
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => reject(request.error);
+    });
+  }
+
+  transaction(mode) {
+    return this.db
+      .transaction(this.storeName, mode)
+      .objectStore(this.storeName);
+  }
+
+  request(request) {
+    return new Promise((resolve, reject) => {
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => reject(request.error);
+    });
+  }
+
+  notify(callback, value) {
+    if (callback && value) {
+      callback(value);
+    }
+  }
+
+  /**
+   * Send batches with navigator.sendBeacon, which only exists on the page
+   * @param {string} url - Upload endpoint
+   * @param {Iterable<Object>} records - Batches to send
+   */
+  static sendBeacons(url, records) {
+    if (!self.navigator || !navigator.sendBeacon) {
+      return;
+    }
+    for (const record of records) {
+      const blob = new Blob([JSON.stringify(SampleOutbox.payload(record))], {
+        type: "text/plain;charset=UTF-8",
+      });
+      if (!navigator.sendBeacon(url, blob)) {
+        break; // The browser's beacon quota is full
+      }
+    }
+  }
+
+  /**
+   * Body sent to the server, without the outbox bookkeeping fields
+   */
+  static payload(record) {
+    const { queuedAt, ...body } = record;
+    return body;
+  }
+
+  static isRetryable(status) {
+    return status >= 500 || status === 408 || status === 429;
+  }
+
+  static newBatchId() {
+    if (self.crypto && crypto.randomUUID) {
+      return crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+  }
+}
+
+// Export for use in other modules
+self.SampleOutbox = SampleOutbox;
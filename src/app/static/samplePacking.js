@@ -0,0 +1,54 @@
+/**
+ * Sample Packing Module
+ *
+ * Shared by the page and the sample worker. Samples are buffered as
+ * interleaved numbers (t, x_gaze, y_gaze, x_mouse, y_mouse) in a
+ * Float64Array, where t is milliseconds since the Unix epoch, and uploaded
+ * as base64 float64 columns.
+ */
+
+// Values per sample in the interleaved buffer, in order
+const SAMPLE_FIELDS = ["t", "x_gaze", "y_gaze", "x_mouse", "y_mouse"];
+
+/**
+ * Build the /api/save-points body for a buffer of samples
+ * @param {Float64Array} values - Interleaved samples
+ * @param {number} count - Number of samples in the buffer
+ * @param {number} subjectId - Subject the samples belong to
+ * @param {string} batchId - Identifier of the batch
+ * @returns {Object} Columnar batch
+ */
+function packSamples(values, count, subjectId, batchId) {
+  const stride = SAMPLE_FIELDS.length;
+  const columns = {};
+
+  SAMPLE_FIELDS.forEach((name, offset) => {
+    const column = new Float64Array(count);
+    for (let i = 0; i < count; i++) {
+      column[i] = values[i * stride + offset];
+    }
+    columns[name] = float64ToBase64(column);
+  });
+
+  return {
+    id: subjectId,
+    batch_id: batchId,
+    layout: "columnar",
+    encoding: "base64",
+    columns: columns,
+  };
+}
+
+/**
+ * Encode a Float64Array as base64. Typed arrays use the platform byte order,
+ * which is little-endian on every browser platform.
+ */
+function float64ToBase64(column) {
+  const bytes = new Uint8Array(column.buffer, column.byteOffset, column.byteLength);
+  let binary = "";
+  // Chunked to stay under the argument limit of String.fromCharCode
+  for (let i = 0; i < bytes.length; i += 0x8000) {
+    binary += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+  }
+  return btoa(binary);
+}
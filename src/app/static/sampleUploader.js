@@ -0,0 +1,99 @@
+/**
+ * Sample Uploader Module
+ *
+ * Sends the sample buffers collected by GazeTracker to the server. Packing
+ * and uploads run in a Web Worker (sampleWorker.js) when available, and on
+ * the page otherwise. The page keeps a copy of the pending batches so they
+ * can be sent with navigator.sendBeacon when it is hidden.
+ */
+
+class SampleUploader {
+  /**
+   * @param {string} url - Upload endpoint
+   * @param {number} subjectId - Subject the samples belong to
+   * @param {Object} options - workerUrl, and onAcknowledge called with the
+   *   server's response to each batch
+   */
+  constructor(url, subjectId, options = {}) {
+    this.url = url;
+    this.subjectId = subjectId;
+    this.onAcknowledge = options.onAcknowledge || null;
+    this.pending = new Map();
+    this.worker = null;
+    this.outbox = null;
+
+    if (window.Worker && options.workerUrl) {
+      try {
+        this.worker = new Worker(options.workerUrl);
+        this.worker.onmessage = (event) => this.handleMessage(event.data);
+        this.worker.postMessage({ type: "init", url: url, subjectId: subjectId });
+        return;
+      } catch (error) {
+        console.warn("Sample worker unavailable, uploading from the page:", error);
+        this.worker = null;
+      }
+    }
+
+    this.outbox = new SampleOutbox(url, {
+      onQueue: (record) => this.pending.set(record.batch_id, record),
+      onRemove: (batchId) => this.pending.delete(batchId),
+      onAcknowledge: (result) => this.acknowledge(result),
+    });
+    this.outbox.open();
+  }
+
+  /**
+   * Queue a buffer of samples for upload
+   * @param {Float64Array} values - Interleaved samples (see samplePacking.js);
+   *   ownership passes to the uploader
+   * @param {number} count - Number of samples in the buffer
+   * @param {string} batchId - Identifier of the batch (optional)
+   */
+  send(values, count, batchId = SampleOutbox.newBatchId()) {
+    if (this.worker) {
+      this.worker.postMessage(
+        { type: "batch", values: values, count: count, batchId: batchId },
+        [values.buffer]
+      );
+    } else {
+      this.outbox.enqueue(packSamples(values, count, this.subjectId, batchId));
+    }
+  }
+
+  /**
+   * Send a last buffer and every pending batch with navigator.sendBeacon.
+   *
+   * The last buffer is also queued with the same batch_id, so it is
+   * retried if the page stays alive and saved only once.
+   * @param {Float64Array} values - Samples not yet sent (optional)
+   * @param {number} count - Number of samples in the buffer
+   */
+  flushWithBeacon(values = null, count = 0) {
+    const records = [...this.pending.values()];
+    if (values && count > 0) {
+      const batchId = SampleOutbox.newBatchId();
+      records.push(packSamples(values, count, this.subjectId, batchId));
+      this.send(values, count, batchId);
+    }
+    SampleOutbox.sendBeacons(this.url, records);
+  }
+
+  handleMessage(message) {
+    if (message.type === "queued") {
+      this.pending.set(message.record.batch_id, message.record);
+    } else if (message.type === "removed") {
+      this.pending.delete(message.batchId);
+    } else if (message.type === "acknowledged") {
+      this.acknowledge(message.result);
+    }
+  }
+
+  acknowledge(result) {
+    if (this.onAcknowledge) {
+      this.onAcknowledge(result);
+    }
+  }
+}
+
+// Export for use in other modules
+window.SampleUploader = SampleUploader;
@@ -0,0 +1,33 @@
+/**
+ * Sample Worker
+ *
+ * Packs the sample buffers transferred by the page and uploads them through
+ * the IndexedDB outbox, off the main thread where WebGazer runs. The page is
+ * told about every queued and removed batch, so it can still flush them
+ * with navigator.sendBeacon (not available in workers) when it is hidden.
+ */
+
+importScripts("outbox.js", "samplePacking.js");
+
+let outbox = null;
+let subjectId = null;
+
+self.onmessage = (event) => {
+  const message = event.data;
+
+  if (message.type === "init") {
+    subjectId = message.subjectId;
+    outbox = new SampleOutbox(message.url, {
+      onQueue: (record) => self.postMessage({ type: "queued", record: record }),
+      onRemove: (batchId) =>
+        self.postMessage({ type: "removed", batchId: batchId }),
+      onAcknowledge: (result) =>
+        self.postMessage({ type: "acknowledged", result: result }),
+    });
+    outbox.open();
+  } else if (message.type === "batch") {
+    outbox.enqueue(
+      packSamples(message.values, message.count, subjectId, message.batchId)
+    );
+  }
+};
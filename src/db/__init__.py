@@ -4,7 +4,8 @@ Database initialization and configuration module.
 
 from .db_config import DatabaseConfig
 from .db_manager import DatabaseManager
-from .models import db, Subject, Measurement, Point, TaskLog, User
+from .models import db, Subject, Measurement, Point, TaskLog, User, IngestBatch, Job
+from .sharding import ShardRouter, get_shard_router
 
 __all__ = [
     "DatabaseConfig",
@@ -15,4 +16,8 @@ __all__ = [
     "Point",
     "TaskLog",
     "User",
+    "IngestBatch",
+    "Job",
+    "ShardRouter",
+    "get_shard_router",
 ]
@@ -3,17 +3,33 @@ Database configuration class.
 """
 
 import os
+from typing import Any, Dict, Optional
+from sqlalchemy.engine import make_url
 
 
 class DatabaseConfig:
     """Configuration for database connection."""
 
-    def __init__(self, basedir: str = None):
+    def __init__(
+        self,
+        basedir: str = None,
+        pool_size: Optional[int] = None,
+        max_overflow: Optional[int] = None,
+        pool_recycle: Optional[int] = None,
+    ):
         """
         Initialize database configuration.
 
+        Pool settings only apply to server databases (PostgreSQL, MySQL...).
+        When not given they are read from the ``DATABASE_POOL_SIZE``,
+        ``DATABASE_MAX_OVERFLOW`` and ``DATABASE_POOL_RECYCLE`` environment
+        variables, falling back to SQLAlchemy's defaults.
+
         Args:
             basedir: Base directory for the application
+            pool_size: Connections kept open in the pool
+            max_overflow: Extra connections allowed above pool_size
+            pool_recycle: Seconds after which connections are replaced
         """
         if basedir is None:
             basedir = os.path.abspath(os.path.dirname(__file__))
@@ -21,6 +37,13 @@ class DatabaseConfig:
         self.basedir = basedir
         self.database_uri = None
         self.track_modifications = False
+        self.pool_size = pool_size or _int_env("DATABASE_POOL_SIZE")
+        self.max_overflow = (
+            max_overflow
+            if max_overflow is not None
+            else _int_env("DATABASE_MAX_OVERFLOW")
+        )
+        self.pool_recycle = pool_recycle or _int_env("DATABASE_POOL_RECYCLE")
 
     def get_sqlite_uri(self, db_path: str = None) -> str:
         """
@@ -41,18 +64,72 @@ class DatabaseConfig:
 
         return f"sqlite:///{db_path}"
 
+    def get_database_uri(self, database_uri: str = None) -> str:
+        """
+        Get the database URI to use.
+
+        Any SQLAlchemy URI is accepted. The ``DATABASE_URL`` environment
+        variable is used when no URI is given, and SQLite is the default.
+        ``postgres://`` URIs are mapped to the psycopg driver.
+
+        Args:
+            database_uri: Explicit database URI (optional)
+
+        Returns:
+            Database URI
+        """
+        database_uri = database_uri or os.environ.get("DATABASE_URL")
+
+        if not database_uri:
+            return self.get_sqlite_uri()
+
+        for prefix in ("postgres://", "postgresql://"):
+            if database_uri.startswith(prefix):
+                return "postgresql+psycopg://" + database_uri[len(prefix) :]
+
+        return database_uri
+
+    def get_engine_options(self, database_uri: str) -> Dict[str, Any]:
+        """
+        Get the SQLAlchemy engine options for a database URI.
+
+        Args:
+            database_uri: Database URI
+
+        Returns:
+            Keyword arguments for ``create_engine``
+        """
+        if make_url(database_uri).get_backend_name() == "sqlite":
+            return {}
+
+        options: Dict[str, Any] = {"pool_pre_ping": True}
+        if self.pool_size is not None:
+            options["pool_size"] = self.pool_size
+        if self.max_overflow is not None:
+            options["max_overflow"] = self.max_overflow
+        if self.pool_recycle is not None:
+            options["pool_recycle"] = self.pool_recycle
+        return options
+
     def configure_app(self, app, database_uri: str = None):
         """
         Configure Flask app with database settings.
 
         Args:
             app: Flask application instance
-            database_uri: Database URI (if None, uses default SQLite)
+            database_uri: Database URI (if None, uses ``DATABASE_URL`` or the
+                default SQLite database)
         """
-        if database_uri is None:
-            database_uri = self.get_sqlite_uri()
+        database_uri = self.get_database_uri(database_uri)
 
         app.config["SQLALCHEMY_DATABASE_URI"] = database_uri
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = self.get_engine_options(database_uri)
         app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = self.track_modifications
 
         self.database_uri = database_uri
+
+
+def _int_env(name: str) -> Optional[int]:
+    """Read an optional integer environment variable."""
+    value = os.environ.get(name)
+    return int(value) if value else None
@@ -2,7 +2,10 @@
 Database manager for initialization and operations.
 """
 
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
 from .models import db
+from .sharding import ShardRouter
 
 
 class DatabaseManager:
@@ -30,6 +33,9 @@ class DatabaseManager:
         self.app = app
         self.db.init_app(app)
 
+        if app.config.get("SAMPLE_SHARDING"):
+            ShardRouter(app)
+
     def create_all(self):
         """Create all database tables."""
         if self.app is None:
@@ -37,6 +43,69 @@ class DatabaseManager:
 
         with self.app.app_context():
             self.db.create_all()
+            added = self.add_missing_columns()
+            self.create_missing_indexes()
+
+            if "subject.sample_count" in added or "subject.tasklog_count" in added:
+                self.backfill_subject_counters()
+
+    def add_missing_columns(self):
+        """
+        Add columns declared on the models that are missing in the database.
+
+        ``create_all`` never alters existing tables, so databases created by an
+        older version of the application are upgraded in place. New columns
+        must be nullable or declare a server default.
+
+        Returns:
+            List of the added columns as "table.column"
+        """
+        engine = self.db.engine
+        inspector = inspect(engine)
+        added = []
+
+        with engine.begin() as connection:
+            for table in self.db.metadata.sorted_tables:
+                if not inspector.has_table(table.name):
+                    continue
+                existing = {c["name"] for c in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    connection.execute(
+                        text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+                    )
+                    added.append(f"{table.name}.{column.name}")
+
+        return added
+
+    def backfill_subject_counters(self):
+        """Recompute the data version counters of every subject."""
+        with self.db.engine.begin() as connection:
+            connection.execute(
+                text(
+                    "UPDATE subject SET "
+                    "sample_count = (SELECT COUNT(*) FROM measurement "
+                    "WHERE measurement.subject_id = subject.id), "
+                    "last_sample_id = (SELECT MAX(id) FROM measurement "
+                    "WHERE measurement.subject_id = subject.id), "
+                    "tasklog_count = (SELECT COUNT(*) FROM task_log "
+                    "WHERE task_log.subject_id = subject.id)"
+                )
+            )
+
+    def create_missing_indexes(self):
+        """
+        Create indexes declared on the models that are missing in the database.
+
+        ``create_all`` only creates indexes together with new tables, so this
+        brings existing databases up to date with newly added indexes.
+        """
+        engine = self.db.engine
+        for table in self.db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
 
     def drop_all(self):
         """Drop all database tables."""
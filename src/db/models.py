@@ -1,3 +1,5 @@
+import json
+from typing import Optional, Tuple
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -43,9 +45,73 @@ class Subject(db.Model):
     age = db.Column(db.Integer, nullable=False)
     study_id = db.Column(db.Integer, db.ForeignKey("study.id"), nullable=True)
 
+    # Data version counters, updated on every write of samples or task logs
+    sample_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    last_sample_id = db.Column(db.Integer, nullable=True)
+    tasklog_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    # Session metadata recorded at calibration, in CSS pixels. The frame is
+    # the area of the viewport showing the prototype; samples are normalized
+    # against it for analytics that combine subjects.
+    viewport_width = db.Column(db.Integer, nullable=True)
+    viewport_height = db.Column(db.Integer, nullable=True)
+    device_pixel_ratio = db.Column(db.Float, nullable=True)
+    frame_x = db.Column(db.Float, nullable=True)
+    frame_y = db.Column(db.Float, nullable=True)
+    frame_width = db.Column(db.Float, nullable=True)
+    frame_height = db.Column(db.Float, nullable=True)
+    metadata_version = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+
+    # Calibration quality, measured on validation predictions at known
+    # targets when calibration finishes. Accuracy and precision are in CSS
+    # pixels; the score (0 to 1) is what exports and aggregations filter on.
+    calibration_accuracy = db.Column(db.Float, nullable=True)
+    calibration_precision = db.Column(db.Float, nullable=True)
+    calibration_score = db.Column(db.Float, nullable=True, index=True)
+    calibration_samples = db.Column(db.Integer, nullable=True)
+
     # Relationship to study
     study = db.relationship("Study", back_populates="subjects")
 
+    # Covers the subjects of a study above a calibration score
+    __table_args__ = (
+        db.Index("ix_subject_study_calibration", "study_id", "calibration_score"),
+    )
+
+    @property
+    def data_version(self) -> str:
+        """Cheap token that changes whenever the subject's data changes."""
+        counters = (self.last_sample_id, self.sample_count, self.tasklog_count)
+        version = ".".join(str(value or 0) for value in counters)
+        if self.metadata_version:
+            # Normalized results also depend on the session metadata
+            version += f"-m{self.metadata_version}"
+        return version
+
+    @property
+    def canonical_frame(self) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Area of the screen mapped to the canonical unit square.
+
+        Returns:
+            Tuple (x, y, width, height) of the prototype frame, or of the
+            whole viewport when no frame was recorded; None if the session
+            has no metadata
+        """
+        if self.frame_width and self.frame_height:
+            return (
+                self.frame_x or 0.0,
+                self.frame_y or 0.0,
+                self.frame_width,
+                self.frame_height,
+            )
+        if self.viewport_width and self.viewport_height:
+            return (0.0, 0.0, float(self.viewport_width), float(self.viewport_height))
+        return None
+
 
 class Measurement(db.Model):
     """Represents a measurement associated with a subject, with specific points for mouse and gaze."""
@@ -61,6 +127,11 @@ class Measurement(db.Model):
     mouse_point = db.relationship("Point", foreign_keys=[mouse_point_id])
     gaze_point = db.relationship("Point", foreign_keys=[gaze_point_id])
 
+    # Covers per-subject reads ordered by time and keyset pagination
+    __table_args__ = (
+        db.Index("ix_measurement_subject_date_id", "subject_id", "date", "id"),
+    )
+
     def __str__(self):
         return f"Measurement {self.id} - Date: {self.date}"
 
@@ -89,6 +160,25 @@ class Point(db.Model):
         return {"x": self.x, "y": self.y}
 
 
+class IngestBatch(db.Model):
+    """Records a batch of samples already saved, so client retries are ignored."""
+
+    __tablename__ = "ingest_batch"
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject_id = db.Column(db.Integer, db.ForeignKey("subject.id"), nullable=False)
+    batch_id = db.Column(db.String(64), nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False)
+    received_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("subject_id", "batch_id", name="uq_ingest_batch"),
+    )
+
+    def __str__(self):
+        return f"IngestBatch {self.batch_id} - Subject: {self.subject_id}"
+
+
 class TaskLog(db.Model):
     """Represents a log of a task performed by a subject."""
 
@@ -152,3 +242,39 @@ class User(UserMixin, db.Model):
             "username": self.username,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
+
+
+class Job(db.Model):
+    """A long-running analytics or export task run in the background."""
+
+    __tablename__ = "job"
+
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    progress = db.Column(db.Float, nullable=False, default=0.0)
+    error = db.Column(db.Text, nullable=True)
+    result_name = db.Column(db.String(255), nullable=True)
+    result_mimetype = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index("ix_job_status_created", "status", "created_at"),)
+
+    def __str__(self):
+        return f"Job {self.id} - {self.kind}: {self.status}"
+
+    def __json__(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": json.loads(self.params),
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,237 @@
+"""
+Per-study SQLite shards for sample data (measurements and points).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from flask import current_app
+from flask.globals import app_ctx
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from .models import db, Measurement, Point, Subject
+
+# Tables stored in the shards instead of the main database
+SHARDED_TABLES = [Point.__table__, Measurement.__table__]
+
+# Subjects whose study is remembered by each process, least recently used first
+STUDY_CACHE_SIZE = 10000
+
+
+class ShardRouter:
+    """
+    Route sample reads and writes to one SQLite file per study.
+
+    Subjects, studies, users and task logs stay in the main database; only
+    the ``point`` and ``measurement`` tables are sharded. Each study writes
+    to its own file, so studies ingest in parallel without sharing a write
+    lock, and a finished study can be archived by moving its file (after
+    ``dispose``). Subjects without a study share an ``unassigned`` shard.
+    A subject's study must not change once it has samples, since they stay
+    in the old study's shard; ``StudyRepository.delete_study`` refuses to
+    delete a study whose subjects have samples for this reason.
+
+    Sessions are scoped to the Flask app context, like ``db.session``, and
+    are removed when the context is torn down.
+    """
+
+    def __init__(self, app=None):
+        """
+        Initialize the router.
+
+        Args:
+            app: Flask application (optional)
+        """
+        self.directory = None
+        self._engines: Dict[Optional[int], Engine] = {}
+        self._sessions: Dict[Optional[int], scoped_session] = {}
+        self._study_of: "OrderedDict[int, Optional[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._study_lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Register the router on an app.
+
+        Shards are stored in ``SAMPLE_SHARD_DIR``, by default
+        ``<instance>/shards``.
+
+        Args:
+            app: Flask application
+        """
+        directory = app.config.get("SAMPLE_SHARD_DIR") or os.path.join(
+            app.instance_path, "shards"
+        )
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+        app.extensions["sample_shards"] = self
+        app.teardown_appcontext(self.remove_sessions)
+
+    def path_for(self, study_id: Optional[int]) -> str:
+        """
+        Get the file of a study's shard.
+
+        Args:
+            study_id: ID of the study, or None for subjects without a study
+
+        Returns:
+            Absolute path of the SQLite file
+        """
+        name = "unassigned" if study_id is None else f"study_{study_id}"
+        return os.path.join(self.directory, f"{name}.db")
+
+    def engine_for(self, study_id: Optional[int]) -> Engine:
+        """
+        Get the engine of a study's shard, creating the file if needed.
+
+        Args:
+            study_id: ID of the study, or None for subjects without a study
+
+        Returns:
+            SQLAlchemy engine
+        """
+        engine = self._engines.get(study_id)
+        if engine is not None:
+            return engine
+
+        with self._lock:
+            engine = self._engines.get(study_id)
+            if engine is None:
+                engine = create_engine(
+                    f"sqlite:///{self.path_for(study_id)}",
+                    connect_args={"timeout": 30},
+                )
+                event.listen(engine, "connect", _enable_wal)
+                db.metadata.create_all(engine, tables=SHARDED_TABLES)
+                self._engines[study_id] = engine
+        return engine
+
+    def session_for(self, study_id: Optional[int]) -> Session:
+        """
+        Get the session of a study's shard for the current app context.
+
+        Args:
+            study_id: ID of the study, or None for subjects without a study
+
+        Returns:
+            SQLAlchemy session
+        """
+        sessions = self._sessions.get(study_id)
+        if sessions is None:
+            engine = self.engine_for(study_id)
+            with self._lock:
+                sessions = self._sessions.get(study_id)
+                if sessions is None:
+                    sessions = scoped_session(
+                        sessionmaker(bind=engine), scopefunc=_app_ctx_id
+                    )
+                    self._sessions[study_id] = sessions
+        return sessions()
+
+    def study_of(self, subject_id: int) -> Optional[int]:
+        """
+        Get the study of a subject.
+
+        The studies of the last ``STUDY_CACHE_SIZE`` subjects used are
+        remembered. Subjects that do not exist are not, since their IDs come
+        from clients and the subject may be created later.
+
+        Args:
+            subject_id: The ID of the subject
+
+        Returns:
+            ID of the study, or None
+        """
+        with self._study_lock:
+            if subject_id in self._study_of:
+                self._study_of.move_to_end(subject_id)
+                return self._study_of[subject_id]
+
+        row = db.session.execute(
+            select(Subject.study_id).where(Subject.id == subject_id)
+        ).first()
+        if row is None:
+            return None
+
+        with self._study_lock:
+            self._study_of[subject_id] = row.study_id
+            if len(self._study_of) > STUDY_CACHE_SIZE:
+                self._study_of.popitem(last=False)
+        return row.study_id
+
+    def session_for_subject(self, subject_id: int) -> Session:
+        """
+        Get the shard session holding a subject's samples.
+
+        Args:
+            subject_id: The ID of the subject
+
+        Returns:
+            SQLAlchemy session
+        """
+        return self.session_for(self.study_of(subject_id))
+
+    def commit(self) -> None:
+        """Commit the shard sessions used in the current app context."""
+        for sessions in list(self._sessions.values()):
+            if sessions.registry.has():
+                sessions().commit()
+
+    def rollback(self) -> None:
+        """Roll back the shard sessions used in the current app context."""
+        for sessions in list(self._sessions.values()):
+            if sessions.registry.has():
+                sessions().rollback()
+
+    def remove_sessions(self, exc=None) -> None:
+        """Close the shard sessions of the current app context."""
+        for sessions in list(self._sessions.values()):
+            sessions.remove()
+
+    def dispose(self, study_id: Optional[int]) -> None:
+        """
+        Close the connections of a study's shard so its file can be moved.
+
+        Args:
+            study_id: ID of the study, or None for subjects without a study
+        """
+        with self._lock:
+            sessions = self._sessions.pop(study_id, None)
+            if sessions is not None:
+                sessions.remove()
+            engine = self._engines.pop(study_id, None)
+            if engine is not None:
+                engine.dispose()
+
+    def dispose_all(self) -> None:
+        """Close the connections of every shard."""
+        for study_id in list(self._engines):
+            self.dispose(study_id)
+
+
+def get_shard_router() -> Optional[ShardRouter]:
+    """
+    Get the shard router of the current Flask app.
+
+    Returns:
+        The app's ShardRouter, or None if sharding is disabled
+    """
+    return current_app.extensions.get("sample_shards")
+
+
+def _app_ctx_id() -> int:
+    """Scope shard sessions to the current app context."""
+    return id(app_ctx._get_current_object())
+
+
+def _enable_wal(dbapi_connection, connection_record):
+    """Let readers proceed while a study's shard is being written."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
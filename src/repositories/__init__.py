@@ -4,17 +4,32 @@ This module provides a clean separation between business logic and data storage.
 """
 
 from .subject_repository import SubjectRepository
-from .measurement_repository import MeasurementRepository
+from .measurement_repository import MeasurementRepository, SAMPLE_SOURCES
 from .point_repository import PointRepository
 from .tasklog_repository import TaskLogRepository
 from .study_repository import StudyRepository
 from .user_repository import UserRepository
+from .ingest_batch_repository import IngestBatchRepository
+from .job_repository import (
+    JobRepository,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    JOB_FAILED,
+)
 
 __all__ = [
     "SubjectRepository",
     "MeasurementRepository",
+    "SAMPLE_SOURCES",
     "PointRepository",
     "TaskLogRepository",
     "StudyRepository",
     "UserRepository",
+    "IngestBatchRepository",
+    "JobRepository",
+    "JOB_QUEUED",
+    "JOB_RUNNING",
+    "JOB_SUCCEEDED",
+    "JOB_FAILED",
 ]
@@ -63,6 +63,10 @@ class BaseRepository(Generic[T]):
         """
         db.session.delete(entity)
 
+    def flush(self) -> None:
+        """Send pending changes to the database without committing them."""
+        db.session.flush()
+
     def commit(self) -> None:
         """Commit the current transaction."""
         db.session.commit()
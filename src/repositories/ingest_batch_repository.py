@@ -0,0 +1,58 @@
+"""
+Repository for IngestBatch entity operations.
+"""
+
+from datetime import datetime
+from db.models import IngestBatch
+from .base_repository import BaseRepository
+
+
+class IngestBatchRepository(BaseRepository[IngestBatch]):
+    """Repository for the batches of samples received from clients."""
+
+    def __init__(self):
+        super().__init__(IngestBatch)
+
+    def is_recorded(self, subject_id: int, batch_id: str) -> bool:
+        """
+        Check whether a batch has already been saved.
+
+        Args:
+            subject_id: The ID of the subject
+            batch_id: Identifier generated by the client for the batch
+
+        Returns:
+            True if the batch was saved before
+        """
+        return (
+            self.model.query.filter_by(subject_id=subject_id, batch_id=batch_id)
+            .limit(1)
+            .count()
+            > 0
+        )
+
+    def record_batch(
+        self, subject_id: int, batch_id: str, sample_count: int
+    ) -> IngestBatch:
+        """
+        Record a batch in the current transaction.
+
+        The unique constraint on (subject_id, batch_id) makes the flush or
+        commit fail if the same batch is saved concurrently.
+
+        Args:
+            subject_id: The ID of the subject
+            batch_id: Identifier generated by the client for the batch
+            sample_count: Number of samples in the batch
+
+        Returns:
+            The created IngestBatch instance
+        """
+        batch = IngestBatch(
+            subject_id=subject_id,
+            batch_id=batch_id,
+            sample_count=sample_count,
+            received_at=datetime.now(),
+        )
+        self.add(batch)
+        return batch
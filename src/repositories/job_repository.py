@@ -0,0 +1,145 @@
+"""
+Repository for Job entity operations.
+"""
+
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from db.models import Job
+from .base_repository import BaseRepository
+
+# Job statuses, in the order a job goes through them
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+class JobRepository(BaseRepository[Job]):
+    """Repository for background jobs."""
+
+    def __init__(self):
+        super().__init__(Job)
+
+    def create_job(self, kind: str, params: Dict[str, Any]) -> Job:
+        """
+        Queue a new job.
+
+        Args:
+            kind: Kind of task the job runs
+            params: JSON-serializable parameters of the task
+
+        Returns:
+            Created Job instance
+        """
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            params=_params_key(params),
+            status=JOB_QUEUED,
+            progress=0.0,
+            created_at=datetime.now(),
+        )
+        return self.add(job)
+
+    def get_active_job(self, kind: str, params: Dict[str, Any]) -> Optional[Job]:
+        """
+        Get a queued or running job with the same kind and parameters.
+
+        Args:
+            kind: Kind of task the job runs
+            params: Parameters of the task
+
+        Returns:
+            The oldest matching job, or None
+        """
+        return (
+            self.model.query.filter(
+                Job.status.in_((JOB_QUEUED, JOB_RUNNING)),
+                Job.kind == kind,
+                Job.params == _params_key(params),
+            )
+            .order_by(Job.created_at)
+            .first()
+        )
+
+    def get_jobs_by_status(self, status: str) -> List[Job]:
+        """
+        Get the jobs with a status, oldest first.
+
+        Args:
+            status: One of the JOB_* statuses
+
+        Returns:
+            List of jobs
+        """
+        return self.model.query.filter_by(status=status).order_by(Job.created_at).all()
+
+    def get_interrupted_jobs(self, before: datetime) -> List[Job]:
+        """
+        Get the running jobs started before a time, oldest first.
+
+        Args:
+            before: Start time of the current process; jobs started later
+                may still be running in another process
+
+        Returns:
+            List of jobs
+        """
+        return (
+            self.model.query.filter(
+                Job.status == JOB_RUNNING,
+                (Job.started_at.is_(None)) | (Job.started_at < before),
+            )
+            .order_by(Job.created_at)
+            .all()
+        )
+
+    def claim_job(self, job_id: str) -> bool:
+        """
+        Mark a queued job as running, unless another worker already did.
+
+        The status check and the update are one statement, so a job handed
+        to two runners is still only run once.
+
+        Args:
+            job_id: The ID of the job
+
+        Returns:
+            True if the job was queued and is now claimed by the caller
+        """
+        claimed = self.model.query.filter_by(id=job_id, status=JOB_QUEUED).update(
+            {Job.status: JOB_RUNNING, Job.started_at: datetime.now()},
+            synchronize_session=False,
+        )
+        return claimed > 0
+
+    def update_job(self, job_id: str, **values: Any) -> None:
+        """
+        Update columns of a job with a single UPDATE statement.
+
+        Args:
+            job_id: The ID of the job
+            values: Column values to set
+        """
+        self.model.query.filter_by(id=job_id).update(values, synchronize_session=False)
+
+    def get_finished_before(self, before: datetime) -> List[Job]:
+        """
+        Get the finished jobs older than a time.
+
+        Args:
+            before: Only include jobs finished before this time
+
+        Returns:
+            List of jobs
+        """
+        return self.model.query.filter(
+            Job.status.in_((JOB_SUCCEEDED, JOB_FAILED)), Job.finished_at < before
+        ).all()
+
+
+def _params_key(params: Dict[str, Any]) -> str:
+    """Serialize parameters canonically, so equal parameters compare equal."""
+    return json.dumps(params, sort_keys=True, separators=(",", ":"))
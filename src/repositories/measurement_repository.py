@@ -2,11 +2,31 @@
 Repository for Measurement entity operations.
 """
 
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime
-from db.models import Measurement, Point
+from sqlalchemy import and_, delete, insert, or_, select, text
+from sqlalchemy.orm import aliased
+from db.models import db, Measurement, Point, Subject
+from db.sharding import get_shard_router
+from storage import get_cold_store, get_sample_store
 from .base_repository import BaseRepository
 
+if TYPE_CHECKING:
+    import numpy as np
+
+SAMPLE_SOURCES = ("mouse", "gaze")
+
+# Maximum number of ids per DELETE ... IN statement
+DELETE_CHUNK_SIZE = 500
+
+# Rows fetched per round trip when streaming samples
+STREAM_CHUNK_SIZE = 2000
+
+SOURCE_COLUMNS = {
+    "mouse": Measurement.mouse_point_id,
+    "gaze": Measurement.gaze_point_id,
+}
+
 
 class MeasurementRepository(BaseRepository[Measurement]):
     """Repository for managing Measurement entities."""
@@ -39,9 +59,91 @@ class MeasurementRepository(BaseRepository[Measurement]):
             mouse_point=mouse_point,
             gaze_point=gaze_point,
         )
-        self.add(measurement)
+        self._session_for(subject_id).add(measurement)
         return measurement
 
+    def bulk_create_samples(
+        self,
+        subject_id: int,
+        samples: Sequence[Tuple[datetime, float, float, float, float]],
+    ) -> List[int]:
+        """
+        Insert many measurements with their mouse and gaze points.
+
+        On PostgreSQL with psycopg the ids are reserved from the sequences and
+        the rows are streamed with COPY. Other databases use one executemany
+        per table, with ids returned in parameter order.
+
+        Args:
+            subject_id: The ID of the subject
+            samples: Tuples (date, x_mouse, y_mouse, x_gaze, y_gaze)
+
+        Returns:
+            IDs of the inserted measurements, in the order of ``samples``
+        """
+        if not samples:
+            return []
+
+        session = self._session_for(subject_id)
+        connection = session.connection()
+        dialect = connection.dialect
+        if dialect.name == "postgresql" and dialect.driver == "psycopg":
+            return self._copy_samples(connection, subject_id, samples)
+
+        point_rows = []
+        for _, x_mouse, y_mouse, x_gaze, y_gaze in samples:
+            point_rows.append({"x": x_mouse, "y": y_mouse})
+            point_rows.append({"x": x_gaze, "y": y_gaze})
+
+        point_ids = session.scalars(
+            insert(Point).returning(Point.id, sort_by_parameter_order=True),
+            point_rows,
+        ).all()
+
+        measurement_ids = session.scalars(
+            insert(Measurement).returning(Measurement.id, sort_by_parameter_order=True),
+            [
+                {
+                    "date": sample[0],
+                    "subject_id": subject_id,
+                    "mouse_point_id": point_ids[2 * i],
+                    "gaze_point_id": point_ids[2 * i + 1],
+                }
+                for i, sample in enumerate(samples)
+            ],
+        ).all()
+        return list(measurement_ids)
+
+    def _copy_samples(self, connection, subject_id, samples):
+        """Insert samples on PostgreSQL with COPY, in the session transaction."""
+        point_ids = _reserve_ids(connection, Point.__tablename__, 2 * len(samples))
+        measurement_ids = _reserve_ids(
+            connection, Measurement.__tablename__, len(samples)
+        )
+
+        cursor = connection.connection.driver_connection.cursor()
+        with cursor.copy("COPY point (id, x, y) FROM STDIN") as copy:
+            for i, (_, x_mouse, y_mouse, x_gaze, y_gaze) in enumerate(samples):
+                copy.write_row((point_ids[2 * i], x_mouse, y_mouse))
+                copy.write_row((point_ids[2 * i + 1], x_gaze, y_gaze))
+
+        with cursor.copy(
+            "COPY measurement (id, date, subject_id, mouse_point_id, gaze_point_id)"
+            " FROM STDIN"
+        ) as copy:
+            for i, sample in enumerate(samples):
+                copy.write_row(
+                    (
+                        measurement_ids[i],
+                        sample[0],
+                        subject_id,
+                        point_ids[2 * i],
+                        point_ids[2 * i + 1],
+                    )
+                )
+
+        return list(measurement_ids)
+
     def get_measurements_by_subject(self, subject_id: int) -> List[Measurement]:
         """
         Get all measurements for a specific subject.
@@ -52,7 +154,12 @@ class MeasurementRepository(BaseRepository[Measurement]):
         Returns:
             List of measurements
         """
-        return self.model.query.filter_by(subject_id=subject_id).all()
+        return (
+            self._session_for(subject_id)
+            .query(Measurement)
+            .filter_by(subject_id=subject_id)
+            .all()
+        )
 
     def count_measurements_by_subject(self, subject_id: int) -> int:
         """
@@ -64,4 +171,439 @@ class MeasurementRepository(BaseRepository[Measurement]):
         Returns:
             Number of measurements
         """
-        return self.model.query.filter_by(subject_id=subject_id).count()
+        return (
+            self._session_for(subject_id)
+            .query(Measurement)
+            .filter_by(subject_id=subject_id)
+            .count()
+        )
+
+    def get_sample_arrays(
+        self,
+        subject_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        sources: Sequence[str] = SAMPLE_SOURCES,
+        include_cold: bool = True,
+    ) -> Dict[str, "np.ndarray"]:
+        """
+        Get the samples of a subject as NumPy columns, ordered by (date, id).
+
+        When the sample store is enabled and complete for the subject, the
+        samples are memory-mapped from it and the database is not queried.
+        Otherwise the points are joined in a single query and no ORM objects
+        are built, and samples moved to cold storage are merged in. Reads
+        never write the store; the next saved batch brings it up to date.
+
+        Args:
+            subject_id: The ID of the subject
+            start: Only include samples at or after this time (optional)
+            end: Only include samples at or before this time (optional)
+            sources: Point sources to include ("mouse" and/or "gaze")
+            include_cold: Also return samples moved to cold storage; when
+                False only the database is read
+
+        Returns:
+            Dictionary with the arrays ``id``, ``date`` (datetime64[us]) and the
+            ``x_<source>``/``y_<source>`` coordinates of each requested source.
+            Missing points are represented as NaN.
+        """
+        if include_cold:
+            stored = self._stored_samples(subject_id, sources)
+            if stored is not None:
+                return _slice_window(stored, start, end)
+
+        stmt = self._sample_statement(subject_id, start, end, sources)
+        rows = self._session_for(subject_id).execute(stmt).all()
+        arrays = self._to_arrays(rows, sources)
+
+        if include_cold:
+            cold = self._cold_samples(subject_id, sources)
+            if cold is not None:
+                arrays = _merge_samples(_slice_window(cold, start, end), arrays)
+        return arrays
+
+    def iter_sample_chunks(
+        self,
+        subject_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        sources: Sequence[str] = SAMPLE_SOURCES,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Iterator[Dict[str, "np.ndarray"]]:
+        """
+        Stream the samples of a subject in chunks ordered by (date, id).
+
+        Memory use is bounded by ``chunk_size`` whatever the length of the
+        session. The database is read with ``yield_per``, which uses a
+        server-side cursor on PostgreSQL, and cold samples are merged in
+        chunk by chunk. When the sample store is complete, its memory map is
+        sliced instead.
+
+        Args:
+            subject_id: The ID of the subject
+            start: Only include samples at or after this time (optional)
+            end: Only include samples at or before this time (optional)
+            sources: Point sources to include ("mouse", "gaze")
+            chunk_size: Maximum number of database rows per chunk
+
+        Yields:
+            Dictionaries of NumPy columns, like ``get_sample_arrays``
+        """
+        stored = self._stored_samples(subject_id, sources)
+        if stored is not None:
+            yield from _chunks(_slice_window(stored, start, end), chunk_size)
+            return
+
+        cold = self._cold_samples(subject_id, sources)
+        if cold is not None:
+            cold = _slice_window(cold, start, end)
+
+        stmt = self._sample_statement(subject_id, start, end, sources)
+        result = self._session_for(subject_id).execute(
+            stmt.execution_options(yield_per=chunk_size)
+        )
+        try:
+            for rows in result.partitions():
+                chunk = self._to_arrays(rows, sources)
+                if cold is not None:
+                    # Cold samples before this chunk are streamed as they are
+                    # and those within its range are merged into it. (date,
+                    # id - 1) is the key just before the chunk's first row.
+                    first = _index_after(cold, chunk["date"][0], chunk["id"][0] - 1)
+                    last = _index_after(cold, chunk["date"][-1], chunk["id"][-1])
+                    yield from _chunks(_rows(cold, 0, first), chunk_size)
+                    chunk = _merge_samples(_rows(cold, first, last), chunk)
+                    cold = _rows(cold, last, None)
+                yield chunk
+        finally:
+            result.close()
+
+        if cold is not None:
+            yield from _chunks(cold, chunk_size)
+
+    def get_sample_page(
+        self,
+        subject_id: int,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        sources: Sequence[str] = SAMPLE_SOURCES,
+    ) -> Dict[str, "np.ndarray"]:
+        """
+        Get one page of samples using keyset pagination on (date, id).
+
+        Args:
+            subject_id: The ID of the subject
+            limit: Maximum number of samples in the page
+            after: (date, id) of the last sample of the previous page (optional)
+            start: Only include samples at or after this time (optional)
+            end: Only include samples at or before this time (optional)
+            sources: Point sources to include ("mouse" and/or "gaze")
+
+        Returns:
+            Dictionary of NumPy columns, as returned by ``get_sample_arrays``
+        """
+        stored = self._stored_samples(subject_id, sources)
+        if stored is not None:
+            return _slice_window(stored, start, end, after, limit)
+
+        stmt = self._sample_statement(subject_id, start, end, sources)
+        if after is not None:
+            after_date, after_id = after
+            stmt = stmt.where(
+                or_(
+                    Measurement.date > after_date,
+                    and_(Measurement.date == after_date, Measurement.id > after_id),
+                )
+            )
+        stmt = stmt.limit(limit)
+        rows = self._session_for(subject_id).execute(stmt).all()
+        arrays = self._to_arrays(rows, sources)
+
+        cold = self._cold_samples(subject_id, sources)
+        if cold is not None:
+            cold = _slice_window(cold, start, end, after, limit)
+            arrays = _merge_samples(cold, arrays)
+            arrays = {name: values[:limit] for name, values in arrays.items()}
+        return arrays
+
+    def delete_samples(self, subject_id: int, max_id: int) -> int:
+        """
+        Delete the measurements of a subject up to an ID, with their points.
+
+        Args:
+            subject_id: The ID of the subject
+            max_id: Highest measurement ID to delete
+
+        Returns:
+            Number of measurements deleted
+        """
+        session = self._session_for(subject_id)
+        condition = and_(Measurement.subject_id == subject_id, Measurement.id <= max_id)
+
+        point_ids = session.scalars(
+            select(Measurement.mouse_point_id)
+            .where(condition)
+            .union_all(select(Measurement.gaze_point_id).where(condition))
+        ).all()
+        point_ids = [point_id for point_id in point_ids if point_id is not None]
+
+        deleted = session.execute(delete(Measurement).where(condition)).rowcount
+        for i in range(0, len(point_ids), DELETE_CHUNK_SIZE):
+            chunk = point_ids[i : i + DELETE_CHUNK_SIZE]
+            session.execute(delete(Point).where(Point.id.in_(chunk)))
+        return deleted
+
+    def merge_cold_samples(
+        self, subject_id: int, arrays: Dict[str, "np.ndarray"]
+    ) -> Dict[str, "np.ndarray"]:
+        """
+        Merge a subject's cold samples into samples read from the database.
+
+        Args:
+            subject_id: The ID of the subject
+            arrays: Sample columns with every source, ordered by (date, id)
+
+        Returns:
+            Dictionary of NumPy columns ordered by (date, id)
+        """
+        cold = self._cold_samples(subject_id, SAMPLE_SOURCES)
+        if cold is None:
+            return arrays
+        return _merge_samples(cold, arrays)
+
+    def commit(self) -> None:
+        """Commit the sample shards in use, then the main database."""
+        router = get_shard_router()
+        if router is not None:
+            router.commit()
+        super().commit()
+
+    def rollback(self) -> None:
+        """Roll back the sample shards in use and the main database."""
+        router = get_shard_router()
+        if router is not None:
+            router.rollback()
+        super().rollback()
+
+    def _session_for(self, subject_id: int):
+        """Get the session holding a subject's samples."""
+        router = get_shard_router()
+        if router is None:
+            return db.session
+        return router.session_for_subject(subject_id)
+
+    def append_to_store(self, subject_id: int, ids: Sequence[int], samples) -> None:
+        """
+        Append saved samples to the subject's sample store, if enabled.
+
+        Call after the samples are committed, so the store never holds
+        samples that are not in the database. If the store does not hold
+        every other sample of the subject, or already holds these, it is
+        rebuilt from the database and cold storage instead.
+
+        Args:
+            subject_id: The ID of the subject
+            ids: Measurement IDs returned by ``bulk_create_samples``
+            samples: The tuples passed to ``bulk_create_samples``
+        """
+        store = get_sample_store()
+        if store is None or not samples:
+            return
+        self._sync_store(store, subject_id, _to_records(ids, samples))
+
+    def refresh_store(self, subject_id: int) -> None:
+        """
+        Rebuild a subject's sample store if it is missing saved samples.
+
+        Args:
+            subject_id: The ID of the subject
+        """
+        store = get_sample_store()
+        if store is None:
+            return
+        self._sync_store(store, subject_id, _to_records([], []))
+
+    def _sync_store(self, store, subject_id, records):
+        """Append records to a subject's store, or rebuild it if out of step."""
+        store.sync(
+            subject_id,
+            records,
+            lambda: self._sample_count(subject_id),
+            lambda: self._saved_records(subject_id),
+        )
+
+    def _sample_count(self, subject_id):
+        """Number of saved samples of a subject, from its counter."""
+        return (
+            db.session.execute(
+                select(Subject.sample_count).where(Subject.id == subject_id)
+            ).scalar()
+            or 0
+        )
+
+    def _saved_records(self, subject_id):
+        """Every saved sample of a subject as sample store records."""
+        import numpy as np
+        from storage.sample_store import record_dtype
+
+        stmt = self._sample_statement(subject_id, None, None, SAMPLE_SOURCES)
+        rows = self._session_for(subject_id).execute(stmt).all()
+        arrays = self.merge_cold_samples(
+            subject_id, self._to_arrays(rows, SAMPLE_SOURCES)
+        )
+
+        records = np.empty(len(arrays["id"]), dtype=record_dtype())
+        for name in records.dtype.names:
+            records[name] = arrays[name]
+        return records
+
+    def _stored_samples(self, subject_id, sources):
+        """Open a subject's sample store if it holds every saved sample."""
+        store = get_sample_store()
+        if store is None:
+            return None
+
+        expected = self._sample_count(subject_id)
+        if not expected or store.count(subject_id) != expected:
+            return None
+        return store.read(subject_id, _column_names(sources))
+
+    def _cold_samples(self, subject_id, sources):
+        """Open a subject's cold samples, if it has been compacted."""
+        store = get_cold_store()
+        if store is None:
+            return None
+        return store.read(subject_id, _column_names(sources))
+
+    def _sample_statement(self, subject_id, start, end, sources):
+        """Build the joined select used by the sample readers."""
+        columns = [Measurement.id, Measurement.date]
+        joins = []
+        for source in sources:
+            point = aliased(Point)
+            columns += [point.x, point.y]
+            joins.append((point, SOURCE_COLUMNS[source] == point.id))
+
+        stmt = select(*columns)
+        for point, condition in joins:
+            stmt = stmt.outerjoin(point, condition)
+
+        stmt = stmt.where(Measurement.subject_id == subject_id).order_by(
+            Measurement.date, Measurement.id
+        )
+        if start is not None:
+            stmt = stmt.where(Measurement.date >= start)
+        if end is not None:
+            stmt = stmt.where(Measurement.date <= end)
+        return stmt
+
+    def _to_arrays(self, rows, sources):
+        """Convert result rows into a dictionary of NumPy columns."""
+        import numpy as np
+
+        names = [f"{axis}_{source}" for source in sources for axis in ("x", "y")]
+        columns = list(zip(*rows)) if rows else [()] * (len(names) + 2)
+
+        arrays = {
+            "id": np.array(columns[0], dtype=np.int64),
+            "date": np.array(columns[1], dtype="datetime64[us]"),
+        }
+        for name, values in zip(names, columns[2:]):
+            arrays[name] = np.array(values, dtype=np.float64)
+        return arrays
+
+
+def _column_names(sources):
+    """Names of the sample columns for the given point sources."""
+    return ["id", "date"] + [
+        f"{axis}_{source}" for source in sources for axis in ("x", "y")
+    ]
+
+
+def _slice_window(columns, start=None, end=None, after=None, limit=None):
+    """
+    Slice columns sorted by (date, id) to a time window and page.
+
+    Only ``searchsorted`` is used, so memory-mapped columns are not copied.
+    """
+    import numpy as np
+
+    dates = columns["date"]
+    lo, hi = 0, len(dates)
+    if start is not None:
+        lo = int(np.searchsorted(dates, np.datetime64(start, "us"), "left"))
+    if end is not None:
+        hi = int(np.searchsorted(dates, np.datetime64(end, "us"), "right"))
+    if after is not None:
+        lo = max(lo, _index_after(columns, *after))
+    if limit is not None:
+        hi = min(hi, lo + limit)
+
+    return {name: values[lo:hi] for name, values in columns.items()}
+
+
+def _rows(columns, lo, hi):
+    """Slice every column to the rows ``lo:hi``."""
+    return {name: values[lo:hi] for name, values in columns.items()}
+
+
+def _chunks(columns, size):
+    """Split columns into consecutive slices of at most ``size`` rows."""
+    for lo in range(0, len(columns["id"]), size):
+        yield _rows(columns, lo, lo + size)
+
+
+def _index_after(columns, date, sample_id):
+    """Index of the first row after (date, sample_id) in columns sorted by both."""
+    import numpy as np
+
+    dates = columns["date"]
+    date = np.datetime64(date, "us")
+    first = int(np.searchsorted(dates, date, "left"))
+    last = int(np.searchsorted(dates, date, "right"))
+    ids = columns["id"][first:last]
+    return first + int(np.searchsorted(ids, sample_id, "right"))
+
+
+def _to_records(ids, samples):
+    """Pack saved samples into sample store records."""
+    import numpy as np
+    from storage.sample_store import record_dtype
+
+    records = np.empty(len(samples), dtype=record_dtype())
+    records["id"] = ids
+    records["date"] = [sample[0] for sample in samples]
+    for i, name in enumerate(("x_mouse", "y_mouse", "x_gaze", "y_gaze"), start=1):
+        records[name] = [
+            np.nan if sample[i] is None else sample[i] for sample in samples
+        ]
+    return records
+
+
+def _merge_samples(first, second):
+    """Merge two sets of sample columns, keeping them ordered by (date, id)."""
+    if not len(second["id"]):
+        return first
+    if not len(first["id"]):
+        return second
+
+    import numpy as np
+
+    merged = {name: np.concatenate([first[name], second[name]]) for name in first}
+    order = np.lexsort((merged["id"], merged["date"]))
+    return {name: values[order] for name, values in merged.items()}
+
+
+def _reserve_ids(connection, table: str, count: int) -> List[int]:
+    """Take ``count`` ids from the sequence of a PostgreSQL table."""
+    result = connection.execute(
+        text(
+            "SELECT nextval(pg_get_serial_sequence(:table, 'id')) "
+            "FROM generate_series(1, :count)"
+        ),
+        {"table": table, "count": count},
+    )
+    return sorted(result.scalars().all())
@@ -1,8 +1,10 @@
 """Repository for Study model operations."""
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
-from db.models import Study, db
+from sqlalchemy import func
+from db.models import Study, Subject, db
+from db.sharding import get_shard_router
 from .base_repository import BaseRepository
 
 
@@ -46,6 +48,21 @@ class StudyRepository(BaseRepository[Study]):
         """Get all studies ordered by creation date (newest first)."""
         return Study.query.order_by(Study.created_at.desc()).all()
 
+    def get_studies_with_subject_counts(self) -> List[Tuple[Study, int]]:
+        """
+        Get all studies with their number of subjects in one grouped query.
+
+        Returns:
+            List of (Study, subject_count) ordered by creation date (newest first)
+        """
+        return (
+            db.session.query(Study, func.count(Subject.id))
+            .outerjoin(Subject, Subject.study_id == Study.id)
+            .group_by(Study.id)
+            .order_by(Study.created_at.desc())
+            .all()
+        )
+
     def get_study_by_id(self, study_id: int) -> Optional[Study]:
         """Get a study by its ID."""
         return Study.query.get(study_id)
@@ -95,16 +112,33 @@ class StudyRepository(BaseRepository[Study]):
         """
         Delete a study by its ID.
 
+        Its subjects are kept without a study. With sample sharding, a study
+        whose subjects have samples is not deleted: the samples are in the
+        study's shard, and the subjects would then be looked up in the
+        shard of subjects without a study.
+
         Args:
             study_id: ID of the study to delete
 
         Returns:
             True if deleted, False if not found
+
+        Raises:
+            ValueError: If sharding is enabled and the study has samples
         """
         study = self.get_study_by_id(study_id)
         if not study:
             return False
 
+        if get_shard_router() is not None:
+            sampled = Subject.query.filter(
+                Subject.study_id == study_id, Subject.sample_count > 0
+            ).first()
+            if sampled is not None:
+                raise ValueError(
+                    f"Study {study_id} has samples in its shard and cannot be deleted"
+                )
+
         db.session.delete(study)
         db.session.commit()
         return True
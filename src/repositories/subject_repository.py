@@ -2,8 +2,10 @@
 Repository for Subject entity operations.
 """
 
-from typing import List, Optional
-from db.models import Subject
+from typing import List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import func
+from db.models import db, Subject
 from .base_repository import BaseRepository
 
 
@@ -32,14 +34,24 @@ class SubjectRepository(BaseRepository[Subject]):
         self.add(subject)
         return subject
 
-    def get_all_subjects(self) -> List[Subject]:
+    def get_all_subjects(self, min_quality: Optional[float] = None) -> List[Subject]:
         """
         Get all subjects.
 
+        Args:
+            min_quality: Only include subjects whose calibration score is at
+                least this; subjects without a score are left out too
+
         Returns:
             List of all subjects
         """
-        return self.get_all()
+        if min_quality is None:
+            return self.get_all()
+        return (
+            self.model.query.filter(Subject.calibration_score >= min_quality)
+            .order_by(Subject.id)
+            .all()
+        )
 
     def get_subject_by_id(self, subject_id: int) -> Optional[Subject]:
         """
@@ -52,3 +64,165 @@ class SubjectRepository(BaseRepository[Subject]):
             The subject if found, None otherwise
         """
         return self.get_by_id(subject_id)
+
+    def get_subject_summaries(
+        self, study_id: Optional[int], page: int = 1, per_page: int = 50
+    ) -> List[Tuple[Subject, int, Optional[datetime]]]:
+        """
+        Get one page of the subjects of a study with their activity.
+
+        Sample counts and last activity come from the subjects' own counters,
+        which are kept up to date on every write, so the page is loaded
+        without reading the measurements. The counters also cover samples
+        moved to cold storage or kept in sample shards.
+
+        Args:
+            study_id: ID of the study, or None for subjects without a study
+            page: Page number, starting at 1
+            per_page: Number of subjects per page
+
+        Returns:
+            List of (Subject, sample_count, last_activity) ordered by ID
+        """
+        subjects = (
+            self.model.query.filter(Subject.study_id == study_id)
+            .order_by(Subject.id)
+            .limit(per_page)
+            .offset((page - 1) * per_page)
+            .all()
+        )
+        return [(s, s.sample_count, s.updated_at) for s in subjects]
+
+    def get_subjects_by_study(
+        self, study_id: Optional[int], min_quality: Optional[float] = None
+    ) -> List[Subject]:
+        """
+        Get all the subjects of a study.
+
+        Args:
+            study_id: ID of the study, or None for subjects without a study
+            min_quality: Only include subjects whose calibration score is at
+                least this; subjects without a score are left out too
+
+        Returns:
+            List of subjects ordered by ID
+        """
+        query = self.model.query.filter(Subject.study_id == study_id)
+        if min_quality is not None:
+            query = query.filter(Subject.calibration_score >= min_quality)
+        return query.order_by(Subject.id).all()
+
+    def count_subjects_by_study(self, study_id: Optional[int]) -> int:
+        """
+        Count the subjects of a study.
+
+        Args:
+            study_id: ID of the study, or None for subjects without a study
+
+        Returns:
+            Number of subjects
+        """
+        return self.model.query.filter(Subject.study_id == study_id).count()
+
+    def get_group_version(self, study_id: Optional[int] = None) -> str:
+        """
+        Get a data version token covering several subjects.
+
+        Computed from the per-subject counters with one aggregate query, so
+        the sample table is not read.
+
+        Args:
+            study_id: Only include subjects of this study; all subjects if None
+
+        Returns:
+            Version token that changes whenever any included subject changes
+        """
+        query = db.session.query(
+            func.count(Subject.id),
+            func.max(Subject.last_sample_id),
+            func.sum(Subject.sample_count),
+            func.sum(Subject.tasklog_count),
+            func.sum(Subject.metadata_version),
+        )
+        if study_id is not None:
+            query = query.filter(Subject.study_id == study_id)
+
+        return ".".join(str(value or 0) for value in query.one())
+
+    def record_samples(self, subject_id: int, count: int, last_sample_id: int) -> None:
+        """
+        Update the data version counters after saving samples.
+
+        The update is done in SQL so concurrent batches do not lose counts.
+
+        Args:
+            subject_id: The ID of the subject
+            count: Number of samples that were added
+            last_sample_id: ID of the newest measurement that was added
+        """
+        self.model.query.filter_by(id=subject_id).update(
+            {
+                Subject.sample_count: Subject.sample_count + count,
+                Subject.last_sample_id: last_sample_id,
+                Subject.updated_at: datetime.now(),
+            },
+            synchronize_session=False,
+        )
+
+    def record_tasklogs(self, subject_id: int, count: int) -> None:
+        """
+        Update the data version counters after saving task logs.
+
+        Args:
+            subject_id: The ID of the subject
+            count: Number of task logs that were added
+        """
+        self.model.query.filter_by(id=subject_id).update(
+            {
+                Subject.tasklog_count: Subject.tasklog_count + count,
+                Subject.updated_at: datetime.now(),
+            },
+            synchronize_session=False,
+        )
+
+    def record_session_metadata(self, subject_id: int, metadata: dict) -> bool:
+        """
+        Store the viewport and frame, or the calibration quality, of a session.
+
+        Bumps the metadata version, so cached normalized results, results
+        filtered by calibration quality and ETags change with it.
+
+        Args:
+            subject_id: The ID of the subject
+            metadata: Values for the viewport, frame or calibration columns
+
+        Returns:
+            True if the subject exists, False otherwise
+        """
+        updated = self.model.query.filter_by(id=subject_id).update(
+            {
+                **{getattr(Subject, name): value for name, value in metadata.items()},
+                Subject.metadata_version: Subject.metadata_version + 1,
+                Subject.updated_at: datetime.now(),
+            },
+            synchronize_session=False,
+        )
+        return updated > 0
+
+    def get_idle_subjects(self, before: datetime) -> List[Subject]:
+        """
+        Get the subjects with samples whose data has not changed recently.
+
+        Args:
+            before: Only include subjects last updated before this time
+
+        Returns:
+            List of subjects ordered by ID
+        """
+        return (
+            self.model.query.filter(
+                Subject.sample_count > 0, Subject.updated_at < before
+            )
+            .order_by(Subject.id)
+            .all()
+        )
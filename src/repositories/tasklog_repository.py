@@ -2,9 +2,10 @@
 Repository for TaskLog entity operations.
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
-from db.models import TaskLog
+from sqlalchemy import insert
+from db.models import db, Subject, TaskLog
 from .base_repository import BaseRepository
 
 
@@ -42,6 +43,20 @@ class TaskLogRepository(BaseRepository[TaskLog]):
         self.add(tasklog)
         return tasklog
 
+    def bulk_create_tasklogs(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert many task logs with a single executemany.
+
+        Args:
+            rows: Column values for each task log
+
+        Returns:
+            Number of rows inserted
+        """
+        if rows:
+            db.session.execute(insert(TaskLog), rows)
+        return len(rows)
+
     def get_tasklogs_by_subject(self, subject_id: int) -> List[TaskLog]:
         """
         Get all task logs for a specific subject.
@@ -65,3 +80,28 @@ class TaskLogRepository(BaseRepository[TaskLog]):
             Number of task logs
         """
         return self.model.query.filter_by(subject_id=subject_id).count()
+
+    def get_task_times_by_study(
+        self, study_id: Optional[int], min_quality: Optional[float] = None
+    ) -> List[Tuple[Optional[str], datetime, Optional[datetime]]]:
+        """
+        Get the task and times of every task log of a study's subjects.
+
+        Args:
+            study_id: ID of the study, or None for subjects without a study
+            min_quality: Only include subjects whose calibration score is at
+                least this
+
+        Returns:
+            List of (task_description, start_time, end_time) ordered by ID
+        """
+        query = (
+            db.session.query(
+                TaskLog.task_description, TaskLog.start_time, TaskLog.end_time
+            )
+            .join(Subject, Subject.id == TaskLog.subject_id)
+            .filter(Subject.study_id == study_id)
+        )
+        if min_quality is not None:
+            query = query.filter(Subject.calibration_score >= min_quality)
+        return query.order_by(TaskLog.id).all()
@@ -1,9 +1,17 @@
 """Repository for User model operations."""
 
 from datetime import datetime
-from db.models import User
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+from db.models import db, User
+from state import TTLCache
 from .base_repository import BaseRepository
 
+# Seconds a loaded user is reused before it is read again from the database
+USER_CACHE_TTL = 60
+
+_user_cache = TTLCache(ttl=USER_CACHE_TTL)
+
 
 class UserRepository(BaseRepository):
     """Repository for managing User entities."""
@@ -11,6 +19,35 @@ class UserRepository(BaseRepository):
     def __init__(self):
         super().__init__(User)
 
+    def get_cached_by_id(self, user_id: int) -> User | None:
+        """
+        Get a user by ID, reusing recently loaded users.
+
+        Used by the Flask-Login user loader, which runs on every authenticated
+        request. The cache stores the column values and attaches a copy to the
+        current session without a SELECT. Entries are dropped when the user is
+        updated or deleted, and expire after ``USER_CACHE_TTL`` seconds.
+
+        Args:
+            user_id: The ID of the user
+
+        Returns:
+            The user if found, None otherwise
+        """
+        snapshot = _user_cache.get(user_id)
+        if snapshot is None:
+            user = self.get_by_id(user_id)
+            if user is not None:
+                _user_cache.set(
+                    user_id,
+                    {c.key: getattr(user, c.key) for c in User.__table__.columns},
+                )
+            return user
+
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
     def get_user_by_username(self, username: str) -> User | None:
         """Get a user by username."""
         return User.query.filter_by(username=username).first()
@@ -29,3 +66,10 @@ class UserRepository(BaseRepository):
     def user_exists(self, username: str) -> bool:
         """Check if a user exists by username."""
         return User.query.filter_by(username=username).first() is not None
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    """Drop a user from the loader cache when it changes."""
+    _user_cache.invalidate(target.id)
@@ -1,10 +1,18 @@
 """
 Configuration management module for the application.
-This module handles application configuration from JSON files.
+This module handles application configuration from JSON files and the small
+in-memory caches that hold process-wide state.
 """
 
 from .config_manager import ConfigManager
+from .ttl_cache import TTLCache
+from .ingest_pressure import IngestPressure
+from .job_runner import JobRunner, get_job_runner
 
 __all__ = [
     "ConfigManager",
+    "TTLCache",
+    "IngestPressure",
+    "JobRunner",
+    "get_job_runner",
 ]
@@ -2,28 +2,59 @@
 Configuration manager for loading and managing application configuration.
 """
 
+import hashlib
 import json
 import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Dict, Any, Optional
 
 
+@dataclass
+class JsonDocument:
+    """A parsed JSON file together with its pre-serialized representation."""
+
+    data: Any
+    body: bytes
+    etag: str
+    mtime_ns: int
+    checked_at: float
+
+    @property
+    def modified_at(self) -> datetime:
+        """Modification time of the file."""
+        return datetime.fromtimestamp(self.mtime_ns / 1e9).astimezone()
+
+
 class ConfigManager:
     """Manages application configuration from JSON files."""
 
-    def __init__(self, config_dir: str = None):
+    def __init__(
+        self, config_dir: str = None, watch: bool = False, check_interval: float = 1.0
+    ):
         """
         Initialize the configuration manager.
 
         Args:
             config_dir: Directory containing configuration files
+            watch: Keep parsed files in memory and reload them when their
+                modification time changes
+            check_interval: Minimum seconds between modification time checks
+                when watching
         """
         if config_dir is None:
             basedir = os.path.abspath(os.path.dirname(__file__))
             config_dir = os.path.join(basedir, "..", "config")
 
         self.config_dir = os.path.abspath(config_dir)
+        self.watch = watch
+        self.check_interval = check_interval
         self._config: Dict[str, Any] = {}
         self._tasks: Dict[str, Any] = {}
+        self._documents: Dict[str, JsonDocument] = {}
+        self._lock = threading.Lock()
 
     def load_config(self, filename: str = "config.json") -> Dict[str, Any]:
         """
@@ -65,6 +96,68 @@ class ConfigManager:
 
         return self._tasks
 
+    def get_document(self, filename: str) -> JsonDocument:
+        """
+        Get a JSON file parsed and serialized, reading it only when needed.
+
+        Documents are kept in memory. When watching, the file's modification
+        time is checked at most every ``check_interval`` seconds and the file
+        is parsed again only if it changed; an invalid edit keeps the last
+        valid version. Without watching, each file is read once.
+
+        Args:
+            filename: Name of the file in the configuration directory
+
+        Returns:
+            The cached JsonDocument
+
+        Raises:
+            FileNotFoundError: If the file has never been loaded and is missing
+        """
+        with self._lock:
+            document = self._documents.get(filename)
+            now = time.monotonic()
+
+            if document is not None and (
+                not self.watch or now - document.checked_at < self.check_interval
+            ):
+                return document
+
+            path = os.path.join(self.config_dir, filename)
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                if document is not None:
+                    document.checked_at = now
+                    return document
+                raise FileNotFoundError(f"Configuration file not found: {path}")
+
+            if document is not None and document.mtime_ns == mtime_ns:
+                document.checked_at = now
+                return document
+
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except ValueError:
+                if document is not None:
+                    document.checked_at = now
+                    return document
+                raise
+
+            body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode(
+                "utf-8"
+            )
+            document = JsonDocument(
+                data=data,
+                body=body,
+                etag=hashlib.sha1(body).hexdigest(),
+                mtime_ns=mtime_ns,
+                checked_at=now,
+            )
+            self._documents[filename] = document
+            return document
+
     def get(self, key: str, default: Any = None) -> Any:
         """
         Get a configuration value by key.
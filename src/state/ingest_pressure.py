@@ -0,0 +1,84 @@
+"""
+Ingest load tracking used to tell clients how often to upload samples.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class IngestPressure:
+    """
+    Track commit latency and concurrent uploads, and recommend batch sizes.
+
+    Latency is smoothed with an exponentially weighted moving average. The
+    load is the larger of the latency relative to ``target_latency_ms`` and
+    the uploads in flight relative to ``target_in_flight``. Below 1 the
+    server is keeping up and clients get the minimum batch size and flush
+    interval; above 1 both grow with the load, so each client sends fewer,
+    larger requests. The state is per process.
+    """
+
+    def __init__(
+        self,
+        target_latency_ms: float = 50.0,
+        target_in_flight: int = 4,
+        batch_size_range=(20, 500),
+        flush_interval_range_ms=(1000, 15000),
+        alpha: float = 0.2,
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            target_latency_ms: Commit latency the server can sustain
+            target_in_flight: Concurrent uploads the server can sustain
+            batch_size_range: Minimum and maximum recommended batch size
+            flush_interval_range_ms: Minimum and maximum recommended
+                milliseconds between uploads
+            alpha: Weight of the newest latency in the moving average
+        """
+        self.target_latency_ms = target_latency_ms
+        self.target_in_flight = target_in_flight
+        self.batch_size_range = batch_size_range
+        self.flush_interval_range_ms = flush_interval_range_ms
+        self.alpha = alpha
+        self.latency_ms = 0.0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self):
+        """Count an upload as in flight and record its latency when done."""
+        with self._lock:
+            self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.in_flight -= 1
+                self.latency_ms += self.alpha * (elapsed_ms - self.latency_ms)
+
+    def load(self) -> float:
+        """Current load, where 1.0 means the server is at its targets."""
+        return max(
+            self.latency_ms / self.target_latency_ms,
+            self.in_flight / self.target_in_flight,
+        )
+
+    def recommendation(self) -> Dict[str, int]:
+        """
+        Get the batching that clients should use.
+
+        Returns:
+            Dictionary with batch_size and flush_interval_ms
+        """
+        factor = max(1.0, self.load())
+        low, high = self.batch_size_range
+        batch_size = min(high, round(low * factor))
+        low, high = self.flush_interval_range_ms
+        flush_interval_ms = min(high, round(low * factor))
+        return {"batch_size": batch_size, "flush_interval_ms": flush_interval_ms}
@@ -0,0 +1,88 @@
+"""
+Thread pool that runs background jobs inside the Flask app context.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+from flask import current_app
+
+DEFAULT_JOB_WORKERS = 2
+
+
+class JobRunner:
+    """
+    Run callables on a small pool of worker threads, off the request thread.
+
+    Each call runs inside an app context of the given Flask app, so it can
+    use the database session and the app config like a request does. The
+    pool is created on first use and is per process; with ``workers`` set
+    to 0, calls run synchronously in the caller's thread.
+    """
+
+    def __init__(self, workers: int = DEFAULT_JOB_WORKERS):
+        """
+        Initialize the runner.
+
+        Args:
+            workers: Number of worker threads, or 0 to run jobs inline
+        """
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, app, function: Callable, *args) -> Optional[Future]:
+        """
+        Run a function in the app context of ``app``.
+
+        Args:
+            app: Flask app whose context the function runs in
+            function: Callable to run
+            args: Positional arguments for the callable
+
+        Returns:
+            Future of the call, or None if it ran inline
+        """
+        if self.workers <= 0:
+            function(*args)
+            return None
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="job"
+                )
+        return self._executor.submit(_in_app_context, app, function, *args)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads, waiting for running jobs if ``wait``."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+def get_job_runner() -> JobRunner:
+    """
+    Get the job runner of the current Flask app.
+
+    ``JOB_WORKERS`` in the app config sets the number of worker threads;
+    0 runs jobs inline, which is useful in tests and scripts.
+
+    Returns:
+        The app's JobRunner
+    """
+    workers = current_app.config.get("JOB_WORKERS", DEFAULT_JOB_WORKERS)
+
+    runner = current_app.extensions.get("job_runner")
+    if runner is None or runner.workers != workers:
+        if runner is not None:
+            runner.shutdown(wait=False)
+        runner = JobRunner(workers)
+        current_app.extensions["job_runner"] = runner
+    return runner
+
+
+def _in_app_context(app, function, *args):
+    with app.app_context():
+        return function(*args)
@@ -0,0 +1,18 @@
+"""
+Storage module for the application.
+This module handles files kept alongside the database, such as cached results
+and the samples of finished sessions.
+"""
+
+from .result_cache import ResultCache, get_result_cache
+from .cold_store import ColdStore, get_cold_store
+from .sample_store import SampleStore, get_sample_store
+
+__all__ = [
+    "ResultCache",
+    "get_result_cache",
+    "ColdStore",
+    "get_cold_store",
+    "SampleStore",
+    "get_sample_store",
+]
@@ -0,0 +1,171 @@
+"""
+Columnar files for the samples of finished sessions (cold storage).
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from flask import current_app
+
+# Columns stored for every subject, in file order
+COLUMNS = ("id", "date", "x_mouse", "y_mouse", "x_gaze", "y_gaze")
+
+
+class ColdStore:
+    """
+    Per-subject columnar sample files, read through memory maps.
+
+    Each subject has a directory ``subject_<id>`` with one ``.npy`` file per
+    column, sorted by (date, id), and a ``meta.json`` describing them.
+    Uncompressed columns are opened with ``mmap_mode="r"``, so a time window
+    is a zero-copy slice and only the pages actually read are loaded.
+    Subjects can instead be written as a single compressed ``.npz`` to save
+    space; those are decompressed on every read and cannot be memory-mapped.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory where the subject files are stored
+        """
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, subject_id: int) -> str:
+        """
+        Get the directory of a subject.
+
+        Args:
+            subject_id: The ID of the subject
+
+        Returns:
+            Absolute path of the subject's directory
+        """
+        return os.path.join(self.directory, f"subject_{subject_id}")
+
+    def has(self, subject_id: int) -> bool:
+        """Whether a subject has samples in cold storage."""
+        return os.path.exists(os.path.join(self.path_for(subject_id), "meta.json"))
+
+    def meta(self, subject_id: int) -> Optional[Dict]:
+        """
+        Get the description of a subject's files.
+
+        Returns:
+            Dictionary with count, start, end, last_id, compressed and
+            compacted_at, or None if the subject is not in cold storage
+        """
+        try:
+            with open(
+                os.path.join(self.path_for(subject_id), "meta.json"), encoding="utf-8"
+            ) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write(self, subject_id: int, arrays: Dict, compress: bool = False) -> None:
+        """
+        Replace the cold samples of a subject.
+
+        The files are written to a temporary directory that is then moved in
+        place, so readers never see a partial subject.
+
+        Args:
+            subject_id: The ID of the subject
+            arrays: Sample columns (see ``COLUMNS``) sorted by (date, id)
+            compress: Store a compressed ``.npz`` instead of memory-mappable
+                ``.npy`` files
+        """
+        import numpy as np
+
+        target = self.path_for(subject_id)
+        staging = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+        try:
+            if compress:
+                np.savez_compressed(
+                    os.path.join(staging, "samples.npz"),
+                    **{name: arrays[name] for name in COLUMNS},
+                )
+            else:
+                for name in COLUMNS:
+                    np.save(os.path.join(staging, f"{name}.npy"), arrays[name])
+
+            dates = arrays["date"]
+            meta = {
+                "count": int(len(dates)),
+                "start": str(dates[0]) if len(dates) else None,
+                "end": str(dates[-1]) if len(dates) else None,
+                "last_id": int(arrays["id"].max()) if len(dates) else None,
+                "compressed": compress,
+                "compacted_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+
+            if os.path.exists(target):
+                retired = tempfile.mkdtemp(dir=self.directory, prefix=".old-")
+                os.replace(target, os.path.join(retired, "subject"))
+                os.replace(staging, target)
+                shutil.rmtree(retired, ignore_errors=True)
+            else:
+                os.replace(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def read(self, subject_id: int, columns: Iterable[str] = COLUMNS) -> Optional[Dict]:
+        """
+        Open the cold samples of a subject.
+
+        Args:
+            subject_id: The ID of the subject
+            columns: Columns to open
+
+        Returns:
+            Dictionary of read-only arrays (memory maps unless compressed),
+            or None if the subject is not in cold storage
+        """
+        import numpy as np
+
+        meta = self.meta(subject_id)
+        if meta is None:
+            return None
+
+        path = self.path_for(subject_id)
+        if meta["compressed"]:
+            with np.load(os.path.join(path, "samples.npz")) as data:
+                return {name: data[name] for name in columns}
+
+        return {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in columns
+        }
+
+    def delete(self, subject_id: int) -> None:
+        """Remove the cold samples of a subject."""
+        shutil.rmtree(self.path_for(subject_id), ignore_errors=True)
+
+
+def get_cold_store() -> Optional[ColdStore]:
+    """
+    Get the cold store of the current Flask app.
+
+    Cold storage is enabled by setting ``COLD_STORAGE_DIR`` in the app config.
+
+    Returns:
+        The app's ColdStore, or None if cold storage is disabled
+    """
+    directory = current_app.config.get("COLD_STORAGE_DIR")
+    if not directory:
+        return None
+
+    store = current_app.extensions.get("cold_store")
+    if store is None or store.directory != os.path.abspath(directory):
+        store = ColdStore(directory)
+        current_app.extensions["cold_store"] = store
+    return store
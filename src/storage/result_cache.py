@@ -0,0 +1,170 @@
+"""
+On-disk cache for generated artifacts such as CSV exports and heatmaps.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Callable, Optional
+from flask import current_app
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class ResultCache:
+    """
+    Size-bounded cache of generated artifacts stored as files.
+
+    Entries are addressed by a digest of (scope, format, data version) and
+    grouped in one directory per scope (for example ``subject-3`` or
+    ``study-1``), so everything derived from a scope can be dropped at once.
+    The least recently used entries are evicted when the cache grows beyond
+    ``max_bytes``.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Directory where the artifacts are stored
+            max_bytes: Maximum total size of the cached artifacts
+        """
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, scope: str, fmt: str, version: str) -> str:
+        """
+        Get the file path of an entry.
+
+        Args:
+            scope: Owner of the data, e.g. ``subject-3``
+            fmt: Format of the artifact, e.g. ``points.csv``
+            version: Data version the artifact was generated from
+
+        Returns:
+            Absolute path of the entry
+        """
+        digest = hashlib.sha256(f"{scope}\0{fmt}\0{version}".encode("utf-8"))
+        return os.path.join(self.directory, scope, f"{digest.hexdigest()}.{fmt}")
+
+    def get(self, scope: str, fmt: str, version: str) -> Optional[bytes]:
+        """
+        Get a cached artifact.
+
+        Returns:
+            The cached bytes, or None if the entry does not exist
+        """
+        path = self.path_for(scope, fmt, version)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        # Refresh the modification time, which drives LRU eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return data
+
+    def put(self, scope: str, fmt: str, version: str, data: bytes) -> None:
+        """Store an artifact and evict old entries if the cache is too big."""
+        path = self.path_for(scope, fmt, version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so readers never see partial data
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    def get_or_create(
+        self, scope: str, fmt: str, version: str, build: Callable[[], bytes]
+    ) -> bytes:
+        """
+        Get a cached artifact, building and storing it on a miss.
+
+        Args:
+            scope: Owner of the data
+            fmt: Format of the artifact
+            version: Data version the artifact is generated from
+            build: Function that generates the artifact
+
+        Returns:
+            The artifact bytes
+        """
+        data = self.get(scope, fmt, version)
+        if data is None:
+            data = build()
+            self.put(scope, fmt, version, data)
+        return data
+
+    def invalidate(self, scope: str) -> None:
+        """Remove every artifact of a scope."""
+        shutil.rmtree(os.path.join(self.directory, scope), ignore_errors=True)
+
+    def clear(self) -> None:
+        """Remove every artifact."""
+        for scope in os.listdir(self.directory):
+            self.invalidate(scope)
+
+    def size(self) -> int:
+        """Get the total size of the cached artifacts in bytes."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _entries(self):
+        """Yield (path, size, mtime) for every cached artifact."""
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime_ns
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    Get the result cache of the current Flask app.
+
+    The cache is enabled by setting ``RESULT_CACHE_DIR`` in the app config;
+    ``RESULT_CACHE_MAX_BYTES`` bounds its size.
+
+    Returns:
+        The app's ResultCache, or None if caching is disabled
+    """
+    directory = current_app.config.get("RESULT_CACHE_DIR")
+    if not directory:
+        return None
+
+    cache = current_app.extensions.get("result_cache")
+    if cache is None or cache.directory != os.path.abspath(directory):
+        cache = ResultCache(
+            directory,
+            current_app.config.get("RESULT_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES),
+        )
+        current_app.extensions["result_cache"] = cache
+    return cache
@@ -0,0 +1,278 @@
+"""
+Append-only binary sample files, written alongside the database.
+"""
+
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional
+from flask import current_app
+
+try:
+    import fcntl
+except ImportError:  # Windows: only writers of the same process are serialized
+    fcntl = None
+
+# Fields of a sample record, in file order
+FIELDS = ("id", "date", "x_mouse", "y_mouse", "x_gaze", "y_gaze")
+
+
+def record_dtype():
+    """NumPy dtype of one fixed-width (48 byte) little-endian sample record."""
+    import numpy as np
+
+    return np.dtype(
+        [
+            ("id", "<i8"),
+            ("date", "<M8[us]"),
+            ("x_mouse", "<f8"),
+            ("y_mouse", "<f8"),
+            ("x_gaze", "<f8"),
+            ("y_gaze", "<f8"),
+        ]
+    )
+
+
+class SampleStore:
+    """
+    One append-only file of fixed-width sample records per subject.
+
+    Every saved batch is appended as raw records, so the file can be opened
+    with ``numpy.memmap`` and each field is a strided view of it. Samples are
+    usually appended in (date, id) order; reads then slice a time range with
+    ``searchsorted`` without copying. When a batch arrives out of order the
+    subject is marked unsorted and reads go through a sort by (date, id),
+    which is cached until more records are appended.
+
+    Writes to a subject's file hold a lock file next to it, so writers in
+    other processes sharing the directory are serialized too.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory where the sample files are stored
+        """
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._subject_locks = {}
+        self._orders = {}
+
+    def path_for(self, subject_id: int) -> str:
+        """
+        Get the sample file of a subject.
+
+        Args:
+            subject_id: The ID of the subject
+
+        Returns:
+            Absolute path of the file
+        """
+        return os.path.join(self.directory, f"subject_{subject_id}.bin")
+
+    def count(self, subject_id: int) -> int:
+        """Number of complete records stored for a subject."""
+        try:
+            size = os.path.getsize(self.path_for(subject_id))
+        except FileNotFoundError:
+            return 0
+        return size // record_dtype().itemsize
+
+    def append(self, subject_id: int, records) -> None:
+        """
+        Append records to a subject's file.
+
+        Args:
+            subject_id: The ID of the subject
+            records: Structured array with ``record_dtype()``
+        """
+        with self._locked(subject_id):
+            self._append(subject_id, records)
+
+    def replace(self, subject_id: int, records) -> None:
+        """
+        Replace all the records of a subject.
+
+        Args:
+            subject_id: The ID of the subject
+            records: Structured array with ``record_dtype()`` sorted by
+                (date, id)
+        """
+        with self._locked(subject_id):
+            self._replace(subject_id, records)
+
+    def sync(
+        self,
+        subject_id: int,
+        records,
+        total: Callable[[], int],
+        rebuild: Callable[[], "np.ndarray"],
+    ) -> None:
+        """
+        Append a saved batch, or rebuild the file if it is out of step.
+
+        Both callables are called with the subject's lock held. The batch is
+        appended only if the file holds every other sample of the subject
+        and none of this batch; otherwise the file is missing samples or
+        already holds some (it was rebuilt after the batch was saved), and
+        it is replaced with ``rebuild()``.
+
+        Args:
+            subject_id: The ID of the subject
+            records: The saved batch as a structured array with
+                ``record_dtype()``; may be empty to only check the file
+            total: Returns the number of saved samples of the subject,
+                including this batch
+            rebuild: Returns every saved record of the subject, sorted by
+                (date, id)
+        """
+        with self._locked(subject_id):
+            if self.count(subject_id) + len(records) == total():
+                self._append(subject_id, records)
+            else:
+                self._replace(subject_id, rebuild())
+
+    def read(self, subject_id: int, fields: Iterable[str] = FIELDS) -> Optional[Dict]:
+        """
+        Open the samples of a subject ordered by (date, id).
+
+        Args:
+            subject_id: The ID of the subject
+            fields: Fields to return
+
+        Returns:
+            Dictionary of arrays, or None if the subject has no file. The
+            arrays are read-only views of the memory-mapped file unless the
+            records had to be reordered.
+        """
+        import numpy as np
+
+        count = self.count(subject_id)
+        if not count:
+            if not os.path.exists(self.path_for(subject_id)):
+                return None
+            return {name: np.empty(0, dtype=record_dtype()[name]) for name in fields}
+
+        records = np.memmap(
+            self.path_for(subject_id), dtype=record_dtype(), mode="r", shape=(count,)
+        )
+        if not os.path.exists(self._unsorted_marker(subject_id)):
+            return {name: records[name] for name in fields}
+
+        order = self._order(subject_id, records)
+        return {name: records[name][order] for name in fields}
+
+    def delete(self, subject_id: int) -> None:
+        """Remove the samples of a subject."""
+        with self._locked(subject_id):
+            for path in (self.path_for(subject_id), self._unsorted_marker(subject_id)):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._orders.pop(subject_id, None)
+
+    @contextmanager
+    def _locked(self, subject_id):
+        """Hold a subject's lock, in this process and in the lock file."""
+        with self._lock:
+            lock = self._subject_locks.setdefault(subject_id, threading.Lock())
+
+        with lock:
+            if fcntl is None:
+                yield
+                return
+            path = os.path.join(self.directory, f"subject_{subject_id}.lock")
+            with open(path, "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _append(self, subject_id, records):
+        import numpy as np
+
+        if not len(records):
+            return
+
+        last = self._last_record(subject_id)
+        dates, ids = records["date"], records["id"]
+        # Reads page on the (date, id) cursor, so ties in date must also
+        # be in id order, within the batch and across the boundary
+        in_order = bool(
+            np.all(
+                (dates[1:] > dates[:-1])
+                | ((dates[1:] == dates[:-1]) & (ids[1:] > ids[:-1]))
+            )
+        ) and (last is None or (dates[0], ids[0]) > (last["date"], last["id"]))
+
+        with open(self.path_for(subject_id), "ab") as f:
+            f.write(records.tobytes())
+
+        if not in_order:
+            open(self._unsorted_marker(subject_id), "a").close()
+
+    def _replace(self, subject_id, records):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(records.tobytes())
+            os.replace(temp_path, self.path_for(subject_id))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        if os.path.exists(self._unsorted_marker(subject_id)):
+            os.remove(self._unsorted_marker(subject_id))
+        self._orders.pop(subject_id, None)
+
+    def _order(self, subject_id, records):
+        """Permutation sorting the records by (date, id), cached by size."""
+        import numpy as np
+
+        cached = self._orders.get(subject_id)
+        if cached is not None and cached[0] == len(records):
+            return cached[1]
+
+        order = np.lexsort((records["id"], records["date"]))
+        self._orders[subject_id] = (len(records), order)
+        return order
+
+    def _last_record(self, subject_id):
+        """Last complete record of a subject, or None."""
+        import numpy as np
+
+        count = self.count(subject_id)
+        if not count:
+            return None
+        records = np.memmap(
+            self.path_for(subject_id), dtype=record_dtype(), mode="r", shape=(count,)
+        )
+        return records[-1]
+
+    def _unsorted_marker(self, subject_id):
+        return os.path.join(self.directory, f"subject_{subject_id}.unsorted")
+
+
+def get_sample_store() -> Optional[SampleStore]:
+    """
+    Get the sample store of the current Flask app.
+
+    The store is enabled by setting ``SAMPLE_STORE_DIR`` in the app config.
+
+    Returns:
+        The app's SampleStore, or None if it is disabled
+    """
+    directory = current_app.config.get("SAMPLE_STORE_DIR")
+    if not directory:
+        return None
+
+    store = current_app.extensions.get("sample_store")
+    if store is None or store.directory != os.path.abspath(directory):
+        store = SampleStore(directory)
+        current_app.extensions["sample_store"] = store
+    return store
@@ -0,0 +1,341 @@
+"""
+Tests for the analytics module.
+"""
+
+import numpy as np
+from analytics import (
+    lttb_indices,
+    bucket_means,
+    binned_density,
+    normalize_points,
+    normalize_samples,
+    idt_fixations,
+    summarize_subject,
+    grid_string,
+    aoi_string,
+    grid_substitution,
+    region_substitution,
+    edit_distances,
+    pairwise_similarity,
+    calibration_quality,
+)
+
+
+class TestLttbIndices:
+    """Tests for lttb_indices."""
+
+    def test_short_series_is_unchanged(self):
+        """Test that series shorter than the threshold keep every sample."""
+        x = np.array([0.0, 1.0, 2.0])
+        y = np.array([0.0, 1.0, 0.0])
+
+        assert lttb_indices(x, y, 10).tolist() == [0, 1, 2]
+
+    def test_keeps_endpoints_and_threshold(self):
+        """Test that the first and last samples are kept and the size matches."""
+        rng = np.random.default_rng(0)
+        x = rng.uniform(0, 1920, 1000)
+        y = rng.uniform(0, 1080, 1000)
+
+        selected = lttb_indices(x, y, 100)
+
+        assert len(selected) == 100
+        assert selected[0] == 0
+        assert selected[-1] == 999
+        assert np.all(np.diff(selected) > 0)
+
+    def test_keeps_corner_of_path(self):
+        """Test that a sharp turn in the trajectory is preserved."""
+        x = np.concatenate([np.linspace(0, 100, 50), np.full(50, 100.0)])
+        y = np.concatenate([np.zeros(50), np.linspace(0, 100, 50)])
+
+        selected = lttb_indices(x, y, 3)
+
+        assert selected.tolist()[0] == 0
+        assert selected.tolist()[-1] == 99
+        assert x[selected[1]] == 100.0 and y[selected[1]] < 5.0
+
+
+class TestBucketMeans:
+    """Tests for bucket_means."""
+
+    def test_averages_each_bucket(self):
+        """Test averaging samples over fixed-width time buckets."""
+        t = np.array([0.0, 0.5, 1.0, 1.5, 2.0])
+        x = np.array([0.0, 2.0, 4.0, 6.0, 8.0])
+        y = np.array([1.0, 1.0, 3.0, 3.0, 5.0])
+
+        bt, bx, by = bucket_means(t, x, y, 2)
+
+        assert bt.tolist() == [0.25, 1.5]
+        assert bx.tolist() == [1.0, 6.0]
+        assert by.tolist() == [1.0, 11.0 / 3.0]
+
+    def test_empty_input(self):
+        """Test that an empty trajectory stays empty."""
+        empty = np.array([], dtype=np.float64)
+
+        bt, bx, by = bucket_means(empty, empty, empty, 10)
+
+        assert len(bt) == len(bx) == len(by) == 0
+
+
+class TestBinnedDensity:
+    """Tests for binned_density."""
+
+    def test_counts_drop_missing_and_clamp_negative(self):
+        """Test that NaN samples are dropped and negative ones clamped."""
+        x = np.array([-5.0, 1.0, 9.0, np.nan])
+        y = np.array([0.0, 1.0, 9.0, 3.0])
+
+        counts, x_edges, y_edges = binned_density(x, y, 2)
+
+        assert counts.tolist() == [[2, 0], [0, 1]]
+        assert x_edges.tolist() == [0.0, 4.5, 9.0]
+        assert y_edges.tolist() == [0.0, 4.5, 9.0]
+
+    def test_fixed_extent(self):
+        """Test that samples outside a fixed extent are not counted."""
+        x = np.array([10.0, 50.0, 500.0])
+        y = np.array([10.0, 50.0, 50.0])
+
+        counts, _, _ = binned_density(x, y, (4, 2), extent=((0, 100), (0, 100)))
+
+        assert counts.shape == (4, 2)
+        assert counts.sum() == 2
+
+    def test_without_clipping(self):
+        """Test that negative samples are dropped when clipping is disabled."""
+        x = np.array([-0.5, 0.25, 0.75])
+        y = np.array([0.5, 0.25, 0.75])
+
+        counts, _, _ = binned_density(x, y, 2, ((0, 1), (0, 1)), clip=False)
+
+        assert counts.tolist() == [[1, 0], [0, 1]]
+
+    def test_empty(self):
+        """Test binning without samples."""
+        counts, _, _ = binned_density(np.array([]), np.array([]), 3)
+
+        assert counts.shape == (3, 3)
+        assert counts.sum() == 0
+
+
+class TestNormalization:
+    """Tests for normalize_points and normalize_samples."""
+
+    def test_frame_maps_to_unit_square(self):
+        """Test that the frame corners map to 0 and 1."""
+        x = np.array([100.0, 500.0, 900.0, np.nan])
+        y = np.array([50.0, 350.0, 650.0, 1.0])
+
+        nx, ny = normalize_points(x, y, (100.0, 50.0, 800.0, 600.0))
+
+        assert nx[:3].tolist() == [0.0, 0.5, 1.0]
+        assert ny.tolist() == [0.0, 0.5, 1.0, -49 / 600]
+        assert np.isnan(nx[3])
+
+    def test_normalize_samples(self):
+        """Test that only the coordinates of the given sources change."""
+        samples = {
+            "id": np.array([1, 2]),
+            "x_gaze": np.array([0.0, 200.0]),
+            "y_gaze": np.array([0.0, 100.0]),
+            "x_mouse": np.array([5.0, 6.0]),
+            "y_mouse": np.array([7.0, 8.0]),
+        }
+
+        normalized = normalize_samples(samples, (0.0, 0.0, 200.0, 100.0), ["gaze"])
+
+        assert normalized["x_gaze"].tolist() == [0.0, 1.0]
+        assert normalized["y_gaze"].tolist() == [0.0, 1.0]
+        assert normalized["x_mouse"] is samples["x_mouse"]
+        assert samples["x_gaze"].tolist() == [0.0, 200.0]
+
+
+class TestIdtFixations:
+    """Tests for idt_fixations."""
+
+    def test_two_fixations_and_a_saccade(self):
+        """Test that a saccade separates fixations and short dwells are ignored."""
+        t = np.arange(0, 3, 0.02)
+        x = np.where(t < 1, 100.0, np.where(t < 1.05, 300.0, 500.0))
+        y = np.full(len(t), 50.0)
+        x[10] = np.nan
+
+        fixations = idt_fixations(t, x, y, max_dispersion=20, min_duration=0.1)
+
+        assert np.allclose(fixations["start"], [0.0, 1.06])
+        assert np.allclose(fixations["duration"], [0.98, 1.92])
+        assert np.allclose(fixations["x"], [100.0, 500.0])
+        assert np.allclose(fixations["y"], [50.0, 50.0])
+
+    def test_long_fixation_grows_across_chunks(self):
+        """Test that a fixation longer than one growth chunk is not split."""
+        t = np.arange(0, 20, 0.01)
+        x = 100.0 + np.sin(t)
+        y = 100.0 + np.cos(t)
+
+        fixations = idt_fixations(t, x, y, max_dispersion=5, min_duration=0.1)
+
+        assert len(fixations["start"]) == 1
+        assert fixations["duration"][0] == t[-1]
+
+    def test_no_fixations(self):
+        """Test samples that never stay within the dispersion threshold."""
+        t = np.arange(0, 1, 0.02)
+        x = np.arange(len(t)) * 50.0
+
+        fixations = idt_fixations(t, x, x, max_dispersion=20, min_duration=0.1)
+
+        assert len(fixations["start"]) == 0
+        assert len(idt_fixations(t[:0], x[:0], x[:0], 20, 0.1)["x"]) == 0
+
+
+class TestSummarizeSubject:
+    """Tests for summarize_subject."""
+
+    def _samples(self):
+        n = 100
+        return {
+            "date": np.datetime64("2025-10-23T10:30:00", "us")
+            + np.arange(n) * np.timedelta64(20, "ms"),
+            "x_gaze": np.full(n, 150.0),
+            "y_gaze": np.full(n, 150.0),
+            "x_mouse": np.full(n, np.nan),
+            "y_mouse": np.full(n, np.nan),
+        }
+
+    def test_canonical_heatmap_and_fixations(self):
+        """Test the heatmap in the frame's unit square and the fixations."""
+        summary = summarize_subject(
+            7, self._samples(), (100.0, 100.0, 200.0, 200.0), ["gaze"], 2, 50, 0.1
+        )
+
+        assert summary["subject_id"] == 7
+        assert summary["samples"] == 100
+        assert summary["heatmap"].tolist() == [[100, 0], [0, 0]]
+        assert np.allclose(summary["fixation_durations"], [1.98])
+        assert np.allclose(summary["fixation_x"], [0.25])
+        assert np.allclose(summary["fixation_y"], [0.25])
+
+    def test_without_heatmap(self):
+        """Test that bins=None skips the heatmap but keeps the fixations."""
+        summary = summarize_subject(
+            7, self._samples(), (100.0, 100.0, 200.0, 200.0), ["gaze"], None, 50, 0.1
+        )
+
+        assert summary["heatmap"] is None
+        assert np.allclose(summary["fixation_x"], [0.25])
+
+    def test_without_frame(self):
+        """Test that sessions without metadata have no heatmap."""
+        summary = summarize_subject(7, self._samples(), None, ["gaze"], 2, 50, 0.1)
+
+        assert summary["heatmap"] is None
+        assert summary["fixation_x"] is None
+        assert len(summary["fixation_durations"]) == 1
+
+
+def _reference_distance(a, b, substitution=None):
+    """Edit distance with the textbook cell-by-cell dynamic program."""
+    d = np.zeros((len(a) + 1, len(b) + 1))
+    d[:, 0] = np.arange(len(a) + 1)
+    d[0, :] = np.arange(len(b) + 1)
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            if substitution is None:
+                cost = float(a[i - 1] != b[j - 1])
+            else:
+                cost = substitution[a[i - 1], b[j - 1]]
+            d[i, j] = min(d[i - 1, j] + 1, d[i, j - 1] + 1, d[i - 1, j - 1] + cost)
+    return d[-1, -1]
+
+
+class TestScanpath:
+    """Tests for scanpath encoding and comparison."""
+
+    def test_grid_string(self):
+        """Test cells numbered row by row, with repeats and outliers dropped."""
+        x = np.array([0.1, 0.2, 0.9, 1.5, 0.9, 1.0])
+        y = np.array([0.1, 0.1, 0.1, 0.5, 0.9, 1.0])
+
+        assert grid_string(x, y, 2).tolist() == [0, 1, 3]
+        assert len(grid_string(x[:0], y[:0], 2)) == 0
+
+    def test_aoi_string(self):
+        """Test that the first AOI containing a fixation wins."""
+        aois = [(0.0, 0.0, 0.5, 0.5), (0.0, 0.0, 1.0, 1.0)]
+        x = np.array([0.1, 0.7, 0.2, 2.0])
+        y = np.array([0.1, 0.7, 0.2, 2.0])
+
+        assert aoi_string(x, y, aois).tolist() == [0, 1, 0]
+        assert len(aoi_string(x, y, [])) == 0
+
+    def test_substitution_costs(self):
+        """Test costs growing with distance, from 0 to 1."""
+        costs = grid_substitution(2)
+
+        assert costs.shape == (4, 4)
+        assert np.allclose(np.diag(costs), 0)
+        assert costs[0, 3] == 1
+        assert np.isclose(costs[0, 1], 1 / np.sqrt(2))
+
+        centers = np.array([[0.0, 0.0], [0.0, 0.5], [0.0, 1.0]])
+        assert np.allclose(region_substitution(centers)[0], [0.0, 0.5, 1.0])
+
+    def test_edit_distances_match_reference(self):
+        """Test the batched distances against the cell-by-cell algorithm."""
+        rng = np.random.default_rng(0)
+        sequences = [rng.integers(0, 9, rng.integers(0, 12)) for _ in range(25)]
+        rows, columns = np.triu_indices(len(sequences), k=1)
+        first = [sequences[i] for i in rows]
+        second = [sequences[j] for j in columns]
+
+        for substitution in (None, grid_substitution(3)):
+            expected = [
+                _reference_distance(a, b, substitution) for a, b in zip(first, second)
+            ]
+            distances = edit_distances(first, second, substitution)
+            assert np.allclose(distances, expected, atol=1e-5)
+
+    def test_pairwise_similarity(self):
+        """Test similarity from edit distance and the longer sequence."""
+        sequences = [np.array([0, 1, 2, 3]), np.array([0, 1, 2, 3]), np.array([3, 2])]
+
+        similarity = pairwise_similarity(sequences)
+
+        assert np.allclose(similarity, [1.0, 0.25, 0.25])
+        assert pairwise_similarity([np.array([], dtype=np.int64)] * 2).tolist() == [1.0]
+        pairs = (np.array([2]), np.array([0]))
+        assert pairwise_similarity(sequences, pairs=pairs).tolist() == [0.25]
+
+
+class TestCalibrationQuality:
+    """Tests for calibration_quality."""
+
+    def test_offset_and_scatter(self):
+        """Test accuracy as the mean offset and precision as the scatter."""
+        target_x = np.array([100.0, 100.0, 500.0, 500.0, 500.0])
+        target_y = np.array([100.0, 100.0, 300.0, 300.0, 300.0])
+        # Centered on the first target; 30 px to the right of the second
+        x = np.array([90.0, 110.0, 530.0, 530.0, np.nan])
+        y = np.array([100.0, 100.0, 300.0, 300.0, 300.0])
+
+        quality = calibration_quality(target_x, target_y, x, y, scale=100.0)
+
+        assert quality["samples"] == 4
+        assert quality["accuracy"] == 15.0
+        assert np.isclose(quality["precision"], np.sqrt(50.0))
+        assert np.isclose(quality["score"], (0.9 + 0.9 + 0.7 + 0.7) / 4)
+
+    def test_score_floor_and_no_predictions(self):
+        """Test that far predictions score 0 and missing ones are dropped."""
+        target = np.array([0.0])
+
+        far = calibration_quality(target, target, np.array([500.0]), target, 100.0)
+        assert far["score"] == 0.0
+
+        empty = calibration_quality(target, target, np.array([np.nan]), target, 100.0)
+        assert empty["samples"] == 0
+        assert np.isnan(empty["score"])
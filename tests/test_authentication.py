@@ -323,3 +323,50 @@ def test_multiple_users_different_passwords(app):
 
         assert user2.check_password("pass2") is True
         assert user2.check_password("pass1") is False
+
+
+def test_cached_user_loader_skips_database(app):
+    """Test that cached users are reused without a SELECT until they change."""
+    from sqlalchemy import event
+    from db import db
+    from repositories import UserRepository
+    from repositories.user_repository import _user_cache
+
+    _user_cache.clear()
+
+    with app.app_context():
+        user_repo = UserRepository()
+        user = user_repo.create_user(username="cached", password="testpass123")
+        user_repo.commit()
+        user_id = user.id
+
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", count)
+        try:
+            db.session.remove()
+            first = user_repo.get_cached_by_id(user_id)
+            assert first.username == "cached"
+            assert len(statements) == 1
+
+            db.session.remove()
+            second = user_repo.get_cached_by_id(user_id)
+            assert second.username == "cached"
+            assert second.check_password("testpass123")
+            assert len(statements) == 1
+
+            # Updating the user drops it from the cache
+            second.set_password("newpass456")
+            user_repo.commit()
+            db.session.remove()
+            statements.clear()
+
+            third = user_repo.get_cached_by_id(user_id)
+            assert third.check_password("newpass456")
+            assert len(statements) == 1
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count)
+            _user_cache.clear()
@@ -209,3 +209,145 @@ class TestConfigManagerEdgeCases:
         manager = ConfigManager()
         assert manager.config_dir is not None
         assert os.path.isabs(manager.config_dir)
+
+
+class TestTTLCache:
+    """Tests for TTLCache class."""
+
+    def test_set_get_and_invalidate(self):
+        """Test storing, reading and removing values."""
+        from state import TTLCache
+
+        cache = TTLCache(ttl=60)
+        cache.set(1, "one")
+
+        assert cache.get(1) == "one"
+        assert 1 in cache
+
+        cache.invalidate(1)
+        assert cache.get(1, "missing") == "missing"
+
+    def test_expiration(self, monkeypatch):
+        """Test that entries expire after the time to live."""
+        from state import ttl_cache
+
+        now = [1000.0]
+        monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+
+        cache = ttl_cache.TTLCache(ttl=5)
+        cache.set("user", "value")
+
+        now[0] += 4
+        assert cache.get("user") == "value"
+        now[0] += 2
+        assert cache.get("user") is None
+
+    def test_maxsize_drops_oldest(self):
+        """Test that the oldest entry is dropped when the cache is full."""
+        from state import TTLCache
+
+        cache = TTLCache(ttl=60, maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+
+        assert "a" not in cache
+        assert cache.get("b") == 2
+        assert cache.get("c") == 3
+
+
+class TestIngestPressure:
+    """Tests for IngestPressure class."""
+
+    def test_idle_server_gets_minimum_batching(self):
+        """Test the recommendation while the server keeps up."""
+        from state import IngestPressure
+
+        pressure = IngestPressure()
+        with pressure.track():
+            assert pressure.in_flight == 1
+
+        assert pressure.in_flight == 0
+        assert pressure.recommendation() == {
+            "batch_size": 20,
+            "flush_interval_ms": 1000,
+        }
+
+    def test_slow_commits_grow_batches(self):
+        """Test that batches grow with latency and are capped."""
+        from state import IngestPressure
+
+        pressure = IngestPressure(target_latency_ms=50, alpha=1.0)
+        pressure.latency_ms = 150
+        assert pressure.recommendation() == {
+            "batch_size": 60,
+            "flush_interval_ms": 3000,
+        }
+
+        pressure.latency_ms = 50_000
+        assert pressure.recommendation() == {
+            "batch_size": 500,
+            "flush_interval_ms": 15000,
+        }
+
+    def test_concurrent_uploads_grow_batches(self):
+        """Test that uploads in flight above the target raise the load."""
+        from state import IngestPressure
+
+        pressure = IngestPressure(target_in_flight=2)
+        pressure.in_flight = 4
+        assert pressure.load() == 2.0
+        assert pressure.recommendation()["batch_size"] == 40
+
+
+class TestConfigManagerWatch:
+    """Tests for the cached documents of ConfigManager."""
+
+    def _write(self, path, data, mtime):
+        with open(path, "w") as f:
+            json.dump(data, f)
+        os.utime(path, (mtime, mtime))
+
+    def test_document_is_serialized_once(self):
+        """Test that documents are parsed once and carry validators."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "tasks.json")
+            self._write(path, {"1": {"type": "test"}}, 1_000_000)
+
+            manager = ConfigManager(config_dir=temp_dir)
+            document = manager.get_document("tasks.json")
+
+            assert json.loads(document.body) == {"1": {"type": "test"}}
+            assert document.etag
+            assert manager.get_document("tasks.json") is document
+
+    def test_reloads_when_file_changes(self):
+        """Test that watched documents reload after the file changes."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "config.json")
+            self._write(path, {"port": 1}, 1_000_000)
+
+            manager = ConfigManager(config_dir=temp_dir, watch=True, check_interval=0)
+            first = manager.get_document("config.json")
+            assert manager.get_document("config.json") is first
+
+            self._write(path, {"port": 2}, 1_000_010)
+            second = manager.get_document("config.json")
+
+            assert second.data == {"port": 2}
+            assert second.etag != first.etag
+
+    def test_invalid_edit_keeps_last_version(self):
+        """Test that a broken file does not replace the cached document."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "config.json")
+            self._write(path, {"port": 1}, 1_000_000)
+
+            manager = ConfigManager(config_dir=temp_dir, watch=True, check_interval=0)
+            first = manager.get_document("config.json")
+
+            with open(path, "w") as f:
+                f.write("{broken")
+            os.utime(path, (1_000_010, 1_000_010))
+
+            assert manager.get_document("config.json") is first
@@ -36,6 +36,57 @@ class TestDatabaseManager:
             # Verify doesn't crash
             assert True
 
+    def test_create_all_upgrades_existing_schema(self, tmp_path):
+        """Test that columns added to the models are added to old databases."""
+        import sqlite3
+        from sqlalchemy import inspect
+
+        db_path = tmp_path / "old.db"
+        connection = sqlite3.connect(db_path)
+        connection.executescript(
+            """
+            CREATE TABLE subject (
+                id INTEGER PRIMARY KEY, name VARCHAR(50) NOT NULL,
+                surname VARCHAR(50) NOT NULL, age INTEGER NOT NULL,
+                study_id INTEGER
+            );
+            CREATE TABLE measurement (
+                id INTEGER PRIMARY KEY, date DATETIME NOT NULL,
+                subject_id INTEGER NOT NULL, mouse_point_id INTEGER,
+                gaze_point_id INTEGER
+            );
+            INSERT INTO subject VALUES (1, 'Juan', 'Pérez', 30, NULL);
+            INSERT INTO measurement VALUES (7, '2025-10-23 10:30:00', 1, NULL, NULL);
+            INSERT INTO measurement VALUES (9, '2025-10-23 10:30:01', 1, NULL, NULL);
+            """
+        )
+        connection.close()
+
+        fresh_app = Flask(__name__)
+        fresh_app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+
+        manager = DatabaseManager()
+        manager.db.init_app(fresh_app)
+        manager.app = fresh_app
+        manager.create_all()
+
+        with fresh_app.app_context():
+            columns = {c["name"] for c in inspect(db.engine).get_columns("subject")}
+            assert {"sample_count", "last_sample_id", "updated_at"} <= columns
+
+            indexes = {i["name"] for i in inspect(db.engine).get_indexes("measurement")}
+            assert "ix_measurement_subject_date_id" in indexes
+
+            from db.models import Subject
+
+            subject = db.session.get(Subject, 1)
+            assert subject.sample_count == 2
+            assert subject.last_sample_id == 9
+            assert subject.data_version == "9.2.0"
+            db.session.remove()
+
+        del db._app_engines[fresh_app]
+
     def test_get_session(self, app):
         """Test getting database session."""
         with app.app_context():
@@ -96,3 +147,185 @@ class TestDatabaseConfig:
         assert uri.startswith("sqlite:///")
 
         assert "usergazetrack.db" in uri or "database.db" in uri
+
+    def test_database_url_from_environment(self, monkeypatch):
+        """Test that DATABASE_URL and pool settings configure the engine."""
+        monkeypatch.setenv("DATABASE_URL", "postgres://user:pw@localhost/gaze")
+        monkeypatch.setenv("DATABASE_POOL_SIZE", "20")
+
+        config = DatabaseConfig("/test/path", max_overflow=5)
+        fresh_app = Flask(__name__)
+        config.configure_app(fresh_app)
+
+        assert (
+            fresh_app.config["SQLALCHEMY_DATABASE_URI"]
+            == "postgresql+psycopg://user:pw@localhost/gaze"
+        )
+        options = fresh_app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+        assert options["pool_size"] == 20
+        assert options["max_overflow"] == 5
+        assert options["pool_pre_ping"] is True
+
+    def test_sqlite_has_no_pool_options(self, monkeypatch):
+        """Test that SQLite stays the default and gets no pool settings."""
+        monkeypatch.delenv("DATABASE_URL", raising=False)
+
+        config = DatabaseConfig("/test/path", pool_size=10)
+        fresh_app = Flask(__name__)
+        config.configure_app(fresh_app)
+
+        assert fresh_app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite:///")
+        assert fresh_app.config["SQLALCHEMY_ENGINE_OPTIONS"] == {}
+
+
+class TestShardRouter:
+    """Tests for per-study sample shards."""
+
+    @pytest.fixture
+    def sharded_app(self, app, tmp_path):
+        from db import ShardRouter
+
+        app.config["SAMPLE_SHARD_DIR"] = str(tmp_path)
+        router = ShardRouter(app)
+        yield app
+        router.dispose_all()
+
+    def _points(self, count):
+        return [
+            {
+                "date": f"10/23/2025, 10:30:{i:02d} AM",
+                "mouse": {"x": i, "y": i},
+                "gaze": {"x": i + 100, "y": i + 100},
+            }
+            for i in range(count)
+        ]
+
+    def test_samples_written_to_study_shards(self, sharded_app, tmp_path):
+        """Test that each study's samples go to its own file."""
+        with sharded_app.app_context():
+            from api.services import MeasurementService
+            from db import Measurement
+            from repositories import StudyRepository, SubjectRepository
+
+            study_repo = StudyRepository()
+            study_a = study_repo.create_study(name="A")
+            study_b = study_repo.create_study(name="B")
+            subject_repo = SubjectRepository()
+            subject_a = subject_repo.create_subject("A", "User", 25, study_a.id)
+            subject_b = subject_repo.create_subject("B", "User", 30, study_b.id)
+            subject_repo.commit()
+
+            service = MeasurementService()
+            service.save_points({"id": subject_a.id, "points": self._points(3)})
+            service.save_points({"id": subject_b.id, "points": self._points(5)})
+
+            assert (tmp_path / f"study_{study_a.id}.db").exists()
+            assert (tmp_path / f"study_{study_b.id}.db").exists()
+            assert db.session.query(Measurement).count() == 0
+
+            arrays = service.repository.get_sample_arrays(subject_b.id)
+            assert arrays["x_gaze"].tolist() == [100, 101, 102, 103, 104]
+            assert service.repository.count_measurements_by_subject(subject_a.id) == 3
+
+            summaries = subject_repo.get_subject_summaries(study_b.id)
+            assert [(s.id, count) for s, count, _ in summaries] == [(subject_b.id, 5)]
+
+    def test_concurrent_duplicate_batch(self, sharded_app, monkeypatch):
+        """Test that a batch resent concurrently adds no samples to the shard."""
+        with sharded_app.app_context():
+            from api.services import MeasurementService
+            from repositories import IngestBatchRepository, SubjectRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            service = MeasurementService()
+            batch = {"id": subject.id, "batch_id": "b1", "points": self._points(5)}
+            assert service.save_points(batch)["duplicate"] is False
+
+            # The resend checked before the original was committed
+            is_recorded = IngestBatchRepository.is_recorded
+            checks = []
+
+            def racing_is_recorded(self, subject_id, batch_id):
+                checks.append(batch_id)
+                if len(checks) == 1:
+                    return False
+                return is_recorded(self, subject_id, batch_id)
+
+            monkeypatch.setattr(
+                IngestBatchRepository, "is_recorded", racing_is_recorded
+            )
+
+            assert service.save_points(batch)["duplicate"] is True
+            assert service.repository.count_measurements_by_subject(subject.id) == 5
+            assert subject_repo.get_subject_by_id(subject.id).sample_count == 5
+
+    def test_study_lookups_are_bounded(self, sharded_app, monkeypatch):
+        """Test that only existing subjects are cached, up to a limit."""
+        from db import sharding
+
+        monkeypatch.setattr(sharding, "STUDY_CACHE_SIZE", 2)
+
+        with sharded_app.app_context():
+            from db import get_shard_router
+            from repositories import StudyRepository, SubjectRepository
+
+            router = get_shard_router()
+            study = StudyRepository().create_study(name="A")
+            subject_repo = SubjectRepository()
+            first = subject_repo.create_subject("A", "User", 25, study.id)
+            subject_repo.commit()
+
+            # A subject that does not exist yet is not remembered
+            assert router.study_of(first.id + 1) is None
+            second = subject_repo.create_subject("B", "User", 25, study.id)
+            subject_repo.commit()
+            assert second.id == first.id + 1
+            assert router.study_of(second.id) == study.id
+
+            third = subject_repo.create_subject("C", "User", 25)
+            subject_repo.commit()
+            assert router.study_of(first.id) == study.id
+            assert router.study_of(third.id) is None
+            assert list(router._study_of) == [first.id, third.id]
+
+    def test_study_with_sharded_samples_is_kept(self, sharded_app):
+        """Test that a study is not deleted while its shard holds samples."""
+        with sharded_app.app_context():
+            from api.services import MeasurementService
+            from repositories import StudyRepository, SubjectRepository
+
+            study_repo = StudyRepository()
+            study = study_repo.create_study(name="A")
+            empty = study_repo.create_study(name="B")
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("A", "User", 25, study.id)
+            subject_repo.create_subject("B", "User", 25, empty.id)
+            subject_repo.commit()
+
+            service = MeasurementService()
+            service.save_points({"id": subject.id, "points": self._points(3)})
+
+            with pytest.raises(ValueError):
+                study_repo.delete_study(study.id)
+            assert service.repository.count_measurements_by_subject(subject.id) == 3
+
+            assert study_repo.delete_study(empty.id) is True
+
+    def test_unassigned_subjects_share_a_shard(self, sharded_app, tmp_path):
+        """Test that subjects without a study use the unassigned shard."""
+        with sharded_app.app_context():
+            from api.services import MeasurementService
+            from repositories import SubjectRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            MeasurementService().save_points(
+                {"id": subject.id, "points": self._points(2)}
+            )
+
+            assert (tmp_path / "unassigned.db").exists()
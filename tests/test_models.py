@@ -42,6 +42,22 @@ class TestSubjectModel:
             assert subject.study.name == "Test Study"
             assert study.subjects[0].id == subject.id
 
+    def test_canonical_frame(self, app):
+        """Test the frame used to normalize a session's coordinates."""
+        with app.app_context():
+            subject = Subject(name="Ana", surname="López", age=28)
+            assert subject.canonical_frame is None
+
+            subject.viewport_width = 1280
+            subject.viewport_height = 720
+            assert subject.canonical_frame == (0.0, 0.0, 1280.0, 720.0)
+
+            subject.frame_x = 10.0
+            subject.frame_y = 20.0
+            subject.frame_width = 800.0
+            subject.frame_height = 600.0
+            assert subject.canonical_frame == (10.0, 20.0, 800.0, 600.0)
+
 
 class TestStudyModel:
     """Tests for Study model."""
@@ -80,6 +80,98 @@ class TestSubjectRepository:
             # Non-existent ID
             assert repo.get_subject_by_id(99999) is None
 
+    def test_record_samples_and_tasklogs(self, app):
+        """Test updating the data version counters of a subject."""
+        with app.app_context():
+            from repositories import SubjectRepository
+
+            repo = SubjectRepository()
+            subject = repo.create_subject(name="Juan", surname="Pérez", age=25)
+            repo.commit()
+
+            assert subject.data_version == "0.0.0"
+
+            repo.record_samples(subject.id, 20, 57)
+            repo.record_samples(subject.id, 5, 62)
+            repo.record_tasklogs(subject.id, 1)
+            repo.commit()
+
+            refreshed = repo.get_subject_by_id(subject.id)
+            assert refreshed.sample_count == 25
+            assert refreshed.last_sample_id == 62
+            assert refreshed.tasklog_count == 1
+            assert refreshed.updated_at is not None
+            assert refreshed.data_version == "62.25.1"
+
+    def test_get_subject_summaries(self, app):
+        """Test paging subjects of a study with their sample counts."""
+        with app.app_context():
+            from repositories import (
+                SubjectRepository,
+                StudyRepository,
+                MeasurementRepository,
+            )
+
+            study = StudyRepository().create_study(name="Summary Study")
+
+            repo = SubjectRepository()
+            subjects = [
+                repo.create_subject("S", str(i), 20, study_id=study.id)
+                for i in range(5)
+            ]
+            repo.create_subject("No", "Study", 20)
+            repo.commit()
+
+            measurement_repo = MeasurementRepository()
+            measurements = [
+                measurement_repo.create_measurement(
+                    date=datetime(2025, 10, 23, 10, 30, second),
+                    subject_id=subjects[0].id,
+                )
+                for second in range(3)
+            ]
+            repo.record_samples(subjects[0].id, 3, measurements[-1].id)
+            measurement_repo.commit()
+
+            first_page = repo.get_subject_summaries(study.id, page=1, per_page=2)
+            assert [row[0].id for row in first_page] == [
+                subjects[0].id,
+                subjects[1].id,
+            ]
+            assert first_page[0][1] == 3
+            assert first_page[0][2] is not None
+            assert first_page[1][1] == 0
+            assert first_page[1][2] is None
+
+            last_page = repo.get_subject_summaries(study.id, page=3, per_page=2)
+            assert [row[0].id for row in last_page] == [subjects[4].id]
+
+            assert repo.count_subjects_by_study(study.id) == 5
+            assert repo.count_subjects_by_study(None) == 1
+            assert len(repo.get_subject_summaries(None)) == 1
+
+    def test_filter_by_calibration_score(self, app):
+        """Test leaving out subjects below a calibration score."""
+        with app.app_context():
+            from repositories import SubjectRepository, StudyRepository
+
+            study = StudyRepository().create_study(name="Quality Study")
+
+            repo = SubjectRepository()
+            good, poor, unscored = [
+                repo.create_subject("S", str(i), 20, study_id=study.id)
+                for i in range(3)
+            ]
+            repo.commit()
+            repo.record_session_metadata(good.id, {"calibration_score": 0.9})
+            repo.record_session_metadata(poor.id, {"calibration_score": 0.3})
+            repo.commit()
+
+            assert repo.get_subjects_by_study(study.id, min_quality=0.5) == [good]
+            assert len(repo.get_subjects_by_study(study.id, min_quality=0.0)) == 2
+            assert len(repo.get_subjects_by_study(study.id)) == 3
+            assert repo.get_all_subjects(min_quality=0.9) == [good]
+
 
 class TestStudyRepository:
     """Tests for StudyRepository."""
@@ -192,6 +284,26 @@ class TestStudyRepository:
             # Deleting non-existent study
             assert repo.delete_study(99999) is False
 
+    def test_get_studies_with_subject_counts(self, app):
+        """Test counting the subjects of every study in one query."""
+        with app.app_context():
+            from repositories import StudyRepository, SubjectRepository
+
+            study_repo = StudyRepository()
+            empty = study_repo.create_study(name="Empty")
+            busy = study_repo.create_study(name="Busy")
+
+            subject_repo = SubjectRepository()
+            for _ in range(3):
+                subject_repo.create_subject("A", "B", 20, study_id=busy.id)
+            subject_repo.commit()
+
+            counts = {
+                study.id: count
+                for study, count in study_repo.get_studies_with_subject_counts()
+            }
+            assert counts == {empty.id: 0, busy.id: 3}
+
     def test_get_active_study(self, app):
         """Test getting the most recent study."""
         with app.app_context():
@@ -284,6 +396,58 @@ class TestMeasurementRepository:
             assert len(measurements1) == 3
             assert len(measurements2) == 1
 
+    def test_bulk_create_samples(self, app):
+        """Test inserting samples in bulk keeps their order and points."""
+        with app.app_context():
+            from repositories import MeasurementRepository, SubjectRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            measurement_repo = MeasurementRepository()
+            samples = [
+                (datetime(2025, 10, 23, 10, 30, i), i, i + 1, 10 * i, 10 * i + 1)
+                for i in range(4)
+            ]
+            ids = measurement_repo.bulk_create_samples(subject.id, samples)
+            measurement_repo.commit()
+
+            measurements = measurement_repo.get_measurements_by_subject(subject.id)
+            assert ids == [m.id for m in measurements]
+
+            arrays = measurement_repo.get_sample_arrays(subject.id)
+            assert arrays["x_mouse"].tolist() == [0, 1, 2, 3]
+            assert arrays["y_gaze"].tolist() == [1, 11, 21, 31]
+            assert measurement_repo.bulk_create_samples(subject.id, []) == []
+
+    def test_iter_sample_chunks(self, app):
+        """Test streaming samples in bounded chunks."""
+        with app.app_context():
+            from repositories import MeasurementRepository, SubjectRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            measurement_repo = MeasurementRepository()
+            samples = [
+                (datetime(2025, 10, 23, 10, 30, i), i, i, i, i) for i in range(5)
+            ]
+            measurement_repo.bulk_create_samples(subject.id, samples)
+            measurement_repo.commit()
+
+            chunks = list(measurement_repo.iter_sample_chunks(subject.id, chunk_size=2))
+            assert [len(chunk["id"]) for chunk in chunks] == [2, 2, 1]
+            assert [x for c in chunks for x in c["x_gaze"].tolist()] == [0, 1, 2, 3, 4]
+
+            window = measurement_repo.iter_sample_chunks(
+                subject.id, start=datetime(2025, 10, 23, 10, 30, 3), sources=["mouse"]
+            )
+            chunk = next(window)
+            assert chunk["x_mouse"].tolist() == [3, 4]
+            assert "x_gaze" not in chunk
+
 
 class TestPointRepository:
     """Tests for PointRepository."""
@@ -405,6 +569,43 @@ class TestTaskLogRepository:
 
             assert tasklog_repo.count_tasklogs_by_subject(subject.id) == 5
 
+    def test_get_task_times_by_study(self, app):
+        """Test getting the task times of every subject of a study."""
+        with app.app_context():
+            from repositories import (
+                TaskLogRepository,
+                SubjectRepository,
+                StudyRepository,
+            )
+
+            study = StudyRepository().create_study("Study")
+            subject_repo = SubjectRepository()
+            inside = subject_repo.create_subject("In", "Study", 25, study.id)
+            outside = subject_repo.create_subject("Out", "Study", 30)
+            subject_repo.commit()
+
+            tasklog_repo = TaskLogRepository()
+            start = datetime(2025, 10, 23, 10, 0, 0)
+            end = datetime(2025, 10, 23, 10, 1, 0)
+            tasklog_repo.bulk_create_tasklogs(
+                [
+                    {
+                        "start_time": start,
+                        "end_time": end,
+                        "subject_id": inside.id,
+                        "task_description": "Find the cart",
+                    },
+                    {"start_time": start, "subject_id": outside.id},
+                ]
+            )
+            tasklog_repo.commit()
+
+            assert tasklog_repo.get_task_times_by_study(study.id) == [
+                ("Find the cart", start, end)
+            ]
+            assert subject_repo.get_subjects_by_study(study.id) == [inside]
+            assert subject_repo.get_subjects_by_study(None) == [outside]
+
 
 class TestBaseRepository:
     """Tests for BaseRepository common functionality."""
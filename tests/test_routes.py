@@ -2,8 +2,13 @@
 Tests for API routes/endpoints.
 """
 
+import importlib.util
 import json
-from datetime import datetime
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
 
 
 class TestSubjectRoutes:
@@ -78,6 +83,330 @@ class TestMeasurementRoutes:
         assert data["subject_id"] == subject_id
         assert len(data["points"]) == 1
 
+    def test_get_user_points_paginated(self, client, app):
+        """Test paging through user points."""
+        with app.app_context():
+            from repositories import (
+                SubjectRepository,
+                MeasurementRepository,
+                PointRepository,
+            )
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            point_repo = PointRepository()
+            measurement_repo = MeasurementRepository()
+
+            for i in range(5):
+                measurement_repo.create_measurement(
+                    date=datetime(2025, 10, 23, 10, 30, i),
+                    subject_id=subject.id,
+                    gaze_point=point_repo.create_point(float(i), float(i)),
+                    mouse_point=point_repo.create_point(float(i), float(i)),
+                )
+            measurement_repo.commit()
+
+            subject_id = subject.id
+
+        resp = client.get(f"/api/get-user-points?id={subject_id}&limit=3&fields=gaze")
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert len(data["points"]) == 3
+        assert set(data["points"][0]) == {"date", "x_gaze", "y_gaze"}
+
+        resp = client.get(
+            f"/api/get-user-points?id={subject_id}&limit=3"
+            f"&cursor={data['next_cursor']}"
+        )
+        data = resp.get_json()
+        assert len(data["points"]) == 2
+        assert data["next_cursor"] is None
+
+        resp = client.get(f"/api/get-user-points?id={subject_id}&fields=pupil")
+        assert resp.status_code == 400
+
+    def test_get_user_points_columnar(self, client, app):
+        """Test getting user points as parallel arrays."""
+        with app.app_context():
+            from repositories import (
+                SubjectRepository,
+                MeasurementRepository,
+                PointRepository,
+            )
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            point_repo = PointRepository()
+            measurement_repo = MeasurementRepository()
+            measurement_repo.create_measurement(
+                date=datetime.now(),
+                subject_id=subject.id,
+                gaze_point=point_repo.create_point(1.0, 2.0),
+                mouse_point=point_repo.create_point(3.0, 4.0),
+            )
+            measurement_repo.commit()
+
+            subject_id = subject.id
+
+        resp = client.get(f"/api/get-user-points?id={subject_id}&layout=columnar")
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert data["count"] == 1
+        assert data["columns"]["y_mouse"] == [4.0]
+
+        resp = client.get(f"/api/get-user-points?id={subject_id}&layout=table")
+        assert resp.status_code == 400
+
+    def test_get_user_replay(self, client, app):
+        """Test getting downsampled trajectories."""
+        with app.app_context():
+            from repositories import (
+                SubjectRepository,
+                MeasurementRepository,
+                PointRepository,
+            )
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            point_repo = PointRepository()
+            measurement_repo = MeasurementRepository()
+
+            for i in range(5):
+                measurement_repo.create_measurement(
+                    date=datetime(2025, 10, 23, 10, 30, i),
+                    subject_id=subject.id,
+                    gaze_point=point_repo.create_point(float(i), float(i)),
+                    mouse_point=point_repo.create_point(float(i), float(i)),
+                )
+            measurement_repo.commit()
+
+            subject_id = subject.id
+
+        resp = client.get(f"/api/get-user-replay?id={subject_id}&frames=3")
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert data["total_samples"] == 5
+        assert len(data["gaze"]["x"]) == 3
+
+        resp = client.get(f"/api/get-user-replay?id={subject_id}&method=spline")
+        assert resp.status_code == 400
+
+        resp = client.get(f"/api/get-user-replay?id={subject_id}&from=yesterday")
+        assert resp.status_code == 400
+
+    def test_get_user_heatmap(self, client, app):
+        """Test getting the binned density of a subject's points."""
+        with app.app_context():
+            from repositories import (
+                SubjectRepository,
+                MeasurementRepository,
+                PointRepository,
+            )
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            point_repo = PointRepository()
+            measurement_repo = MeasurementRepository()
+
+            for i in range(5):
+                measurement_repo.create_measurement(
+                    date=datetime(2025, 10, 23, 10, 30, i),
+                    subject_id=subject.id,
+                    gaze_point=point_repo.create_point(100.0, 100.0),
+                    mouse_point=point_repo.create_point(float(i * 10), 0.0),
+                )
+            measurement_repo.commit()
+
+            subject_id = subject.id
+
+        resp = client.get(f"/api/get-user-heatmap?id={subject_id}&bins=10")
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert data["total"] == 10
+        assert data["max"] == 5
+        assert data["extent"] == {"x": [0, 100], "y": [0, 100]}
+        assert sum(data["cells"]["count"]) == 10
+
+        resp = client.get(f"/api/get-user-heatmap?id={subject_id}&fields=gaze")
+        assert resp.get_json()["cells"]["count"] == [5]
+
+        resp = client.get(f"/api/get-user-heatmap?id={subject_id}&fields=pupil")
+        assert resp.status_code == 400
+
+        resp = client.get("/api/get-user-heatmap?id=99999")
+        assert resp.status_code == 404
+
+        # The canonical space needs the session metadata
+        resp = client.get(f"/api/get-user-heatmap?id={subject_id}&space=canonical")
+        assert resp.status_code == 400
+
+        resp = client.get(f"/api/get-user-heatmap?id={subject_id}&space=page")
+        assert resp.status_code == 400
+
+    def test_get_user_heatmap_canonical(self, client, app):
+        """Test that the canonical heatmap is relative to the recorded frame."""
+        with app.app_context():
+            from repositories import (
+                SubjectRepository,
+                MeasurementRepository,
+                PointRepository,
+            )
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            point_repo = PointRepository()
+            measurement_repo = MeasurementRepository()
+
+            for i, x in enumerate([150.0, 350.0, 50.0]):
+                measurement_repo.create_measurement(
+                    date=datetime(2025, 10, 23, 10, 30, i),
+                    subject_id=subject.id,
+                    gaze_point=point_repo.create_point(x, 150.0),
+                )
+            measurement_repo.commit()
+
+            subject_id = subject.id
+
+        resp = client.post(
+            "/api/save-session-metadata",
+            json={
+                "id": subject_id,
+                "viewport": {"width": 1024, "height": 768},
+                "devicePixelRatio": 1.5,
+                "frame": {"x": 100, "y": 100, "width": 400, "height": 200},
+            },
+        )
+        assert resp.status_code == 200
+
+        resp = client.get(
+            f"/api/get-user-heatmap?id={subject_id}&bins=4&space=canonical"
+        )
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert data["space"] == "canonical"
+        assert data["extent"] == {"x": [0, 1], "y": [0, 1]}
+        # The sample left of the frame is not counted
+        assert data["total"] == 2
+        assert data["cells"] == {
+            "x": [0.125, 0.625],
+            "y": [0.375, 0.375],
+            "count": [1, 1],
+        }
+
+        resp = client.get(f"/api/get-user-replay?id={subject_id}")
+        assert resp.get_json()["viewport"] == {
+            "width": 1024,
+            "height": 768,
+            "device_pixel_ratio": 1.5,
+            "frame": {"x": 100.0, "y": 100.0, "width": 400.0, "height": 200.0},
+        }
+
+        resp = client.post(
+            "/api/save-session-metadata", json={"id": subject_id, "viewport": {}}
+        )
+        assert resp.status_code == 400
+
+        resp = client.post(
+            "/api/save-session-metadata",
+            json={"id": 99999, "viewport": {"width": 800, "height": 600}},
+        )
+        assert resp.status_code == 404
+
+    def test_save_calibration_quality(self, client, app):
+        """Test scoring a calibration and filtering subjects by its score."""
+        with app.app_context():
+            from repositories import SubjectRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+            subject_id = subject.id
+
+        samples = {
+            "id": subject_id,
+            "x_target": [100, 500],
+            "y_target": [100, 300],
+            "x_gaze": [100, 560],
+            "y_gaze": [100, 380],
+            "viewport": {"width": 1000, "height": 400},
+        }
+        resp = client.post("/api/save-calibration-quality", json=samples)
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert data["samples"] == 2
+        assert data["accuracy"] == 50.0
+        assert data["score"] == 0.75
+
+        resp = client.get("/api/get-subjects")
+        assert resp.get_json()[0]["calibration_score"] == 0.75
+
+        resp = client.post(
+            "/api/save-calibration-quality", json={**samples, "x_gaze": [1]}
+        )
+        assert resp.status_code == 400
+        resp = client.post("/api/save-calibration-quality", json={"id": subject_id})
+        assert resp.status_code == 400
+        resp = client.post(
+            "/api/save-calibration-quality", json={**samples, "id": 99999}
+        )
+        assert resp.status_code == 404
+
+        assert client.get("/api/download-all?min_quality=0.8").status_code == 404
+        assert client.get("/api/download-all?min_quality=2").status_code == 400
+        assert client.get("/api/download-all?min_quality=high").status_code == 400
+
+    def test_stream_user_points(self, client, app):
+        """Test streaming points as NDJSON and as a JSON array."""
+        with app.app_context():
+            from repositories import MeasurementRepository, SubjectRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            measurement_repo = MeasurementRepository()
+            measurement_repo.bulk_create_samples(
+                subject.id,
+                [(datetime(2025, 10, 23, 10, 30, i), i, i, i, i) for i in range(3)],
+            )
+            measurement_repo.commit()
+            subject_id = subject.id
+
+        resp = client.get(f"/api/stream-user-points?id={subject_id}")
+        assert resp.status_code == 200
+        assert resp.mimetype == "application/x-ndjson"
+        lines = resp.get_data(as_text=True).splitlines()
+        assert [json.loads(line)["x_gaze"] for line in lines] == [0, 1, 2]
+        assert json.loads(lines[0])["date"] == "2025-10-23 10:30:00"
+
+        resp = client.get(
+            f"/api/stream-user-points?id={subject_id}&format=json&fields=mouse"
+        )
+        points = resp.get_json()
+        assert [p["x_mouse"] for p in points] == [0, 1, 2]
+        assert "x_gaze" not in points[0]
+
+        resp = client.get(f"/api/stream-user-points?id={subject_id}&format=xml")
+        assert resp.status_code == 400
+
+        resp = client.get("/api/stream-user-points?id=99999")
+        assert resp.status_code == 404
+
+    def test_get_user_replay_not_found(self, client):
+        """Test getting trajectories for non-existent user."""
+        resp = client.get("/api/get-user-replay?id=99999")
+        assert resp.status_code == 404
+
     def test_save_points(self, client, app):
         """Test saving measurement points."""
         with app.app_context():
@@ -107,6 +436,154 @@ class TestMeasurementRoutes:
         response_data = resp.get_json()
         assert response_data["status"] == "success"
 
+    def test_save_points_packed(self, client, app):
+        """Test saving a batch packed by samplePacking.js."""
+        with app.app_context():
+            from repositories import SubjectRepository
+
+            repo = SubjectRepository()
+            subject = repo.create_subject("Test", "User", 25)
+            repo.commit()
+            subject_id = subject.id
+
+        data = {
+            "id": subject_id,
+            "batch_id": "b",
+            "layout": "columnar",
+            "encoding": "base64",
+            "columns": {
+                "t": "ALAHzIKceUIAgBzMgpx5Qg==",
+                "x_gaze": "AAAAAAAA8D8AAAAAAAAUQA==",
+                "y_gaze": "AAAAAAAAAEAAAAAAAAAYQA==",
+                "x_mouse": "AAAAAAAACEAAAAAAAAAcQA==",
+                "y_mouse": "AAAAAAAAEEAAAAAAAAAgQA==",
+            },
+        }
+        resp = client.post(
+            "/api/save-points", data=json.dumps(data), content_type="application/json"
+        )
+        assert resp.status_code == 200
+
+        points = client.get(f"/api/get-user-points?id={subject_id}").get_json()
+        assert [p["x_gaze"] for p in points["points"]] == [1, 5]
+        assert [p["y_mouse"] for p in points["points"]] == [4, 8]
+
+        # Columns of different lengths
+        data["batch_id"] = "c"
+        data["columns"]["t"] = "ALAHzIKceUI="
+        resp = client.post(
+            "/api/save-points", data=json.dumps(data), content_type="application/json"
+        )
+        assert resp.status_code == 400
+
+    def test_save_points_beacon(self, client, app):
+        """Test saving a batch sent by navigator.sendBeacon as text/plain."""
+        with app.app_context():
+            from repositories import SubjectRepository
+
+            repo = SubjectRepository()
+            subject = repo.create_subject("Test", "User", 25)
+            repo.commit()
+            subject_id = subject.id
+
+        data = {
+            "id": subject_id,
+            "batch_id": "beacon-1",
+            "points": [
+                {
+                    "date": "10/23/2025, 10:30:00 AM",
+                    "gaze": {"x": 100.5, "y": 200.5},
+                    "mouse": {"x": 105.0, "y": 205.0},
+                }
+            ],
+        }
+
+        for duplicate in (False, True):
+            resp = client.post(
+                "/api/save-points",
+                data=json.dumps(data),
+                content_type="text/plain;charset=UTF-8",
+            )
+            assert resp.status_code == 200
+            assert resp.get_json()["duplicate"] is duplicate
+
+
+class TestConditionalRequests:
+    """Tests for ETag / Last-Modified validators on subject data."""
+
+    def _save_point(self, client, subject_id, second):
+        data = {
+            "id": subject_id,
+            "points": [
+                {
+                    "date": f"10/23/2025, 10:30:{second:02d} AM",
+                    "gaze": {"x": 100.5, "y": 200.5},
+                    "mouse": {"x": 105.0, "y": 205.0},
+                }
+            ],
+        }
+        client.post(
+            "/api/save-points", data=json.dumps(data), content_type="application/json"
+        )
+
+    def test_etag_changes_with_data(self, client, app):
+        """Test 304 responses until new samples are saved."""
+        with app.app_context():
+            from repositories import SubjectRepository
+
+            repo = SubjectRepository()
+            subject = repo.create_subject("Test", "User", 25)
+            repo.commit()
+            subject_id = subject.id
+
+        self._save_point(client, subject_id, 0)
+
+        url = f"/api/get-user-points?id={subject_id}"
+        first = client.get(url)
+        assert first.status_code == 200
+        assert first.headers["ETag"]
+        assert first.headers["Last-Modified"]
+        assert "no-cache" in first.headers["Cache-Control"]
+
+        cached = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+        assert cached.status_code == 304
+        assert cached.headers["ETag"] == first.headers["ETag"]
+
+        since = client.get(
+            url, headers={"If-Modified-Since": first.headers["Last-Modified"]}
+        )
+        assert since.status_code == 304
+
+        other = client.get(f"{url}&layout=columnar")
+        assert other.headers["ETag"] != first.headers["ETag"]
+
+        self._save_point(client, subject_id, 1)
+
+        fresh = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+        assert fresh.status_code == 200
+        assert len(fresh.get_json()["points"]) == 2
+        assert fresh.headers["ETag"] != first.headers["ETag"]
+
+    def test_download_points_etag(self, client, app):
+        """Test conditional download of the points CSV."""
+        with app.app_context():
+            from repositories import SubjectRepository
+
+            repo = SubjectRepository()
+            subject = repo.create_subject("Test", "User", 25)
+            repo.commit()
+            subject_id = subject.id
+
+        self._save_point(client, subject_id, 0)
+
+        url = f"/api/download-points?id={subject_id}"
+        first = client.get(url)
+        assert first.status_code == 200
+
+        cached = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+        assert cached.status_code == 304
+        assert cached.data == b""
+
 
 class TestTaskLogRoutes:
     """Tests for task log-related API endpoints."""
@@ -241,6 +718,343 @@ class TestExportRoutes:
         assert resp.status_code == 404
 
 
+class TestStudyRoutes:
+    """Tests for study-wide analytics endpoints."""
+
+    def _fetch(self, client, url, json=None):
+        """Request a study result, computing it in an inline job first."""
+        send = client.get if json is None else client.post
+        resp = send(url, json=json)
+        if resp.status_code == 200 and "status_url" in resp.get_json():
+            assert resp.get_json()["status"] == "succeeded"
+            # The job cached the result, so the same request now returns it
+            resp = send(url, json=json)
+        return resp
+
+    def _run_jobs_inline(self, app, tmp_path):
+        """Run jobs in the request and cache their results."""
+        app.config["ANALYSIS_WORKERS"] = 1
+        app.config["JOB_WORKERS"] = 0
+        app.config["JOB_RESULTS_DIR"] = str(tmp_path / "jobs")
+        app.config["RESULT_CACHE_DIR"] = str(tmp_path / "cache")
+
+    def test_get_study_analysis(self, client, app, tmp_path):
+        """Test getting the results of a study."""
+        self._run_jobs_inline(app, tmp_path)
+
+        with app.app_context():
+            from repositories import (
+                StudyRepository,
+                SubjectRepository,
+                MeasurementRepository,
+                PointRepository,
+            )
+
+            study = StudyRepository().create_study("Study")
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25, study.id)
+            subject_repo.commit()
+
+            point_repo = PointRepository()
+            measurement_repo = MeasurementRepository()
+            measurement_repo.create_measurement(
+                date=datetime(2025, 10, 23, 10, 30, 0),
+                subject_id=subject.id,
+                gaze_point=point_repo.create_point(100.0, 200.0),
+            )
+            measurement_repo.commit()
+
+            study_id = study.id
+
+        url = f"/api/get-study-analysis?study={study_id}&bins=8"
+        resp = client.get(url)
+        assert resp.status_code == 200
+        job = resp.get_json()
+        assert job["status"] == "succeeded"
+        assert client.get(job["download_url"]).get_json()["heatmap"]["bins"] == 8
+
+        resp = client.get(url)
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert data["subjects"] == 1
+        assert data["heatmap"]["bins"] == 8
+        # The subject has no viewport metadata to normalize its samples
+        assert data["heatmap"]["subjects"] == 0
+        assert data["per_subject"][0]["samples"] == 1
+
+        resp = client.get(f"/api/get-study-analysis?study={study_id}&fields=pupil")
+        assert resp.status_code == 400
+
+        resp = self._fetch(
+            client, f"/api/get-study-analysis?study={study_id}&min_quality=0.5"
+        )
+        assert resp.status_code == 200
+        assert resp.get_json()["subjects"] == 0
+        resp = client.get(f"/api/get-study-analysis?study={study_id}&min_quality=-1")
+        assert resp.status_code == 400
+
+        resp = client.get("/api/get-study-analysis?study=99999")
+        assert resp.status_code == 404
+
+    def test_get_scanpath_similarity(self, client, app, tmp_path):
+        """Test comparing scanpaths with a grid (GET) and with AOIs (POST)."""
+        self._run_jobs_inline(app, tmp_path)
+
+        with app.app_context():
+            from api.services import SubjectService
+            from repositories import StudyRepository, SubjectRepository
+
+            study = StudyRepository().create_study("Study")
+            subject_repo = SubjectRepository()
+            subjects = [
+                subject_repo.create_subject(f"User{i}", "Test", 25, study.id)
+                for i in range(3)
+            ]
+            subject_repo.commit()
+            for subject in subjects[:2]:
+                SubjectService().save_session_metadata(
+                    {"id": subject.id, "viewport": {"width": 800, "height": 600}}
+                )
+            study_id = study.id
+            subject_ids = [subject.id for subject in subjects]
+
+        resp = self._fetch(
+            client,
+            f"/api/get-scanpath-similarity?study={study_id}&grid=4&method=scanmatch",
+        )
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert data["encoding"] == {"grid": 4}
+        assert data["subjects"] == subject_ids[:2]
+        assert data["excluded"] == subject_ids[2:]
+        assert data["similarity"] == [[1.0, 1.0], [1.0, 1.0]]
+
+        aois = [{"x": 0.0, "y": 0.0, "width": 1.0, "height": 0.5}]
+        resp = self._fetch(
+            client, "/api/get-scanpath-similarity", {"study": study_id, "aois": aois}
+        )
+        assert resp.status_code == 200
+        assert resp.get_json()["encoding"] == {"aois": aois}
+
+        resp = client.get(f"/api/get-scanpath-similarity?study={study_id}&method=dtw")
+        assert resp.status_code == 400
+        resp = client.post(
+            "/api/get-scanpath-similarity", json={"study": study_id, "aois": "all"}
+        )
+        assert resp.status_code == 400
+        resp = client.get("/api/get-scanpath-similarity")
+        assert resp.status_code == 400
+
+        resp = client.get("/api/get-scanpath-similarity?study=99999")
+        assert resp.status_code == 404
+
+    def test_uncached_results_are_queued(self, client, app, tmp_path):
+        """Test that a result that is not cached is left to a background job."""
+        self._run_jobs_inline(app, tmp_path)
+        with app.app_context():
+            from repositories import StudyRepository
+            from state import get_job_runner
+
+            study_id = StudyRepository().create_study("Study").id
+            # A runner that never runs anything, like busy workers
+            app.config["JOB_WORKERS"] = 1
+            get_job_runner().submit = lambda *args: None
+
+        for url in (
+            f"/api/get-study-analysis?study={study_id}",
+            f"/api/get-scanpath-similarity?study={study_id}",
+        ):
+            resp = client.get(url)
+            assert resp.status_code == 202
+            job = resp.get_json()
+            assert job["status"] == "queued"
+            assert resp.headers["Location"].endswith(f"/api/jobs/{job['id']}")
+
+            # The same request is served by the same job
+            assert client.get(url).get_json()["id"] == job["id"]
+
+
+class TestSubjectListPage:
+    """Tests for the /sujetos page of the web app."""
+
+    @pytest.fixture
+    def web(self, tmp_path, monkeypatch):
+        """Load src/app.py against a temporary database, without login."""
+        from db import db
+
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'web.db'}")
+        for name in ("RESULT_CACHE_DIR", "COLD_STORAGE_DIR", "SAMPLE_STORE_DIR"):
+            monkeypatch.setenv(name, "")
+        monkeypatch.setenv("JOB_RESULTS_DIR", str(tmp_path / "jobs"))
+
+        # "import app" would resolve to the src/app/ package of templates
+        path = os.path.join(os.path.dirname(__file__), "..", "src", "app.py")
+        spec = importlib.util.spec_from_file_location("web_app", path)
+        module = importlib.util.module_from_spec(spec)
+        monkeypatch.setitem(sys.modules, "web_app", module)
+        spec.loader.exec_module(module)
+        module.app.config.update({"TESTING": True, "LOGIN_DISABLED": True})
+
+        with module.app.app_context():
+            db.create_all()
+        yield module
+
+        with module.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        db._app_engines.pop(module.app, None)
+
+    def _create(self, web):
+        """Create two studies, oldest first, and subjects in each tab."""
+        with web.app.app_context():
+            from repositories import StudyRepository, SubjectRepository
+
+            study_repo = StudyRepository()
+            older = study_repo.create_study(name="Older")
+            newer = study_repo.create_study(name="Newer")
+            older.created_at = newer.created_at - timedelta(days=1)
+            study_repo.commit()
+
+            subject_repo = SubjectRepository()
+            subject_repo.create_subject("Olga", "Older", 25, older.id)
+            subject_repo.create_subject("Nina", "Newer", 25, newer.id)
+            for name in ("Uma", "Ugo", "Ula"):
+                subject_repo.create_subject(name, "Unassigned", 25)
+            subject_repo.commit()
+            return older.id, newer.id
+
+    def test_first_study_is_shown_by_default(self, web):
+        """Test that the oldest study's tab is selected without arguments."""
+        self._create(web)
+
+        resp = web.app.test_client().get("/sujetos")
+        assert resp.status_code == 200
+        assert b"Olga Older" in resp.data
+        assert b"Nina Newer" not in resp.data
+
+    def test_subjects_without_study(self, web):
+        """Test the tab of subjects without a study."""
+        _, newer = self._create(web)
+        client = web.app.test_client()
+
+        resp = client.get("/sujetos?study=none")
+        assert resp.status_code == 200
+        assert b"Uma Unassigned" in resp.data
+        assert b"Olga Older" not in resp.data
+
+        resp = client.get(f"/sujetos?study={newer}")
+        assert b"Nina Newer" in resp.data
+        assert b"Uma Unassigned" not in resp.data
+
+    def test_unknown_study_is_not_found(self, web):
+        """Test that a study that does not exist gives a 404."""
+        self._create(web)
+        client = web.app.test_client()
+
+        assert client.get("/sujetos?study=99999").status_code == 404
+        assert client.get("/sujetos?study=abc").status_code == 404
+
+    def test_out_of_range_page_is_clamped(self, web, monkeypatch):
+        """Test that pages outside the list show its first or last page."""
+        self._create(web)
+        monkeypatch.setattr(web, "SUBJECTS_PER_PAGE", 2)
+        client = web.app.test_client()
+
+        # Subjects are listed by ID: Uma and Ugo, then Ula
+        resp = client.get("/sujetos?study=none&page=99")
+        assert resp.status_code == 200
+        assert b"Ula Unassigned" in resp.data
+        assert b"Uma Unassigned" not in resp.data
+
+        for page in (0, -3, "x"):
+            resp = client.get(f"/sujetos?study=none&page={page}")
+            assert resp.status_code == 200
+            assert b"Uma Unassigned" in resp.data
+            assert b"Ula Unassigned" not in resp.data
+
+
+class TestJobRoutes:
+    """Tests for the background job endpoints."""
+
+    def test_job_lifecycle(self, client, app, tmp_path):
+        """Test submitting a job, polling it and downloading its result."""
+        import time
+
+        app.config["JOB_WORKERS"] = 1
+        app.config["JOB_RESULTS_DIR"] = str(tmp_path)
+        app.config["ANALYSIS_WORKERS"] = 1
+
+        with app.app_context():
+            from repositories import StudyRepository, SubjectRepository
+
+            study = StudyRepository().create_study("Study")
+            subject_repo = SubjectRepository()
+            subject_repo.create_subject("Test", "User", 25, study.id)
+            subject_repo.commit()
+            study_id = study.id
+
+        resp = client.post(
+            "/api/jobs",
+            json={"kind": "study-analysis", "params": {"study": study_id, "bins": 4}},
+        )
+        assert resp.status_code == 202
+        job = resp.get_json()
+        assert resp.headers["Location"].endswith(f"/api/jobs/{job['id']}")
+
+        for _ in range(100):
+            job = client.get(f"/api/jobs/{job['id']}").get_json()
+            if job["status"] in ("succeeded", "failed"):
+                break
+            time.sleep(0.05)
+
+        assert job["status"] == "succeeded"
+        resp = client.get(job["download_url"])
+        assert resp.status_code == 200
+        assert resp.content_type == "application/json"
+        assert resp.get_json()["heatmap"]["bins"] == 4
+
+        with app.app_context():
+            from state import get_job_runner
+
+            get_job_runner().shutdown()
+
+    def test_job_errors(self, client, app, tmp_path):
+        """Test invalid jobs, unknown jobs and downloads of failed jobs."""
+        app.config["JOB_WORKERS"] = 0
+        app.config["JOB_RESULTS_DIR"] = str(tmp_path)
+
+        resp = client.post("/api/jobs", json={"kind": "reindex"})
+        assert resp.status_code == 400
+
+        resp = client.post("/api/jobs", json={"kind": "points-csv", "params": []})
+        assert resp.status_code == 400
+
+        resp = client.post(
+            "/api/jobs", json={"kind": "points-csv", "params": {"subject": 99999}}
+        )
+        assert resp.status_code == 200
+        job = resp.get_json()
+        assert job["status"] == "failed"
+        assert "download_url" not in job
+
+        resp = client.get(f"/api/jobs/{job['id']}/download")
+        assert resp.status_code == 409
+
+        resp = client.post(
+            "/api/jobs",
+            json={"kind": "scanpath-similarity", "params": {"study": 1, "aois": []}},
+        )
+        assert resp.status_code == 400
+
+        resp = client.post(
+            "/api/jobs", json={"kind": "all-points-csv", "params": {"min_quality": 5}}
+        )
+        assert resp.status_code == 400
+
+        assert client.get("/api/jobs/missing").status_code == 404
+        assert client.get("/api/jobs/missing/download").status_code == 404
+
+
 class TestConfigRoutes:
     """Tests for configuration-related endpoints."""
 
@@ -256,3 +1070,78 @@ class TestConfigRoutes:
         resp = client.get("/api/tasks")
         # Similar to config, may not exist in test env
         assert resp.status_code in [200, 404]
+
+    def test_config_endpoint_revalidation(self, client):
+        """Test that config is served with an ETag and answers 304."""
+        resp = client.get("/api/config")
+        assert resp.status_code == 200
+        assert resp.is_json
+        assert resp.headers["ETag"]
+        assert "no-cache" in resp.headers["Cache-Control"]
+
+        resp2 = client.get(
+            "/api/config", headers={"If-None-Match": resp.headers["ETag"]}
+        )
+        assert resp2.status_code == 304
+        assert resp2.data == b""
+
+    def test_tasks_endpoint_serves_current_file(self, client):
+        """Test that the tasks body matches the file on disk."""
+        import os
+        from api.routes import config_manager
+
+        resp = client.get("/api/tasks")
+        assert resp.status_code == 200
+
+        path = os.path.join(config_manager.config_dir, "tasks.json")
+        with open(path, encoding="utf-8") as f:
+            assert resp.get_json() == json.load(f)
+
+
+class TestLazySwagger:
+    """Tests for the lazily loaded API documentation."""
+
+    def _swagger(self, app):
+        from api.docs import LazySwagger
+
+        config = {
+            "headers": [],
+            "specs": [
+                {
+                    "endpoint": "apispec_1",
+                    "route": "/apispec_1.json",
+                    "rule_filter": lambda rule: True,
+                    "model_filter": lambda tag: True,
+                }
+            ],
+            "static_url_path": "/flasgger_static",
+            "swagger_ui": True,
+            "specs_route": "/apidocs/",
+        }
+        return LazySwagger(app, config=config, template={"swagger": "2.0"})
+
+    def test_spec_built_on_first_request(self, app):
+        """Test that flasgger is only set up when the spec is requested."""
+        swagger = self._swagger(app)
+        client = app.test_client()
+
+        client.get("/api/get-subjects")
+        assert not swagger.loaded
+
+        resp = client.get("/apispec_1.json")
+        assert resp.status_code == 200
+        assert swagger.loaded
+        assert "/api/get-user-points" in resp.get_json()["paths"]
+
+    def test_apidocs_page(self, app):
+        """Test that the Swagger UI page and its assets are served."""
+        self._swagger(app)
+        client = app.test_client()
+
+        resp = client.get("/apidocs/")
+        assert resp.status_code == 200
+        assert b"apispec_1.json" in resp.data
+
+        resp = client.get("/flasgger_static/swagger-ui.css")
+        assert resp.status_code == 200
+        resp.close()
@@ -4,7 +4,8 @@ Tests for API services.
 
 import pytest
 import io
-from datetime import datetime
+import json
+from datetime import datetime, timedelta
 from db.models import Subject, Point, Measurement, TaskLog
 
 
@@ -63,6 +64,125 @@ class TestSubjectService:
             # Non-existent
             assert service.get_subject_by_id(99999) is None
 
+    def test_save_session_metadata(self, app):
+        """Test saving the viewport and frame of a session."""
+        with app.app_context():
+            from api.services import SubjectService
+            from repositories import SubjectRepository
+
+            repo = SubjectRepository()
+            subject = repo.create_subject("Test", "User", 25)
+            repo.commit()
+            version = subject.data_version
+
+            service = SubjectService()
+            result = service.save_session_metadata(
+                {
+                    "id": subject.id,
+                    "viewport": {"width": 1280, "height": 720},
+                    "devicePixelRatio": 2,
+                    "frame": {"x": 0, "y": 40, "width": 1280, "height": 680},
+                }
+            )
+
+            assert result["status"] == "success"
+            subject = service.get_subject_by_id(subject.id)
+            assert subject.viewport_width == 1280
+            assert subject.device_pixel_ratio == 2.0
+            assert subject.canonical_frame == (0.0, 40.0, 1280.0, 680.0)
+            assert subject.data_version != version
+
+            # Without a frame the whole viewport is used
+            service.save_session_metadata(
+                {"id": subject.id, "viewport": {"width": 800, "height": 600}}
+            )
+            subject = service.get_subject_by_id(subject.id)
+            assert subject.canonical_frame == (0.0, 0.0, 800.0, 600.0)
+            assert subject.device_pixel_ratio == 1.0
+
+            with pytest.raises(ValueError):
+                service.save_session_metadata(
+                    {"id": subject.id, "viewport": {"width": 0, "height": 600}}
+                )
+
+            assert (
+                service.save_session_metadata(
+                    {"id": 99999, "viewport": {"width": 800, "height": 600}}
+                )
+                is None
+            )
+
+    def test_save_calibration_quality(self, app):
+        """Test scoring the calibration of a session from validation samples."""
+        with app.app_context():
+            from api.services import SubjectService
+            from repositories import SubjectRepository
+
+            repo = SubjectRepository()
+            subject = repo.create_subject("Test", "User", 25)
+            repo.commit()
+            version = subject.data_version
+
+            service = SubjectService()
+            samples = {
+                "id": subject.id,
+                "x_target": [100, 100, 500, 500],
+                "y_target": [100, 100, 300, 300],
+                "x_gaze": [90, 110, 530, None],
+                "y_gaze": [100, 100, 300, None],
+                "viewport": {"width": 800, "height": 200},
+            }
+            result = service.save_calibration_quality(samples)
+
+            assert result["status"] == "success"
+            assert result["accuracy"] == 15.0
+            assert result["samples"] == 3
+            assert result["score"] == round((0.9 + 0.9 + 0.7) / 3, 3)
+
+            subject = service.get_subject_by_id(subject.id)
+            assert subject.calibration_score == result["score"]
+            assert subject.calibration_accuracy == 15.0
+            assert subject.data_version != version
+            assert service.get_all_subjects()[0]["calibration_score"] == result["score"]
+
+            # Without a viewport in the request, the session metadata is used
+            del samples["viewport"]
+            service.save_session_metadata(
+                {"id": subject.id, "viewport": {"width": 800, "height": 200}}
+            )
+            assert service.save_calibration_quality(samples)["score"] == result["score"]
+
+            for invalid in (
+                {**samples, "x_gaze": [1, 2]},
+                {**samples, "x_gaze": [None] * 4, "y_gaze": [None] * 4},
+                {**samples, "x_target": [None, 1, 2, 3]},
+            ):
+                with pytest.raises(ValueError):
+                    service.save_calibration_quality(invalid)
+
+            assert service.save_calibration_quality({**samples, "id": 99999}) is None
+
+    def test_save_calibration_quality_without_viewport(self, app):
+        """Test that the score needs the viewport height."""
+        with app.app_context():
+            from api.services import SubjectService
+            from repositories import SubjectRepository
+
+            repo = SubjectRepository()
+            subject = repo.create_subject("Test", "User", 25)
+            repo.commit()
+
+            with pytest.raises(ValueError):
+                SubjectService().save_calibration_quality(
+                    {
+                        "id": subject.id,
+                        "x_target": [100],
+                        "y_target": [100],
+                        "x_gaze": [100],
+                        "y_gaze": [100],
+                    }
+                )
+
 
 class TestMeasurementService:
     """Tests for MeasurementService."""
@@ -110,6 +230,82 @@ class TestMeasurementService:
             assert measurements[0].gaze_point.x == 100.5
             assert measurements[0].mouse_point.y == 205.0
 
+    def test_save_points_resent_batch(self, app):
+        """Test that a resent batch is acknowledged without saving it twice."""
+        with app.app_context():
+            from api.services import MeasurementService
+            from repositories import SubjectRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            def batch(batch_id, second):
+                return {
+                    "id": subject.id,
+                    "batch_id": batch_id,
+                    "points": [
+                        {
+                            "date": f"10/23/2025, 10:30:{second:02d} AM",
+                            "gaze": {"x": second, "y": second},
+                            "mouse": {"x": second, "y": second},
+                        }
+                    ],
+                }
+
+            service = MeasurementService()
+            result = service.save_points(batch("b2", 5))
+            assert result["duplicate"] is False
+            assert result["batch_size"] >= 20
+            assert result["flush_interval_ms"] >= 1000
+            # A late batch recorded earlier arrives after a newer one
+            assert service.save_points(batch("b1", 1))["duplicate"] is False
+            assert service.save_points(batch("b2", 5))["duplicate"] is True
+
+            points = service.get_user_points(subject.id)["points"]
+            assert [p["x_gaze"] for p in points] == [1, 5]
+            assert subject_repo.get_subject_by_id(subject.id).sample_count == 2
+
+    def test_save_points_columnar(self, app):
+        """Test saving a columnar batch with epoch millisecond timestamps."""
+        import numpy as np
+
+        with app.app_context():
+            from api.services import MeasurementService
+            from repositories import SubjectRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            service = MeasurementService()
+            service.save_points(
+                {
+                    "id": subject.id,
+                    "layout": "columnar",
+                    "columns": {
+                        # 2025-10-09 08:53:20 UTC, stored in Buenos Aires time
+                        "t": [1760000000123, 1760000000456, 1760000000789],
+                        "x_gaze": [1, None, 3],
+                        "y_gaze": [2, 2, 4],
+                        "x_mouse": [5, 5, 6],
+                        "y_mouse": [7, 7, 8],
+                    },
+                }
+            )
+
+            samples = service.repository.get_sample_arrays(subject.id)
+            assert samples["x_gaze"].tolist() == [1, 3]
+            assert samples["date"][0] == np.datetime64("2025-10-09T05:53:20.123")
+
+    def test_epoch_ms_to_dates_across_offset_change(self):
+        """Test converting timestamps around a daylight saving change."""
+        from api import services
+
+        # Buenos Aires moved from UTC-3 to UTC-2 on 2008-10-19
+        dates = services.epoch_ms_to_dates([1224381600000, 1224388800000])
+        assert dates == [datetime(2008, 10, 18, 23), datetime(2008, 10, 19, 2)]
+
     def test_get_user_points(self, app):
         """Test getting measurement points for a user."""
         with app.app_context():
@@ -147,6 +343,154 @@ class TestMeasurementService:
             assert result["points"][0]["x_gaze"] == 100.0
             assert result["points"][0]["y_mouse"] == 205.0
 
+    def test_get_user_points_paginated(self, app):
+        """Test paging through points with a cursor and field projection."""
+        with app.app_context():
+            from api.services import MeasurementService
+            from repositories import (
+                SubjectRepository,
+                MeasurementRepository,
+                PointRepository,
+            )
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            point_repo = PointRepository()
+            measurement_repo = MeasurementRepository()
+
+            # Two samples per second so pages split samples sharing a date
+            for i in range(10):
+                measurement_repo.create_measurement(
+                    date=datetime(2025, 10, 23, 10, 30, i // 2),
+                    subject_id=subject.id,
+                    gaze_point=point_repo.create_point(float(i), 0.0),
+                    mouse_point=point_repo.create_point(0.0, float(i)),
+                )
+            measurement_repo.commit()
+
+            service = MeasurementService()
+
+            seen = []
+            cursor = None
+            while True:
+                page = service.get_user_points(
+                    subject.id, limit=3, cursor=cursor, sources=("gaze",)
+                )
+                seen += [p["x_gaze"] for p in page["points"]]
+                assert all("x_mouse" not in p for p in page["points"])
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    break
+
+            assert seen == [float(i) for i in range(10)]
+
+            window = service.get_user_points(
+                subject.id,
+                start=datetime(2025, 10, 23, 10, 30, 1),
+                end=datetime(2025, 10, 23, 10, 30, 2),
+            )
+            assert [p["y_mouse"] for p in window["points"]] == [2.0, 3.0, 4.0, 5.0]
+
+            with pytest.raises(ValueError):
+                service.get_user_points(subject.id, limit=3, cursor="not-a-cursor")
+
+    def test_get_user_points_columnar(self, app):
+        """Test getting points as parallel arrays."""
+        with app.app_context():
+            import base64
+            import numpy as np
+            from api.services import MeasurementService
+            from repositories import (
+                SubjectRepository,
+                MeasurementRepository,
+                PointRepository,
+            )
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            point_repo = PointRepository()
+            measurement_repo = MeasurementRepository()
+
+            measurement_repo.create_measurement(
+                date=datetime(2025, 10, 23, 10, 30, 0),
+                subject_id=subject.id,
+                gaze_point=point_repo.create_point(100.0, 200.0),
+                mouse_point=point_repo.create_point(105.0, 205.0),
+            )
+            measurement_repo.create_measurement(
+                date=datetime(2025, 10, 23, 10, 30, 1),
+                subject_id=subject.id,
+                gaze_point=point_repo.create_point(110.0, 210.0),
+            )
+            measurement_repo.commit()
+
+            service = MeasurementService()
+            result = service.get_user_points(subject.id, layout="columnar")
+
+            assert result["count"] == 2
+            columns = result["columns"]
+            assert columns["x_gaze"] == [100.0, 110.0]
+            assert columns["x_mouse"] == [105.0, None]
+            assert columns["date"][1] - columns["date"][0] == 1000
+
+            encoded = service.get_user_points(
+                subject.id, layout="columnar", encoding="base64", sources=("gaze",)
+            )
+            y_gaze = np.frombuffer(
+                base64.b64decode(encoded["columns"]["y_gaze"]), dtype="<f8"
+            )
+            assert y_gaze.tolist() == [200.0, 210.0]
+            assert "x_mouse" not in encoded["columns"]
+
+    def test_get_user_replay(self, app):
+        """Test getting downsampled trajectories for a user."""
+        with app.app_context():
+            from api.services import MeasurementService
+            from repositories import (
+                SubjectRepository,
+                MeasurementRepository,
+                PointRepository,
+            )
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            point_repo = PointRepository()
+            measurement_repo = MeasurementRepository()
+
+            for i in range(30):
+                measurement_repo.create_measurement(
+                    date=datetime(2025, 10, 23, 10, 30, i),
+                    subject_id=subject.id,
+                    gaze_point=point_repo.create_point(float(i), 2.0 * i),
+                    mouse_point=point_repo.create_point(float(i), 0.0),
+                )
+            measurement_repo.commit()
+
+            service = MeasurementService()
+            result = service.get_user_replay(subject.id, frames=10)
+
+            assert result["total_samples"] == 30
+            assert len(result["gaze"]["x"]) == 10
+            assert result["gaze"]["t"][0] == 0.0
+            assert result["gaze"]["t"][-1] == 29.0
+
+            window = service.get_user_replay(
+                subject.id,
+                frames=100,
+                start=datetime(2025, 10, 23, 10, 30, 10),
+                end=datetime(2025, 10, 23, 10, 30, 19),
+                method="mean",
+            )
+
+            assert window["total_samples"] == 10
+            assert window["mouse"]["x"][0] == 10.0
+
     def test_get_user_points_not_found(self, app):
         """Test getting points for non-existent user."""
         with app.app_context():
@@ -205,6 +549,68 @@ class TestTaskLogService:
             assert logs[0].response == "Completed"
             assert logs[1].end_time is None
 
+    def test_save_tasklogs_fills_task_metadata(self, app, tmp_path, monkeypatch):
+        """Test that task details are copied from tasks.json in one insert."""
+        import json
+        from api import services
+        from state import ConfigManager
+
+        (tmp_path / "tasks.json").write_text(
+            json.dumps(
+                {
+                    "tasks": [
+                        {"task": "Find the menu", "type": "bool", "version": 1},
+                        {"task": "Count items", "type": "numeric", "version": 2},
+                    ]
+                }
+            )
+        )
+        monkeypatch.setattr(
+            services, "config_manager", ConfigManager(config_dir=str(tmp_path))
+        )
+
+        with app.app_context():
+            from repositories import SubjectRepository, TaskLogRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            logs = [
+                {
+                    "startTime": "10/23/2025, 10:00:00 AM",
+                    "endTime": "10/23/2025, 10:00:05 AM",
+                    "response": "yes",
+                    "taskIndex": 1,
+                },
+                {
+                    "startTime": "10/23/2025, 10:00:05 AM",
+                    "endTime": "10/23/2025, 10:00:05 AM",
+                    "response": "skipped",
+                },
+            ]
+            services.TaskLogService().save_tasklogs(
+                {"subject_id": subject.id, "taskLogs": logs}
+            )
+
+            saved = TaskLogRepository().get_tasklogs_by_subject(subject.id)
+            assert [log.task_description for log in saved] == ["Count items", None]
+            assert saved[0].task_type == "numeric"
+            assert saved[0].task_version == 2
+            assert saved[1].start_time == datetime(2025, 10, 23, 10, 0, 5)
+            assert subject_repo.get_subject_by_id(subject.id).tasklog_count == 2
+
+    def test_parse_client_dates(self):
+        """Test that repeated and empty timestamps are parsed in order."""
+        from api.services import parse_client_dates
+
+        values = ["10/23/2025, 01:00:00 PM", None, "10/23/2025, 01:00:00 PM"]
+        assert parse_client_dates(values) == [
+            datetime(2025, 10, 23, 13, 0, 0),
+            None,
+            datetime(2025, 10, 23, 13, 0, 0),
+        ]
+
     def test_get_user_tasklogs(self, app):
         """Test getting task logs for a user."""
         with app.app_context():
@@ -337,6 +743,109 @@ class TestExportService:
 
             assert csv_data is None
 
+    def test_export_points_csv_cached(self, app, tmp_path):
+        """Test that exports are cached per data version."""
+        app.config["RESULT_CACHE_DIR"] = str(tmp_path)
+
+        with app.app_context():
+            from api.services import ExportService, MeasurementService
+            from repositories import SubjectRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            def save(second):
+                MeasurementService().save_points(
+                    {
+                        "id": subject.id,
+                        "points": [
+                            {
+                                "date": f"10/23/2025, 10:30:{second:02d} AM",
+                                "gaze": {"x": 100.0 + second, "y": 200.0},
+                                "mouse": {"x": 105.0, "y": 205.0},
+                            }
+                        ],
+                    }
+                )
+
+            save(0)
+            service = ExportService()
+            first = service.export_points_csv(subject.id).read()
+
+            cached_files = list(tmp_path.rglob("*.points.csv"))
+            assert len(cached_files) == 1
+            assert cached_files[0].read_bytes() == first
+
+            # New data changes the version, so the old entry is never served
+            # and is left to LRU eviction instead of being deleted on ingest
+            save(1)
+
+            assert list(tmp_path.rglob("*.points.csv")) == cached_files
+            second = service.export_points_csv(subject.id).read().decode("utf-8")
+            assert "101.0" in second
+            assert len(list(tmp_path.rglob("*.points.csv"))) == 2
+
+    def test_export_all_points_csv(self, app):
+        """Test exporting the points of every subject."""
+        with app.app_context():
+            from api.services import ExportService
+            from repositories import (
+                SubjectRepository,
+                MeasurementRepository,
+                PointRepository,
+            )
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            point_repo = PointRepository()
+            measurement_repo = MeasurementRepository()
+            measurement_repo.create_measurement(
+                date=datetime(2025, 10, 23, 10, 30, 0),
+                subject_id=subject.id,
+                gaze_point=point_repo.create_point(100.0, 200.0),
+                mouse_point=point_repo.create_point(105.0, 205.0),
+            )
+            measurement_repo.commit()
+
+            csv_data = ExportService().export_all_points_csv()
+            lines = csv_data.read().decode("utf-8").splitlines()
+
+            assert lines == [
+                "id,x,y",
+                f"{subject.id},105.0,205.0",
+                f"{subject.id},100.0,200.0",
+            ]
+
+    def test_export_all_points_csv_min_quality(self, app):
+        """Test leaving out subjects with a low calibration score."""
+        with app.app_context():
+            from api.services import ExportService
+            from repositories import SubjectRepository, MeasurementRepository
+
+            subject_repo = SubjectRepository()
+            good = subject_repo.create_subject("Good", "User", 25)
+            poor = subject_repo.create_subject("Poor", "User", 25)
+            subject_repo.commit()
+            subject_repo.record_session_metadata(good.id, {"calibration_score": 0.8})
+            subject_repo.record_session_metadata(poor.id, {"calibration_score": 0.2})
+            subject_repo.commit()
+
+            measurement_repo = MeasurementRepository()
+            for subject in (good, poor):
+                measurement_repo.create_measurement(
+                    date=datetime(2025, 10, 23, 10, 30, 0), subject_id=subject.id
+                )
+            measurement_repo.commit()
+
+            service = ExportService()
+            assert len(service.export_all_points_csv().read().splitlines()) == 1
+
+            assert service.export_all_points_csv(0.9) is None
+            assert service.export_all_points_csv(0.5) is not None
+
     def test_export_all_points_csv_empty(self, app):
         """Test exporting all points when no subjects exist."""
         with app.app_context():
@@ -346,3 +855,717 @@ class TestExportService:
             csv_data = service.export_all_points_csv()
 
             assert csv_data is None
+
+
+class TestSampleStoreReads:
+    """Tests for reading samples through the sample store."""
+
+    def _save(self, subject_id, seconds):
+        from api.services import MeasurementService
+
+        MeasurementService().save_points(
+            {
+                "id": subject_id,
+                "points": [
+                    {
+                        "date": f"10/23/2025, 10:30:{s:02d} AM",
+                        "mouse": {"x": s, "y": s},
+                        "gaze": {"x": s + 100, "y": s + 100},
+                    }
+                    for s in seconds
+                ],
+            }
+        )
+
+    def test_reads_match_database(self, app, tmp_path):
+        """Test that store reads match the database, including late batches."""
+        app.config["SAMPLE_STORE_DIR"] = str(tmp_path)
+
+        with app.app_context():
+            from api.services import MeasurementService
+            from repositories import SubjectRepository
+            from storage import get_sample_store
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            self._save(subject.id, [0, 2, 6])
+            self._save(subject.id, [4])
+            assert get_sample_store().count(subject.id) == 4
+
+            service = MeasurementService()
+            repo = service.repository
+            stored = repo.get_sample_arrays(subject.id)
+            database = repo.get_sample_arrays(subject.id, include_cold=False)
+            for name in database:
+                assert stored[name].tolist() == database[name].tolist()
+
+            window = repo.get_sample_arrays(
+                subject.id,
+                start=datetime(2025, 10, 23, 10, 30, 2),
+                end=datetime(2025, 10, 23, 10, 30, 4),
+            )
+            assert window["x_mouse"].tolist() == [2, 4]
+
+            page = service.get_user_points(subject.id, limit=3)
+            page = service.get_user_points(
+                subject.id, limit=3, cursor=page["next_cursor"]
+            )
+            assert [p["x_mouse"] for p in page["points"]] == [6]
+
+    def test_missing_file_is_rebuilt_by_the_writer(self, app, tmp_path):
+        """Test that reads fall back to the database and writes rebuild the store."""
+        with app.app_context():
+            from api.services import MeasurementService
+            from repositories import SubjectRepository
+            from storage import get_sample_store
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+            self._save(subject.id, [0, 1, 2])
+
+            app.config["SAMPLE_STORE_DIR"] = str(tmp_path)
+            repo = MeasurementService().repository
+            assert repo.get_sample_arrays(subject.id)["x_mouse"].tolist() == [0, 1, 2]
+            assert get_sample_store().count(subject.id) == 0
+
+            self._save(subject.id, [3, 4])
+            assert get_sample_store().count(subject.id) == 5
+            stored = get_sample_store().read(subject.id)
+            assert stored["x_mouse"].tolist() == [0, 1, 2, 3, 4]
+
+    def test_batch_already_in_a_rebuilt_store_is_not_appended(self, app, tmp_path):
+        """Test a writer appending after the store was rebuilt with its batch."""
+        app.config["SAMPLE_STORE_DIR"] = str(tmp_path)
+
+        with app.app_context():
+            from repositories import MeasurementRepository, SubjectRepository
+            from storage import get_sample_store
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+            self._save(subject.id, [0, 1])
+
+            # A second batch of the same size is committed, the store is
+            # rebuilt with it, and only then does its writer append it
+            repo = MeasurementRepository()
+            samples = [
+                (datetime(2025, 10, 23, 10, 30, s), s, s, s + 100, s + 100)
+                for s in (2, 3)
+            ]
+            ids = repo.bulk_create_samples(subject.id, samples)
+            subject_repo.record_samples(subject.id, len(ids), max(ids))
+            repo.commit()
+            repo.refresh_store(subject.id)
+            repo.append_to_store(subject.id, ids, samples)
+
+            stored = get_sample_store().read(subject.id)
+            assert stored["x_mouse"].tolist() == [0, 1, 2, 3]
+            read = repo.get_sample_arrays(subject.id)
+            assert read["x_mouse"].tolist() == [0, 1, 2, 3]
+
+    def test_compaction_builds_the_store(self, app, tmp_path):
+        """Test that compacting a finished session gives it a complete store."""
+        app.config["COLD_STORAGE_DIR"] = str(tmp_path / "cold")
+
+        with app.app_context():
+            from api.services import CompactionService
+            from repositories import SubjectRepository
+            from storage import get_sample_store
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+            self._save(subject.id, [0, 1, 2])
+
+            app.config["SAMPLE_STORE_DIR"] = str(tmp_path / "samples")
+            CompactionService().compact_subject(subject.id)
+            stored = get_sample_store().read(subject.id)
+            assert stored["x_mouse"].tolist() == [0, 1, 2]
+
+
+class TestCompactionService:
+    """Tests for CompactionService."""
+
+    def _save(self, subject_id, seconds):
+        from api.services import MeasurementService
+
+        MeasurementService().save_points(
+            {
+                "id": subject_id,
+                "points": [
+                    {
+                        "date": f"10/23/2025, 10:30:{s:02d} AM",
+                        "mouse": {"x": s, "y": s},
+                        "gaze": {"x": s + 100, "y": s + 100},
+                    }
+                    for s in seconds
+                ],
+            }
+        )
+
+    def test_compacted_subject_keeps_its_summary(self, app, tmp_path):
+        """Test that the subject list still counts samples moved out of the DB."""
+        app.config["COLD_STORAGE_DIR"] = str(tmp_path)
+
+        with app.app_context():
+            from api.services import CompactionService
+            from repositories import SubjectRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            self._save(subject.id, [0, 2, 4])
+            before = subject_repo.get_subject_summaries(None)
+
+            CompactionService().compact_subject(subject.id)
+
+            summaries = subject_repo.get_subject_summaries(None)
+            assert [(s.id, count) for s, count, _ in summaries] == [(subject.id, 3)]
+            assert summaries[0][2] is not None
+            assert summaries == before
+
+    def test_samples_saved_during_compaction_are_not_duplicated(
+        self, app, tmp_path, monkeypatch
+    ):
+        """Test that a batch committed while compacting stays only in the DB."""
+        app.config["COLD_STORAGE_DIR"] = str(tmp_path)
+
+        with app.app_context():
+            from api.services import CompactionService, MeasurementService
+            from repositories import MeasurementRepository, SubjectRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            self._save(subject.id, [0, 2])
+            CompactionService().compact_subject(subject.id)
+            self._save(subject.id, [4, 6])
+
+            # Another batch is committed right after the database is read
+            read = MeasurementRepository.get_sample_arrays
+            late = [[8]]
+
+            def read_then_save(repo, *args, **kwargs):
+                arrays = read(repo, *args, **kwargs)
+                if late:
+                    self._save(subject.id, late.pop())
+                return arrays
+
+            monkeypatch.setattr(
+                MeasurementRepository, "get_sample_arrays", read_then_save
+            )
+            assert CompactionService().compact_subject(subject.id) == 2
+            monkeypatch.undo()
+
+            assert Measurement.query.count() == 1
+            service = MeasurementService()
+            xs = [p["x_mouse"] for p in service.get_user_points(subject.id)["points"]]
+            assert xs == [0, 2, 4, 6, 8]
+
+    def test_compacted_samples_are_read_transparently(self, app, tmp_path):
+        """Test that reads merge cold files with samples still in the DB."""
+        app.config["COLD_STORAGE_DIR"] = str(tmp_path)
+
+        with app.app_context():
+            from api.services import CompactionService, MeasurementService
+            from repositories import SubjectRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            self._save(subject.id, [0, 2, 4, 6])
+            before = MeasurementService().get_user_points(subject.id)
+
+            assert CompactionService().compact_subject(subject.id) == 4
+            assert Measurement.query.count() == 0
+            assert Point.query.count() == 0
+            assert MeasurementService().get_user_points(subject.id) == before
+
+            # Late samples stay in the database and are merged in order
+            self._save(subject.id, [3, 8])
+            service = MeasurementService()
+            xs = [p["x_mouse"] for p in service.get_user_points(subject.id)["points"]]
+            assert xs == [0, 2, 3, 4, 6, 8]
+
+            page = service.get_user_points(subject.id, limit=3)
+            page = service.get_user_points(
+                subject.id, limit=3, cursor=page["next_cursor"]
+            )
+            assert [p["x_mouse"] for p in page["points"]] == [4, 6, 8]
+
+            window = service.repository.get_sample_arrays(
+                subject.id, start=datetime(2025, 10, 23, 10, 30, 2)
+            )
+            assert window["x_gaze"].tolist() == [102, 103, 104, 106, 108]
+
+            # Streaming merges cold and hot samples chunk by chunk
+            chunks = service.repository.iter_sample_chunks(subject.id, chunk_size=1)
+            xs = [x for chunk in chunks for x in chunk["x_mouse"].tolist()]
+            assert xs == [0, 2, 3, 4, 6, 8]
+
+    def test_compact_idle_subjects(self, app, tmp_path):
+        """Test that only subjects without recent data are compacted."""
+        app.config["COLD_STORAGE_DIR"] = str(tmp_path)
+
+        with app.app_context():
+            from datetime import timedelta
+            from api.services import CompactionService
+            from repositories import SubjectRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+            self._save(subject.id, [0, 1])
+
+            service = CompactionService()
+            assert service.compact_idle_subjects(idle=timedelta(hours=1)) == {}
+            assert service.compact_idle_subjects(idle=timedelta(0)) == {subject.id: 2}
+
+
+class TestStudyAnalysisService:
+    """Tests for StudyAnalysisService."""
+
+    def _create_study(self):
+        """Create a study with two normalized subjects and one without metadata."""
+        from api.services import MeasurementService, SubjectService
+        from repositories import StudyRepository, SubjectRepository, TaskLogRepository
+
+        study = StudyRepository().create_study("Study")
+        subject_repo = SubjectRepository()
+        subjects = [
+            subject_repo.create_subject(f"User{i}", "Test", 25, study.id)
+            for i in range(3)
+        ]
+        subject_repo.create_subject("Other", "Study", 30)
+        subject_repo.commit()
+
+        # The same relative position on screens of different sizes
+        for subject, width in zip(subjects[:2], (1000, 2000)):
+            SubjectService().save_session_metadata(
+                {"id": subject.id, "viewport": {"width": width, "height": width}}
+            )
+        for subject, scale in zip(subjects, (1000, 2000, 1000)):
+            MeasurementService().save_points(
+                {
+                    "id": subject.id,
+                    "columns": {
+                        "t": [1761226200000 + 20 * i for i in range(50)],
+                        "x_gaze": [0.75 * scale] * 50,
+                        "y_gaze": [0.25 * scale] * 50,
+                        "x_mouse": [0.0] * 50,
+                        "y_mouse": [0.0] * 50,
+                    },
+                    "layout": "columnar",
+                }
+            )
+
+        start = datetime(2025, 10, 23, 10, 0, 0)
+        TaskLogRepository().bulk_create_tasklogs(
+            [
+                {
+                    "start_time": start,
+                    "end_time": start + timedelta(seconds=seconds),
+                    "subject_id": subject.id,
+                    "task_description": "Find the cart",
+                }
+                for subject, seconds in zip(subjects, (10, 20, 60))
+            ]
+            + [
+                {
+                    "start_time": start,
+                    "subject_id": subjects[0].id,
+                    "task_description": "Find the cart",
+                }
+            ]
+        )
+        subject_repo.commit()
+        return study, subjects
+
+    def _check(self, result, subjects):
+        data = json.loads(result)
+        assert data["subjects"] == 3
+        heatmap = data["heatmap"]
+        assert heatmap["subjects"] == 2
+        assert heatmap["total"] == 100
+        assert heatmap["cells"] == {"x": [0.75], "y": [0.25], "count": [100]}
+        assert data["fixations"]["count"] == 3
+        assert data["fixations"]["median_duration_ms"] == 980
+        assert [s["subject_id"] for s in data["per_subject"]] == [
+            s.id for s in subjects
+        ]
+        assert [s["normalized"] for s in data["per_subject"]] == [True, True, False]
+        assert data["tasks"] == [
+            {
+                "task": "Find the cart",
+                "logs": 4,
+                "completed": 3,
+                "mean_seconds": 30.0,
+                "median_seconds": 20.0,
+            }
+        ]
+
+    def test_analyze_study_inline(self, app):
+        """Test the study results computed in the request process."""
+        app.config["ANALYSIS_WORKERS"] = 1
+
+        with app.app_context():
+            from api.services import StudyAnalysisService
+
+            study, subjects = self._create_study()
+            progress = []
+
+            result = StudyAnalysisService().analyze_study(
+                study.id, 2, ["gaze"], lambda done, total: progress.append(done)
+            )
+
+            self._check(result, subjects)
+            assert progress == [1, 2, 3]
+            assert StudyAnalysisService().analyze_study(99999, 2) is None
+
+    def test_analyze_study_process_pool(self, app, tmp_path):
+        """Test the study results computed in worker processes and cached."""
+        app.config["ANALYSIS_WORKERS"] = 2
+        app.config["RESULT_CACHE_DIR"] = str(tmp_path)
+
+        with app.app_context():
+            from api.services import StudyAnalysisService
+
+            study, subjects = self._create_study()
+            progress = []
+
+            result = StudyAnalysisService().analyze_study(
+                study.id, 2, ["gaze"], lambda done, total: progress.append(total)
+            )
+
+            self._check(result, subjects)
+            assert progress == [3, 3, 3]
+
+            # Served from the cache until a subject of the study changes
+            service = StudyAnalysisService()
+            assert (
+                service.analyze_study(study.id, 2, ["gaze"], progress.append) == result
+            )
+            assert progress == [3, 3, 3]
+
+    def test_analyze_study_min_quality(self, app):
+        """Test that low-quality sessions are left out of the study results."""
+        app.config["ANALYSIS_WORKERS"] = 1
+
+        with app.app_context():
+            from api.services import StudyAnalysisService
+            from repositories import SubjectRepository
+
+            study, subjects = self._create_study()
+            repo = SubjectRepository()
+            repo.record_session_metadata(subjects[0].id, {"calibration_score": 0.9})
+            repo.record_session_metadata(subjects[1].id, {"calibration_score": 0.1})
+            repo.commit()
+
+            data = json.loads(
+                StudyAnalysisService().analyze_study(
+                    study.id, 2, ["gaze"], min_quality=0.5
+                )
+            )
+
+            assert data["min_quality"] == 0.5
+            assert [s["subject_id"] for s in data["per_subject"]] == [subjects[0].id]
+            assert data["heatmap"]["total"] == 50
+            assert data["tasks"][0]["logs"] == 2
+
+            data = json.loads(
+                StudyAnalysisService().compare_scanpaths(study.id, min_quality=0.5)
+            )
+            assert data["subjects"] == [subjects[0].id]
+
+    def test_compare_scanpaths(self, app, tmp_path):
+        """Test the similarity matrix of the normalized subjects of a study."""
+        app.config["ANALYSIS_WORKERS"] = 1
+        app.config["RESULT_CACHE_DIR"] = str(tmp_path)
+
+        with app.app_context():
+            from api.services import StudyAnalysisService
+
+            study, subjects = self._create_study()
+            service = StudyAnalysisService()
+            progress = []
+
+            data = json.loads(
+                service.compare_scanpaths(
+                    study.id,
+                    2,
+                    method="scanmatch",
+                    progress=lambda done, total: progress.append(done / total),
+                )
+            )
+
+            assert data["encoding"] == {"grid": 2}
+            assert data["subjects"] == [subjects[0].id, subjects[1].id]
+            assert data["excluded"] == [subjects[2].id]
+            assert data["lengths"] == [1, 1]
+            assert data["similarity"] == [[1.0, 1.0], [1.0, 1.0]]
+            assert data["mean_similarity"] == 1.0
+            assert progress[-1] == 1.0
+
+            # Fixations at (0.75, 0.25) fall in the second AOI only
+            aois = [
+                {"x": 0.0, "y": 0.0, "width": 0.5, "height": 0.5},
+                {"x": 0.5, "y": 0.0, "width": 0.5, "height": 0.5},
+            ]
+            data = json.loads(service.compare_scanpaths(study.id, aois=aois))
+            assert data["encoding"] == {"aois": aois}
+            assert data["lengths"] == [1, 1]
+
+            assert service.compare_scanpaths(99999) is None
+            with pytest.raises(ValueError):
+                service.compare_scanpaths(study.id, method="dtw")
+            with pytest.raises(ValueError):
+                service.compare_scanpaths(study.id, aois=[{"x": 0, "y": 0}])
+
+    def test_pairwise_similarity_process_pool(self, app, monkeypatch):
+        """Test that pair tasks in worker processes fill the whole matrix."""
+        import numpy as np
+        from analytics import grid_substitution, pairwise_similarity
+
+        app.config["ANALYSIS_WORKERS"] = 2
+        monkeypatch.setattr("api.services.SCANPATH_PAIRS_PER_TASK", 7)
+
+        with app.app_context():
+            from api.services import StudyAnalysisService
+
+            rng = np.random.default_rng(0)
+            sequences = [rng.integers(0, 9, rng.integers(1, 20)) for _ in range(12)]
+            substitution = grid_substitution(3)
+            progress = []
+
+            similarity = StudyAnalysisService()._pairwise_similarity(
+                sequences, substitution, lambda done, total: progress.append(total)
+            )
+
+            rows, columns = np.triu_indices(12, k=1)
+            expected = pairwise_similarity(sequences, substitution)
+            assert np.allclose(similarity[rows, columns], expected)
+            assert np.allclose(similarity, similarity.T)
+            assert np.allclose(np.diag(similarity), 1.0)
+            assert progress == [10] * 10
+
+
+class TestJobService:
+    """Tests for JobService."""
+
+    def test_run_job_inline(self, app, tmp_path):
+        """Test a job that runs in the submitting thread."""
+        app.config["JOB_WORKERS"] = 0
+        app.config["JOB_RESULTS_DIR"] = str(tmp_path)
+
+        with app.app_context():
+            from api.services import JobService
+            from repositories import SubjectRepository, TaskLogRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+            TaskLogRepository().create_tasklog(
+                start_time=datetime(2025, 10, 23, 10, 0, 0),
+                response="Yes",
+                subject_id=subject.id,
+            )
+            subject_repo.commit()
+
+            service = JobService()
+            job = service.submit_job("tasklogs-csv", {"subject": subject.id})
+
+            assert job["status"] == "succeeded"
+            assert job["progress"] == 1.0
+            assert job["params"] == {"subject": subject.id}
+
+            finished, path = service.get_job_result(job["id"])
+            assert finished.result_name == f"tasklogs_{subject.id}.csv"
+            with open(path, "rb") as f:
+                assert f.read().startswith(b"start_time,end_time,response")
+
+    def test_failed_job(self, app, tmp_path):
+        """Test that errors of a job are recorded instead of raised."""
+        app.config["JOB_WORKERS"] = 0
+        app.config["JOB_RESULTS_DIR"] = str(tmp_path)
+
+        with app.app_context():
+            from api.services import JobService
+
+            service = JobService()
+            job = service.submit_job("study-analysis", {"study": 99999})
+
+            assert job["status"] == "failed"
+            assert job["error"] == "Study not found"
+            assert job["params"] == {
+                "study": 99999,
+                "bins": 128,
+                "fields": ["mouse", "gaze"],
+            }
+            assert service.get_job_result(job["id"])[1] is None
+            assert service.get_job_result("missing") is None
+
+    def test_scanpath_similarity_job(self, app, tmp_path):
+        """Test that scanpath jobs normalize their parameters."""
+        app.config["JOB_WORKERS"] = 0
+        app.config["JOB_RESULTS_DIR"] = str(tmp_path)
+        app.config["ANALYSIS_WORKERS"] = 1
+
+        with app.app_context():
+            from api.services import JobService
+            from repositories import StudyRepository
+
+            study = StudyRepository().create_study("Study")
+            StudyRepository().commit()
+
+            service = JobService()
+            with pytest.raises(ValueError):
+                service.submit_job(
+                    "scanpath-similarity", {"study": study.id, "aois": [[0, 0, 1, 1]]}
+                )
+
+            job = service.submit_job(
+                "scanpath-similarity", {"study": study.id, "grid": 100}
+            )
+            assert job["status"] == "succeeded"
+            assert job["params"] == {
+                "study": study.id,
+                "grid": 32,
+                "method": "levenshtein",
+            }
+
+            finished, path = service.get_job_result(job["id"])
+            assert finished.result_name == f"study_{study.id}_scanpaths.json"
+            with open(path, "rb") as f:
+                assert json.loads(f.read())["similarity"] == []
+
+    def test_invalid_jobs(self, app):
+        """Test that unknown kinds and bad parameters are rejected."""
+        with app.app_context():
+            from api.services import JobService
+
+            service = JobService()
+            with pytest.raises(ValueError):
+                service.submit_job("reindex", {})
+            with pytest.raises(ValueError):
+                service.submit_job("points-csv", {})
+            with pytest.raises(ValueError):
+                service.submit_job("points-csv", {"subject": 1.5})
+            with pytest.raises(ValueError):
+                service.submit_job("user-heatmap", {"subject": 1, "fields": "pupil"})
+            with pytest.raises(ValueError):
+                service.submit_job("user-heatmap", {"subject": 1, "space": "page"})
+
+    def test_queued_jobs_are_reused_and_recovered(self, app, tmp_path):
+        """Test deduplication of queued jobs and recovery after a restart."""
+        from state import get_job_runner
+
+        app.config["JOB_RESULTS_DIR"] = str(tmp_path)
+
+        with app.app_context():
+            from api.services import JobService
+            from repositories import JobRepository
+
+            # A runner that never runs anything, like a server that stopped
+            runner = get_job_runner()
+            runner.submit = lambda *args: None
+
+            service = JobService()
+            first = service.submit_job("all-points-csv", {})
+            again = service.submit_job("all-points-csv", {"ignored": True})
+            assert again["id"] == first["id"]
+            assert again["status"] == "queued"
+
+            repo = JobRepository()
+            running = repo.create_job("points-csv", {"subject": 1})
+            repo.update_job(running.id, status="running")
+            repo.commit()
+
+            app.config["JOB_WORKERS"] = 0
+            assert service.recover_jobs() == 1
+
+            assert service.get_job_status(running.id)["status"] == "failed"
+            # No subjects, so the resumed export fails
+            resumed = service.get_job_status(first["id"])
+            assert resumed["status"] == "failed"
+            assert resumed["error"] == "No registered subjects"
+
+            # A job is only run by the worker that claims it
+            service.run_job(first["id"])
+            assert service.get_job_status(first["id"]) == resumed
+
+    def test_jobs_are_recovered_on_the_first_request(self, app, tmp_path):
+        """Test recovery in a process serving the app without the reloader."""
+        from api.services import init_job_recovery
+
+        app.config["JOB_WORKERS"] = 0
+        app.config["JOB_RESULTS_DIR"] = str(tmp_path)
+        init_job_recovery(app)
+
+        with app.app_context():
+            from api.services import JobService
+            from repositories import JobRepository
+
+            repo = JobRepository()
+            queued = repo.create_job("all-points-csv", {})
+            interrupted = repo.create_job("points-csv", {"subject": 1})
+            repo.update_job(
+                interrupted.id,
+                status="running",
+                started_at=datetime.now() - timedelta(days=1),
+            )
+            # Started after this process, so running in another live process
+            live = repo.create_job("points-csv", {"subject": 2})
+            repo.update_job(live.id, status="running", started_at=datetime.now())
+            repo.commit()
+            ids = queued.id, interrupted.id, live.id
+
+        client = app.test_client()
+        client.get("/api/jobs/unknown")
+
+        with app.app_context():
+            service = JobService()
+            statuses = [service.get_job_status(job_id)["status"] for job_id in ids]
+            assert statuses == ["failed", "failed", "running"]
+            assert service.get_job_status(ids[0])["error"] == "No registered subjects"
+
+            # Only the first request recovers jobs
+            later = repo.create_job("all-points-csv", {"later": True})
+            repo.commit()
+            client.get("/api/jobs/unknown")
+            assert service.get_job_status(later.id)["status"] == "queued"
+
+    def test_expired_jobs_are_purged(self, app, tmp_path):
+        """Test that old finished jobs and their files are deleted."""
+        from datetime import timedelta
+
+        app.config["JOB_WORKERS"] = 0
+        app.config["JOB_RESULTS_DIR"] = str(tmp_path)
+
+        with app.app_context():
+            from api.services import JobService
+            from repositories import JobRepository, SubjectRepository
+
+            subject_repo = SubjectRepository()
+            subject = subject_repo.create_subject("Test", "User", 25)
+            subject_repo.commit()
+
+            service = JobService()
+            old = service.submit_job("tasklogs-csv", {"subject": subject.id})
+            assert (tmp_path / old["id"]).exists()
+
+            JobRepository().update_job(
+                old["id"], finished_at=datetime.now() - timedelta(days=30)
+            )
+            JobRepository().commit()
+
+            service.submit_job("user-heatmap", {"subject": subject.id})
+
+            assert service.get_job_status(old["id"]) is None
+            assert not (tmp_path / old["id"]).exists()
@@ -0,0 +1,210 @@
+"""
+Tests for the storage module.
+"""
+
+import os
+import time
+from storage import ResultCache
+
+
+class TestResultCache:
+    """Tests for ResultCache class."""
+
+    def test_get_or_create(self, tmp_path):
+        """Test that artifacts are built once and then served from disk."""
+        cache = ResultCache(str(tmp_path))
+        calls = []
+
+        def build():
+            calls.append(1)
+            return b"date,x,y\n"
+
+        assert cache.get_or_create("subject-1", "points.csv", "1.1.0", build) == (
+            b"date,x,y\n"
+        )
+        assert cache.get_or_create("subject-1", "points.csv", "1.1.0", build) == (
+            b"date,x,y\n"
+        )
+        assert len(calls) == 1
+
+        # A new data version is a different entry
+        cache.get_or_create("subject-1", "points.csv", "2.2.0", build)
+        assert len(calls) == 2
+
+    def test_invalidate_scope(self, tmp_path):
+        """Test removing every artifact of a scope."""
+        cache = ResultCache(str(tmp_path))
+        cache.put("subject-1", "points.csv", "v1", b"one")
+        cache.put("subject-2", "points.csv", "v1", b"two")
+
+        cache.invalidate("subject-1")
+
+        assert cache.get("subject-1", "points.csv", "v1") is None
+        assert cache.get("subject-2", "points.csv", "v1") == b"two"
+
+    def test_lru_eviction(self, tmp_path):
+        """Test that the least recently used entries are evicted first."""
+        cache = ResultCache(str(tmp_path), max_bytes=20)
+        cache.put("subject-1", "points.csv", "v1", b"a" * 8)
+        cache.put("subject-2", "points.csv", "v1", b"b" * 8)
+
+        # Make subject-1 the most recently used entry
+        old = time.time() - 60
+        os.utime(cache.path_for("subject-2", "points.csv", "v1"), (old, old))
+        os.utime(cache.path_for("subject-1", "points.csv", "v1"), (old, old))
+        cache.get("subject-1", "points.csv", "v1")
+
+        cache.put("subject-3", "points.csv", "v1", b"c" * 8)
+
+        assert cache.get("subject-2", "points.csv", "v1") is None
+        assert cache.get("subject-1", "points.csv", "v1") == b"a" * 8
+        assert cache.get("subject-3", "points.csv", "v1") == b"c" * 8
+        assert cache.size() <= 20
+
+
+class TestColdStore:
+    """Tests for ColdStore class."""
+
+    def _arrays(self):
+        import numpy as np
+
+        return {
+            "id": np.array([1, 2, 3], dtype=np.int64),
+            "date": np.array(
+                ["2025-10-23T10:30:00", "2025-10-23T10:30:01", "2025-10-23T10:30:02"],
+                dtype="datetime64[us]",
+            ),
+            "x_mouse": np.array([1.0, 2.0, 3.0]),
+            "y_mouse": np.array([4.0, 5.0, 6.0]),
+            "x_gaze": np.array([7.0, np.nan, 9.0]),
+            "y_gaze": np.array([10.0, np.nan, 12.0]),
+        }
+
+    def test_write_and_read_memory_mapped(self, tmp_path):
+        """Test that uncompressed columns are opened as memory maps."""
+        import numpy as np
+        from storage import ColdStore
+
+        store = ColdStore(str(tmp_path))
+        assert store.read(1) is None
+
+        store.write(1, self._arrays())
+        columns = store.read(1, ["date", "x_gaze"])
+
+        assert isinstance(columns["x_gaze"], np.memmap)
+        assert columns["date"].dtype == np.dtype("datetime64[us]")
+        assert np.isnan(columns["x_gaze"][1])
+        assert store.meta(1)["count"] == 3
+        assert store.meta(1)["last_id"] == 3
+
+    def test_compressed_rewrite(self, tmp_path):
+        """Test replacing a subject with a compressed file."""
+        from storage import ColdStore
+
+        store = ColdStore(str(tmp_path))
+        store.write(1, self._arrays())
+        store.write(1, self._arrays(), compress=True)
+
+        assert store.meta(1)["compressed"] is True
+        assert store.read(1)["id"].tolist() == [1, 2, 3]
+        assert os.listdir(tmp_path) == ["subject_1"]
+
+        store.delete(1)
+        assert not store.has(1)
+
+
+class TestSampleStore:
+    """Tests for SampleStore class."""
+
+    def _records(self, ids, seconds):
+        import numpy as np
+        from storage.sample_store import record_dtype
+
+        records = np.zeros(len(ids), dtype=record_dtype())
+        records["id"] = ids
+        records["date"] = [
+            np.datetime64("2025-10-23T10:30:00", "us") + np.timedelta64(s, "s")
+            for s in seconds
+        ]
+        records["x_mouse"] = seconds
+        return records
+
+    def test_append_and_read_memory_mapped(self, tmp_path):
+        """Test that appended records are read as views of the file."""
+        import numpy as np
+        from storage import SampleStore
+
+        store = SampleStore(str(tmp_path))
+        assert store.read(1) is None
+
+        store.append(1, self._records([1, 2], [0, 1]))
+        store.append(1, self._records([3], [2]))
+        columns = store.read(1, ["id", "x_mouse"])
+
+        assert store.count(1) == 3
+        assert isinstance(columns["x_mouse"].base, np.memmap)
+        assert columns["id"].tolist() == [1, 2, 3]
+
+    def test_out_of_order_append(self, tmp_path):
+        """Test that late batches are read back in time order."""
+        from storage import SampleStore
+
+        store = SampleStore(str(tmp_path))
+        store.append(1, self._records([1, 2], [0, 4]))
+        store.append(1, self._records([3], [2]))
+        assert store.read(1)["x_mouse"].tolist() == [0, 2, 4]
+
+        store.replace(1, self._records([1, 3, 2], [0, 2, 4]))
+        # No temporary files or unsorted marker are left behind
+        files = [name for name in os.listdir(tmp_path) if not name.endswith(".lock")]
+        assert files == ["subject_1.bin"]
+        assert store.read(1)["id"].tolist() == [1, 3, 2]
+
+        store.delete(1)
+        assert store.read(1) is None
+
+    def test_sync_rebuilds_a_file_out_of_step(self, tmp_path):
+        """Test that a batch is only appended to a file holding the others."""
+        from storage import SampleStore
+
+        store = SampleStore(str(tmp_path))
+        saved = self._records([1, 2, 3, 4], [0, 1, 2, 3])
+        rebuilds = []
+
+        def rebuild():
+            rebuilds.append(True)
+            return saved
+
+        # Missing file, as when the store is enabled after the first batch
+        store.sync(1, saved[2:], lambda: 4, rebuild)
+        assert store.read(1)["id"].tolist() == [1, 2, 3, 4]
+        assert len(rebuilds) == 1
+
+        # A batch the rebuild already included is not appended again
+        store.sync(1, saved[2:], lambda: 4, rebuild)
+        assert store.read(1)["id"].tolist() == [1, 2, 3, 4]
+        assert len(rebuilds) == 2
+
+        saved = self._records([1, 2, 3, 4, 5, 6], [0, 1, 2, 3, 4, 5])
+        store.sync(1, saved[4:], lambda: 6, rebuild)
+        assert store.read(1)["id"].tolist() == [1, 2, 3, 4, 5, 6]
+        assert len(rebuilds) == 2
+
+    def test_equal_dates_appended_out_of_id_order(self, tmp_path):
+        """Test that ties in date are read back in id order."""
+        from storage import SampleStore
+
+        store = SampleStore(str(tmp_path))
+        # Two batches committed as ids 3-4 and 5, appended in the other order
+        store.append(1, self._records([5], [1]))
+        store.append(1, self._records([3, 4], [0, 1]))
+        assert store.read(1)["id"].tolist() == [3, 4, 5]
+
+        # Within a batch too
+        store.append(2, self._records([7, 6], [0, 0]))
+        assert store.read(2)["id"].tolist() == [6, 7]
+
+        # In (date, id) order the file stays a plain memory map
+        store.append(3, self._records([1, 2], [0, 0]))
+        store.append(3, self._records([3], [0]))
+        assert not (tmp_path / "subject_3.unsorted").exists()